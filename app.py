@@ -1,19 +1,97 @@
-from fastapi import FastAPI, Request
+import asyncio
+import time
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Header, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import Response
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
+from starlette.concurrency import run_in_threadpool
 from uvicorn import run as app_run
 
 from typing import Optional
 
 # Importing constants and pipeline modules from the project
-from src.constants import APP_HOST, APP_PORT
-from src.pipeline.prediction_pipeline import VehicleData, VehicleDataClassifier
-from src.pipeline.training_pipeline import TrainPipeline
+from src.constants import (APP_HOST, APP_PORT, MODEL_SERVING_ADMISSION_CONTROL, MODEL_SERVING_BATCH_CHUNK_SIZE,
+                          MODEL_SERVING_EXECUTOR, MODEL_SERVING_EXECUTOR_QUEUE_SIZE, MODEL_SERVING_EXECUTOR_WORKERS,
+                          MODEL_SERVING_MICRO_BATCHING, MODEL_SERVING_MICRO_BATCH_MAX_SIZE,
+                          MODEL_SERVING_MICRO_BATCH_MAX_WAIT_MS, MODEL_SERVING_MODEL_KEY_HEADER,
+                          MODEL_SERVING_PREDICT_MAX_CONCURRENCY, MODEL_SERVING_PREDICT_MAX_QUEUE,
+                          MODEL_SERVING_PREDICT_QUEUE_TIMEOUT_SECONDS, MODEL_SERVING_PREDICT_TIMEOUT_SECONDS,
+                          MODEL_SERVING_REQUEST_DEADLINE_HEADER, MODEL_SERVING_REQUEST_DEADLINE_SECONDS,
+                          MODEL_SERVING_STATIC_MAX_CONCURRENCY, MODEL_SERVING_STATIC_MAX_QUEUE,
+                          MODEL_SERVING_TRAINING_JOBS_DIR, MODEL_SERVING_TRAIN_MAX_CONCURRENCY,
+                          MODEL_SERVING_TRAIN_MAX_QUEUE, MODEL_SERVING_UPLOAD_READ_SIZE, MODEL_SERVING_WARM_UP,
+                          MODEL_SERVING_WARM_UP_BATCH_SIZE, MODEL_SERVING_WARM_UP_RETRY_SECONDS)
+from src.serving.admission import AdmissionControlMiddleware, AdmissionLimiter, remaining_seconds
+from src.serving.batch_prediction import BatchPredictionError, BatchPredictor
+from src.serving.columnar_prediction import ColumnarFormatError, ColumnarPredictor, columnar_content_type
+from src.serving.feature_encoder import FeatureEncodingError, get_feature_encoder
+from src.serving.inference_executor import (InferenceExecutor, InferenceQueueFullError, InferenceTimeoutError,
+                                            predict_features, predict_features_with_probability)
+from src.serving.micro_batcher import MicroBatcher
+from src.serving.prediction_cache import get_prediction_cache
+from src.serving.prediction_log import get_prediction_log, stop_prediction_log
+from src.serving.schemas import PredictionResponse, VehicleFeatures
+from src.logger import logger
+from src.serving.metrics import PROMETHEUS_CONTENT_TYPE, REGISTRY, REQUESTS_IN_FLIGHT, stage_timer
+from src.serving.model_cache import get_model_cache, stop_model_caches
+from src.serving.model_registry import UnknownModelError, get_model_registry, stop_model_registry
+from src.serving.training_jobs import TrainingJobManager
+
+# Flipped by the startup warm-up; reported by the readiness endpoint
+serving_state = {"ready": not MODEL_SERVING_WARM_UP, "model_version": None, "warm_up_seconds": None, "error": None}
+
+def warm_up_model():
+    """
+    Loads the production model and scores a dummy batch, so the first request pays for neither.
+    """
+    dummy_batch = get_feature_encoder().dummy_rows(MODEL_SERVING_WARM_UP_BATCH_SIZE)
+    get_model_cache().get_model().predict_array(dummy_batch, feature_names=get_feature_encoder().columns)
+    templates.get_template("vehicledata.html")
+
+async def warm_up():
+    """
+    Warms the model and the inference pool workers, retrying until it succeeds.
+    """
+    started = time.perf_counter()
+    while True:
+        try:
+            await run_in_threadpool(warm_up_model)
+            if inference_executor.kind != "inline":
+                dummy_row = get_feature_encoder().dummy_rows(1)
+                await asyncio.gather(*[inference_executor.run(predict_features, dummy_row, get_feature_encoder().columns)
+                                       for _ in range(inference_executor.max_workers)])
+            break
+        except Exception as e:
+            serving_state["error"] = f"{e}"
+            logger.error(f"Model warm-up failed, retrying in {MODEL_SERVING_WARM_UP_RETRY_SECONDS}s: {e}")
+            await asyncio.sleep(MODEL_SERVING_WARM_UP_RETRY_SECONDS)
+
+    serving_state.update(ready=True, model_version=get_model_cache().version, error=None,
+                         warm_up_seconds=round(time.perf_counter() - started, 3))
+    logger.info(f"Model warm-up finished in {serving_state['warm_up_seconds']}s")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Fails startup on an unknown PREDICTION_LOG sink instead of every logged request
+    get_prediction_log()
+    # Warm up in the background so the server accepts liveness probes right away
+    warm_up_task = asyncio.create_task(warm_up()) if MODEL_SERVING_WARM_UP else None
+    yield
+    if warm_up_task is not None:
+        warm_up_task.cancel()
+    if micro_batcher is not None:
+        await micro_batcher.stop()
+    inference_executor.shutdown()
+    training_job_manager.shutdown()
+    stop_prediction_log()
+    stop_model_caches()
+    stop_model_registry()
 
 # Initialize FastAPI application
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 # Mount the 'static' directory for serving static files (like CSS)
 app.mount("/static", StaticFiles(directory="static"), name="static")
@@ -21,6 +99,22 @@ app.mount("/static", StaticFiles(directory="static"), name="static")
 # Set up Jinja2 template engine for rendering HTML templates
 templates = Jinja2Templates(directory='templates')
 
+# Concurrency limits and bounded wait queues per route group, so overload is shed fast with 503/429
+admission_limiters = {
+    "predict": AdmissionLimiter("predict", max_concurrency=MODEL_SERVING_PREDICT_MAX_CONCURRENCY,
+                                max_queue=MODEL_SERVING_PREDICT_MAX_QUEUE,
+                                queue_timeout_seconds=MODEL_SERVING_PREDICT_QUEUE_TIMEOUT_SECONDS),
+    "train": AdmissionLimiter("train", max_concurrency=MODEL_SERVING_TRAIN_MAX_CONCURRENCY,
+                              max_queue=MODEL_SERVING_TRAIN_MAX_QUEUE, queue_timeout_seconds=1,
+                              status_code=429, retry_after_seconds=30),
+    "static": AdmissionLimiter("static", max_concurrency=MODEL_SERVING_STATIC_MAX_CONCURRENCY,
+                               max_queue=MODEL_SERVING_STATIC_MAX_QUEUE, queue_timeout_seconds=1),
+}
+if MODEL_SERVING_ADMISSION_CONTROL:
+    app.add_middleware(AdmissionControlMiddleware, limiters=admission_limiters,
+                       default_deadline_seconds={"predict": MODEL_SERVING_REQUEST_DEADLINE_SECONDS},
+                       deadline_header=MODEL_SERVING_REQUEST_DEADLINE_HEADER)
+
 # Allow all origins for Cross-Origin Resource Sharing (CORS)
 origins = ["*"]
 
@@ -33,44 +127,131 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Bounded pool that keeps CPU-bound inference off the event loop
+inference_executor = InferenceExecutor(kind=MODEL_SERVING_EXECUTOR,
+                                       max_workers=MODEL_SERVING_EXECUTOR_WORKERS,
+                                       max_queue_size=MODEL_SERVING_EXECUTOR_QUEUE_SIZE,
+                                       timeout_seconds=MODEL_SERVING_PREDICT_TIMEOUT_SECONDS)
+
+# Optional coalescing of concurrent single-row predictions into one model call, scored on the same pool
+micro_batcher = MicroBatcher(feature_names=get_feature_encoder().columns,
+                             max_batch_size=MODEL_SERVING_MICRO_BATCH_MAX_SIZE,
+                             max_wait_ms=MODEL_SERVING_MICRO_BATCH_MAX_WAIT_MS,
+                             executor=inference_executor) if MODEL_SERVING_MICRO_BATCHING else None
+
+# Runs training pipelines in a separate process, one at a time (across pre-forked workers with a jobs dir)
+training_job_manager = TrainingJobManager(jobs_dir=MODEL_SERVING_TRAINING_JOBS_DIR or None)
+
+# Per-stage latency histograms of the form prediction route
+form_parse_seconds = stage_timer("form_parse")
+encode_seconds = stage_timer("encode")
+inference_seconds = stage_timer("inference")
+render_seconds = stage_timer("render")
+
+def serving_component_samples():
+    """
+    Samples of the inference pool, prediction cache and micro-batcher counters, read at scrape time.
+    """
+    for name, value in inference_executor.stats().items():
+        if name != "kind":
+            yield {"component": "inference_executor", "stat": name}, value
+    prediction_cache = get_prediction_cache()
+    if prediction_cache is not None:
+        for name, value in prediction_cache.stats().items():
+            yield {"component": "prediction_cache", "stat": name}, value
+    if MODEL_SERVING_ADMISSION_CONTROL:
+        for group, limiter in admission_limiters.items():
+            for name, value in limiter.stats().items():
+                yield {"component": f"admission_{group}", "stat": name}, value
+    prediction_log = get_prediction_log()
+    if prediction_log is not None:
+        for name, value in prediction_log.stats().items():
+            yield {"component": "prediction_log", "stat": name}, value
+    if micro_batcher is not None:
+        for name in ("total_flushes", "total_rows"):
+            yield {"component": "micro_batcher", "stat": name}, getattr(micro_batcher, name)
+    yield {"component": "model", "stat": "ready"}, int(serving_state["ready"])
+
+REGISTRY.callback("vehicle_serving_component", "Counters and sizes of the serving components.", "gauge",
+                  serving_component_samples)
+
+def model_registry_samples():
+    """
+    Per-model hits, loads, evictions and sizes of the model registry, read at scrape time.
+    """
+    for model_key, model_stats in get_model_registry().stats()["models"].items():
+        for name in ("loaded", "size_bytes", "hits", "loads", "evictions", "total_load_seconds"):
+            yield {"model": model_key, "stat": name}, int(model_stats[name]) if name == "loaded" else model_stats[name]
+
+REGISTRY.callback("vehicle_model_registry", "Hits, loads and sizes of the models in the model registry.", "gauge",
+                  model_registry_samples)
+
+def log_prediction(route: str, features, prediction, probability: Optional[float], latency_seconds: float,
+                   model_key: Optional[str]):
+    """
+    Queues a served prediction on the prediction log, when PREDICTION_LOG is enabled; never blocks.
+    """
+    prediction_log = get_prediction_log()
+    if prediction_log is None:
+        return
+    prediction_log.log(route, features, prediction, probability=probability, latency_seconds=latency_seconds,
+                       model_key=model_key, model_version=served_model_version(model_key))
+
+def served_model_version(model_key: Optional[str]):
+    """
+    Version of the production model, or of the registry model of model_key.
+    """
+    return get_model_cache().version if model_key is None else get_model_registry().model_version(model_key)
+
+def batch_prediction_logger(route: str, model_key: Optional[str]):
+    """
+    Returns a callback queueing every row a batch predictor scores on the prediction log, one record
+    per row, or None when PREDICTION_LOG is disabled.
+    """
+    prediction_log = get_prediction_log()
+    if prediction_log is None:
+        return None
+
+    def log_predictions(features, predictions, latency_seconds: float) -> None:
+        prediction_log.log_many(route, features, predictions, latency_seconds=latency_seconds,
+                                model_key=model_key, model_version=served_model_version(model_key))
+    return log_predictions
+
 class DataForm:
     """
     DataForm class to handle and process incoming form data.
-    This class defines the vehicle-related attributes expected from the form.
+    The expected vehicle fields are the prediction_columns of config/schema.yaml.
     """
     def __init__(self, request: Request):
         self.request: Request = request
 
-        self.Gender: Optional[int] = None
-        self.Age: Optional[int] = None
-        self.Driving_License: Optional[int] = None
-        self.Region_Code: Optional[float] = None
-        self.Previously_Insured: Optional[int] = None
-        self.Annual_Premium: Optional[float] = None
-        self.Policy_Sales_Channel: Optional[float] = None
-        self.Vintage: Optional[int] = None
-        self.Vehicle_Age_lt_1_Year: Optional[int] = None
-        self.Vehicle_Age_gt_2_Years: Optional[int] = None
-        self.Vehicle_Damage_Yes: Optional[int] = None
-
-    async def get_vehicle_data(self):
+    async def get_vehicle_features(self):
         """
-        Method to retrieve and assign form data to class attributes.
-        This method is asynchronous to handle form data fetching without blocking.
+        Method to parse the form data straight into a numeric feature row, in the
+        column order of config/schema.yaml, without building a DataFrame.
+        Raises FeatureEncodingError for missing or invalid values.
         """
+        started = time.perf_counter()
         form = await self.request.form()
+        parsed = time.perf_counter()
+        vehicle_features = get_feature_encoder().encode(form)
+        form_parse_seconds.observe(parsed - started)
+        encode_seconds.observe(time.perf_counter() - parsed)
+        return vehicle_features
+
+@app.get("/health/live")
+async def liveRouteClient():
+    """
+    Liveness probe: the process is up and serving HTTP.
+    """
+    return JSONResponse({"status": "alive"})
 
-        self.Gender = form.get("Gender")
-        self.Age = form.get("Age")
-        self.Driving_License = form.get("Driving_License")
-        self.Region_Code = form.get("Region_Code")
-        self.Previously_Insured = form.get("Previously_Insured")
-        self.Annual_Premium = form.get("Annual_Premium")
-        self.Policy_Sales_Channel = form.get("Policy_Sales_Channel")
-        self.Vintage = form.get("Vintage")
-        self.Vehicle_Age_lt_1_Year = form.get("Vehicle_Age_lt_1_Year")
-        self.Vehicle_Age_gt_2_Years = form.get("Vehicle_Age_gt_2_Years")
-        self.Vehicle_Damage_Yes = form.get("Vehicle_Damage_Yes")
+@app.get("/health/ready")
+async def readyRouteClient():
+    """
+    Readiness probe: returns 200 only once the model has been loaded and warmed up.
+    """
+    return JSONResponse(serving_state, status_code=200 if serving_state["ready"] else 503)
 
 @app.get("/", tags=["authentication"])
 async def index(request: Request):
@@ -81,59 +262,228 @@ async def index(request: Request):
 @app.get("/train")
 async def trainRouteClient():
     """
-    Endpoint to initiate the model training pipeline.
+    Endpoint to start the model training pipeline in the background.
+    Returns the job ID immediately; while a job is running, the running job is returned instead of starting another.
     """
     try:
-        train_pipeline = TrainPipeline()
-        train_pipeline.run_pipeline()
-        return Response("Training successful!!!")
+        job, created = training_job_manager.submit()
+        return JSONResponse({"job_id": job.job_id, "status": job.status, "created": created,
+                             "status_url": f"/train/{job.job_id}"}, status_code=202)
 
     except Exception as e:
         return Response(f"Error Occurred! {e}")
 
+@app.get("/train/{job_id}")
+async def trainStatusRouteClient(job_id: str):
+    """
+    Endpoint to get the status and per-stage timings of a training job.
+    """
+    job_status = training_job_manager.get_status(job_id)
+    if job_status is None:
+        return JSONResponse({"status": False, "error": f"Unknown training job {job_id}"}, status_code=404)
+    return JSONResponse(job_status)
+
 @app.post("/")
 async def predictRouteClient(request: Request):
     """
     Endpoint to receive form data, process it, and make a prediction.
     """
+    REQUESTS_IN_FLIGHT.inc(1, "predict")
     try:
         form = DataForm(request)
-        await form.get_vehicle_data()
-        
-        vehicle_data = VehicleData(
-                                Gender= form.Gender,
-                                Age = form.Age,
-                                Driving_License = form.Driving_License,
-                                Region_Code = form.Region_Code,
-                                Previously_Insured = form.Previously_Insured,
-                                Annual_Premium = form.Annual_Premium,
-                                Policy_Sales_Channel = form.Policy_Sales_Channel,
-                                Vintage = form.Vintage,
-                                Vehicle_Age_lt_1_Year = form.Vehicle_Age_lt_1_Year,
-                                Vehicle_Age_gt_2_Years = form.Vehicle_Age_gt_2_Years,
-                                Vehicle_Damage_Yes = form.Vehicle_Damage_Yes
-                                )
-
-        # Convert form data into a DataFrame for the model
-        vehicle_df = vehicle_data.get_vehicle_input_data_frame()
-
-        # Initialize the prediction pipeline
-        model_predictor = VehicleDataClassifier()
-
-        # Make a prediction and retrieve the result
-        value = model_predictor.predict(dataframe=vehicle_df)[0]
+        vehicle_features = await form.get_vehicle_features()
+        model_key = request.headers.get(MODEL_SERVING_MODEL_KEY_HEADER) or None
+
+        # Make a prediction and retrieve the result; the micro-batcher only serves the production model
+        started = time.perf_counter()
+        if micro_batcher is not None and model_key is None:
+            try:
+                value = await asyncio.wait_for(micro_batcher.predict(vehicle_features), timeout=remaining_seconds())
+            except asyncio.TimeoutError:
+                raise InferenceTimeoutError("Request deadline passed while waiting for the micro-batch") from None
+        else:
+            predictions = await inference_executor.run(predict_features, vehicle_features, get_feature_encoder().columns,
+                                                       model_key)
+            value = predictions[0]
+        inference_time = time.perf_counter() - started
+        inference_seconds.observe(inference_time)
+        log_prediction("form", vehicle_features, value, None, inference_time, model_key)
 
         # Interpret the prediction result as 'Response-Yes' or 'Response-No'
         status = "Response-Yes" if value == 1 else "Response-No"
 
         # Render the same HTML page with the prediction result
-        return templates.TemplateResponse(
+        started = time.perf_counter()
+        response = templates.TemplateResponse(
             "vehicledata.html",
             {"request": request, "context": status},
         )
-        
+        render_seconds.observe(time.perf_counter() - started)
+        return response
+
+    except FeatureEncodingError as e:
+        return JSONResponse({"status": False, "error": f"{e}"}, status_code=400)
+    except UnknownModelError as e:
+        return JSONResponse({"status": False, "error": f"{e}"}, status_code=404)
+    except InferenceQueueFullError as e:
+        return JSONResponse({"status": False, "error": f"{e}"}, status_code=503, headers={"Retry-After": "1"})
+    except InferenceTimeoutError as e:
+        return JSONResponse({"status": False, "error": f"{e}"}, status_code=504)
     except Exception as e:
         return {"status": False, "error": f"{e}"}
+    finally:
+        REQUESTS_IN_FLIGHT.dec(1, "predict")
+
+async def predict_json(vehicle_features: VehicleFeatures, model_key: Optional[str]) -> Response:
+    """
+    Scores one typed JSON request with the production model, or the registry model of model_key.
+    """
+    REQUESTS_IN_FLIGHT.inc(1, "predict_v1")
+    try:
+        features = vehicle_features.to_features()
+        started = time.perf_counter()
+        labels, probabilities = await inference_executor.run(predict_features_with_probability,
+                                                             features, get_feature_encoder().columns, model_key)
+        inference_time = time.perf_counter() - started
+        inference_seconds.observe(inference_time)
+
+        prediction = int(labels[0])
+        log_prediction("v1", features, prediction, float(probabilities[0]), inference_time, model_key)
+        result = PredictionResponse(prediction=prediction, probability=float(probabilities[0]),
+                                    label="Response-Yes" if prediction == 1 else "Response-No")
+        # Serialized by pydantic-core directly; returning a Response skips FastAPI's response_model re-validation
+        return Response(result.model_dump_json(), media_type="application/json")
+
+    except UnknownModelError as e:
+        return JSONResponse({"status": False, "error": f"{e}"}, status_code=404)
+    except InferenceQueueFullError as e:
+        return JSONResponse({"status": False, "error": f"{e}"}, status_code=503, headers={"Retry-After": "1"})
+    except InferenceTimeoutError as e:
+        return JSONResponse({"status": False, "error": f"{e}"}, status_code=504)
+    except Exception as e:
+        # The detailed error (file and line) goes to the log only
+        logger.error(f"Prediction failed: {e}")
+        return JSONResponse({"status": False, "error": "Prediction failed"}, status_code=500)
+    finally:
+        REQUESTS_IN_FLIGHT.dec(1, "predict_v1")
+
+@app.post("/v1/predict", response_model=PredictionResponse)
+async def predictV1RouteClient(vehicle_features: VehicleFeatures,
+                               model_key: Optional[str] = Header(None, alias=MODEL_SERVING_MODEL_KEY_HEADER)):
+    """
+    JSON prediction endpoint for service-to-service callers.
+    Takes one VehicleFeatures object and returns the predicted Response with its probability,
+    without form parsing or HTML rendering; invalid inputs are rejected with 422.
+    The X-Model-Key header selects a model of the model registry instead of the production model.
+    """
+    return await predict_json(vehicle_features, model_key or None)
+
+@app.post("/v1/models/{model_key}/predict", response_model=PredictionResponse)
+async def modelPredictV1RouteClient(model_key: str, vehicle_features: VehicleFeatures):
+    """
+    Same as /v1/predict, scored with the model registry's model model_key.
+    """
+    return await predict_json(vehicle_features, model_key)
+
+@app.get("/v1/models")
+async def modelsRouteClient():
+    """
+    Endpoint exposing the memory budget of the model registry and per-model hits, loads, evictions and load times.
+    """
+    return JSONResponse(get_model_registry().stats())
+
+@app.post("/predict/batch")
+async def batchPredictRouteClient(request: Request):
+    """
+    Endpoint to score many rows in one request.
+    Accepts a JSON array (or newline-delimited JSON) of VehicleData objects, a CSV body,
+    or a multipart upload with the CSV/JSON file in the 'file' field, and streams the
+    predictions back in the same format.
+    Arrow IPC (application/vnd.apache.arrow.stream or .file) and NumPy .npy (application/x-npy)
+    bodies are decoded without copying and answered with a columnar payload of the same format.
+    """
+    content_type = request.headers.get("content-type", "")
+    model_key = request.headers.get(MODEL_SERVING_MODEL_KEY_HEADER) or None
+    REQUESTS_IN_FLIGHT.inc(1, "predict_batch")
+    batch_predictor = BatchPredictor(chunk_size=MODEL_SERVING_BATCH_CHUNK_SIZE, model_key=model_key,
+                                     prediction_logger=batch_prediction_logger("batch", model_key))
+
+    try:
+        if columnar_content_type(content_type):
+            columnar_predictor = ColumnarPredictor(chunk_size=MODEL_SERVING_BATCH_CHUNK_SIZE, model_key=model_key,
+                                                   prediction_logger=batch_prediction_logger("columnar", model_key))
+            body = await request.body()
+            predictions, media_type = await run_in_threadpool(columnar_predictor.predict, body, content_type)
+            REQUESTS_IN_FLIGHT.dec(1, "predict_batch")
+            return Response(predictions, media_type=media_type)
+
+        if content_type.startswith("multipart/form-data"):
+            form = await request.form()
+            upload = form.get("file")
+            if upload is None or isinstance(upload, str):
+                return JSONResponse({"status": False, "error": "Expected a CSV or JSON file in the 'file' field"},
+                                    status_code=400)
+            is_csv = (upload.content_type or "").endswith("csv") or (upload.filename or "").endswith(".csv")
+
+            async def read_upload():
+                while chunk := await upload.read(MODEL_SERVING_UPLOAD_READ_SIZE):
+                    yield chunk
+
+            body = await batch_predictor.stream(read_upload(), "text/csv" if is_csv else "application/json")
+            media_type = "text/csv" if is_csv else "application/json"
+        else:
+            body = await batch_predictor.stream(request.stream(), content_type)
+            media_type = "text/csv" if "csv" in content_type else "application/json"
+
+        async def stream_body():
+            # The request stays in flight until the last chunk is sent or the client goes away
+            try:
+                async for chunk in body:
+                    yield chunk
+            finally:
+                REQUESTS_IN_FLIGHT.dec(1, "predict_batch")
+
+        return StreamingResponse(stream_body(), media_type=media_type)
+
+    except (BatchPredictionError, ColumnarFormatError) as e:
+        REQUESTS_IN_FLIGHT.dec(1, "predict_batch")
+        return JSONResponse({"status": False, "error": f"{e}"}, status_code=400)
+    except UnknownModelError as e:
+        REQUESTS_IN_FLIGHT.dec(1, "predict_batch")
+        return JSONResponse({"status": False, "error": f"{e}"}, status_code=404)
+    except Exception as e:
+        # The detailed error (file and line) goes to the log only
+        logger.error(f"Batch prediction failed: {e}")
+        REQUESTS_IN_FLIGHT.dec(1, "predict_batch")
+        return JSONResponse({"status": False, "error": "Batch prediction failed"}, status_code=500)
+
+@app.get("/predict/batcher/stats")
+async def batcherStatsRouteClient():
+    """
+    Endpoint exposing per-flush statistics of the micro-batcher, for tuning its window.
+    """
+    if micro_batcher is None:
+        return JSONResponse({"enabled": False})
+    return JSONResponse({"enabled": True, **micro_batcher.stats()})
+
+@app.get("/predict/cache/stats")
+async def predictionCacheStatsRouteClient():
+    """
+    Endpoint exposing hit/miss/eviction counters of this process's prediction cache.
+    """
+    prediction_cache = get_prediction_cache()
+    if prediction_cache is None:
+        return JSONResponse({"enabled": False})
+    return JSONResponse({"enabled": True, **prediction_cache.stats()})
+
+@app.get("/metrics")
+async def metricsRouteClient():
+    """
+    Endpoint exposing stage latency histograms, in-flight requests, model loads and
+    cache/pool counters in the Prometheus text format.
+    Under prefork_server.py these are the counters of the worker that answered, without a worker label.
+    """
+    return Response(REGISTRY.render(), media_type=PROMETHEUS_CONTENT_TYPE)
 
 # Main entry point to start the FastAPI server
 if __name__ == "__main__":
@@ -0,0 +1,100 @@
+"""
+Early-exit forest voting versus evaluating every tree of the compiled forest.
+
+Rows come from the ingested test file written by DataIngestion (DataIngestionArtifact.test_file_path,
+CSV or Parquet), so they keep the collection's class distribution; the transformed test array is
+SMOTEENN-resampled and would not. The rows go through the same gender mapping, id drop, dummy
+columns and renames as in DataTransformation; rows with missing values, which the serving encoder
+rejects, are dropped. For every chunk size the benchmark checks that early exit returns exactly the
+full forest's labels and reports how many trees rows needed and the latency at several batch sizes,
+as JSON.
+
+    python benchmarks/early_exit_benchmark.py --model-file artifact/<ts>/model_trainer/trained_model/model.pkl \\
+        --test-file artifact/<ts>/data_ingestion/ingested/test.parquet
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+
+import numpy as np
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+
+def median_seconds(fn, repeats: int) -> float:
+    timings = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return float(np.median(timings))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model-file", required=True, help="Pickled MyModel with a compiled forest")
+    parser.add_argument("--test-file", required=True, help="Ingested test file (.csv or .parquet) of DataIngestion")
+    parser.add_argument("--chunk-sizes", default="4,8,16,32")
+    parser.add_argument("--batch-sizes", default="1,64,4096")
+    parser.add_argument("--repeats", type=int, default=20)
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    from src.components.data_transformation import DataTransformation
+    from src.constants import SCHEMA_FILE_PATH, TARGET_COLUMN
+    from src.entity.artifact_entity import DataIngestionArtifact, DataValidationArtifact
+    from src.entity.config_entity import DataTransformationConfig
+    from src.utils.main_utils import load_object, read_schema_column_dtypes
+
+    model = load_object(args.model_file)
+    compiled_model = model.compiled_model
+    if compiled_model is None:
+        raise SystemExit("The model has no compiled forest")
+
+    transformation = DataTransformation(DataIngestionArtifact(args.test_file, args.test_file),
+                                        DataTransformationConfig(), DataValidationArtifact(True, "", ""))
+    test_df = transformation.read_data(args.test_file, columns=list(read_schema_column_dtypes(SCHEMA_FILE_PATH)))
+    test_df = test_df.dropna()
+    features = test_df.drop(columns=[TARGET_COLUMN])
+    features = transformation._map_gender_column(features)
+    features = transformation._drop_id_column(features)
+    features = transformation._create_dummy_columns(features)
+    features = transformation._rename_columns(features)
+    rows = compiled_model.to_array(features.reindex(columns=compiled_model.feature_names, fill_value=0))
+    classes, counts = np.unique(test_df[TARGET_COLUMN].to_numpy(), return_counts=True)
+    full_labels = compiled_model.predict(rows)
+
+    report = {"n_trees": compiled_model.n_trees, "n_rows": len(rows),
+              "class_distribution": {str(label): round(count / len(rows), 4) for label, count in zip(classes, counts)},
+              "chunk_sizes": []}
+    batch_sizes = [int(size) for size in args.batch_sizes.split(",")]
+    for batch_size in batch_sizes:
+        batch = rows[:batch_size]
+        report.setdefault("full_forest_ms", {})[str(batch_size)] = round(
+            median_seconds(lambda: compiled_model.predict(batch), args.repeats) * 1000, 3)
+
+    for chunk_size in (int(size) for size in args.chunk_sizes.split(",")):
+        labels, trees_used = compiled_model.predict_early_exit(rows, chunk_size=chunk_size)
+        result = {"chunk_size": chunk_size,
+                  "identical_labels": bool(np.array_equal(labels, full_labels)),
+                  "trees_per_row": {"mean": round(float(trees_used.mean()), 2),
+                                    "p50": float(np.percentile(trees_used, 50)),
+                                    "p95": float(np.percentile(trees_used, 95)),
+                                    "max": int(trees_used.max()),
+                                    "all_trees_fraction": round(float((trees_used == compiled_model.n_trees).mean()), 4)},
+                  "latency_ms": {}}
+        for batch_size in batch_sizes:
+            batch = rows[:batch_size]
+            result["latency_ms"][str(batch_size)] = round(
+                median_seconds(lambda: compiled_model.predict_early_exit(batch, chunk_size=chunk_size), args.repeats) * 1000, 3)
+        report["chunk_sizes"].append(result)
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
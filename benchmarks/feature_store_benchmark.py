@@ -0,0 +1,162 @@
+"""
+Data stages of the training pipeline on a synthetic vehicle insurance collection, with the feature
+store and the train/test files written as CSV vs Parquet.
+
+The rows stand in for Proj1Data.export_collection_as_dataframe (same columns and dtypes, about 0.1%
+missing Annual_Premium), which costs the same for both formats and is measured by
+mongo_export_benchmark.py. For every format the benchmark times the real stage code:
+
+- data ingestion: DataIngestion.initiate_data_ingestion (feature store file, split, train/test files)
+- data validation: DataValidation.initiate_data_validation
+- data transformation: DataTransformation.read_data of the schema columns, the custom column
+  transformations and the fitted preprocessor (SMOTEENN and training are left out: their cost
+  does not depend on the file format, and SMOTEENN does not finish on 10M rows)
+- model evaluation: the schema column read of the test file by ModelEvaluation
+
+and reports seconds per stage, file sizes and whether both formats give the same transformed arrays.
+
+    python benchmarks/feature_store_benchmark.py --rows 10000000
+    python benchmarks/feature_store_benchmark.py --rows 1000000 --formats csv,parquet --output feature_store.json
+"""
+import argparse
+import hashlib
+import json
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+os.chdir(ROOT_DIR)
+
+
+def synthetic_frame(rows: int, seed: int) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    index = np.arange(rows)
+    premiums = rng.uniform(2630, 100000, rows).round(1)
+    premiums[index % 997 == 0] = np.nan
+    return pd.DataFrame({
+        "id": index + 1,
+        "Gender": np.where(index % 2 == 0, "Female", "Male"),
+        "Age": rng.integers(20, 85, rows),
+        "Driving_License": np.ones(rows, dtype=np.int64),
+        "Region_Code": (index % 53).astype(np.float64),
+        "Previously_Insured": (rng.random(rows) < 0.46).astype(np.int64),
+        "Vehicle_Age": np.array(["< 1 Year", "1-2 Year", "> 2 Years"])[rng.integers(0, 3, rows)],
+        "Vehicle_Damage": np.where(rng.random(rows) < 0.5, "Yes", "No"),
+        "Annual_Premium": premiums,
+        "Policy_Sales_Channel": rng.integers(1, 163, rows).astype(np.float64),
+        "Vintage": rng.integers(10, 300, rows),
+        "Response": (rng.random(rows) < 0.12).astype(np.int64),
+    })
+
+
+def timed(fn):
+    started = time.perf_counter()
+    result = fn()
+    return result, round(time.perf_counter() - started, 3)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10000000)
+    parser.add_argument("--formats", default="csv,parquet", help="Comma-separated feature store formats")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--work-dir", help="Directory of the benchmark artifacts; a temporary one when omitted")
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    from src.components import data_ingestion as data_ingestion_module
+    from src.components.data_ingestion import DataIngestion
+    from src.components.data_transformation import DataTransformation
+    from src.components.data_validation import DataValidation
+    from src.constants import SCHEMA_FILE_PATH, TARGET_COLUMN
+    from src.entity.artifact_entity import DataValidationArtifact
+    from src.entity.config_entity import DataIngestionConfig, DataTransformationConfig, DataValidationConfig
+    from src.utils.main_utils import load_dataframe, read_schema_column_dtypes
+
+    frame = synthetic_frame(args.rows, args.seed)
+
+    class SyntheticCollection:
+        def export_collection_as_dataframe(self, *args, **kwargs) -> pd.DataFrame:
+            return frame
+
+    # Ingestion reads the synthetic rows instead of MongoDB
+    data_ingestion_module.Proj1Data = SyntheticCollection
+
+    work_dir = args.work_dir or tempfile.mkdtemp(prefix="feature_store_benchmark_")
+    columns = list(read_schema_column_dtypes(SCHEMA_FILE_PATH))
+    report = {"rows": args.rows, "formats": []}
+    reference = None
+    try:
+        for file_format in args.formats.split(","):
+            format_dir = os.path.join(work_dir, file_format)
+            ingestion_config = DataIngestionConfig(
+                feature_store_file_path=os.path.join(format_dir, "feature_store", f"data.{file_format}"),
+                training_file_path=os.path.join(format_dir, "ingested", f"train.{file_format}"),
+                testing_file_path=os.path.join(format_dir, "ingested", f"test.{file_format}"),
+                streaming_export=False, incremental=False)
+            # Same split for every format
+            np.random.seed(args.seed)
+            ingestion_artifact, ingestion_seconds = timed(DataIngestion(ingestion_config).initiate_data_ingestion)
+
+            validation_config = DataValidationConfig(
+                data_validation_dir=os.path.join(format_dir, "data_validation"),
+                validation_report_file_path=os.path.join(format_dir, "data_validation", "report.yaml"))
+            validation_artifact, validation_seconds = timed(
+                DataValidation(validation_config, ingestion_artifact).initiate_data_validation)
+
+            transformation = DataTransformation(ingestion_artifact, DataTransformationConfig(),
+                                                DataValidationArtifact(True, "", ""))
+
+            def transform():
+                arrays = []
+                preprocessor = transformation.get_data_transformer_object()
+                for path in (ingestion_artifact.trained_file_path, ingestion_artifact.test_file_path):
+                    features = transformation.read_data(path, columns=columns).drop(columns=[TARGET_COLUMN])
+                    features = transformation._map_gender_column(features)
+                    features = transformation._drop_id_column(features)
+                    features = transformation._create_dummy_columns(features)
+                    features = transformation._rename_columns(features)
+                    arrays.append(preprocessor.fit_transform(features) if not arrays else preprocessor.transform(features))
+                return arrays
+
+            arrays, transformation_seconds = timed(transform)
+            # Digests rather than the arrays, which would not fit in memory twice at 10M rows
+            digests = [hashlib.sha256(np.ascontiguousarray(array, dtype=np.float64).tobytes()).hexdigest()
+                       for array in arrays]
+            del arrays
+            _, evaluation_seconds = timed(lambda: load_dataframe(ingestion_artifact.test_file_path, columns=columns))
+
+            file_paths = (ingestion_config.feature_store_file_path, ingestion_artifact.trained_file_path,
+                          ingestion_artifact.test_file_path)
+            if reference is None:
+                reference = digests
+            report["formats"].append({
+                "format": file_format, "validation_status": validation_artifact.validation_status,
+                "seconds": {"data_ingestion": ingestion_seconds, "data_validation": validation_seconds,
+                            "data_transformation": transformation_seconds, "model_evaluation_read": evaluation_seconds,
+                            "total": round(ingestion_seconds + validation_seconds + transformation_seconds +
+                                           evaluation_seconds, 3)},
+                "megabytes": {os.path.basename(path): round(os.path.getsize(path) / 2 ** 20, 1) for path in file_paths},
+                "same_transformed_arrays": digests == reference})
+            print(json.dumps(report["formats"][-1]), file=sys.stderr)
+    finally:
+        if not args.work_dir:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+Load-test comparison of inline inference (prediction on the event loop) against the
+thread and process inference pools.
+
+For every executor kind the app is started with uvicorn against a local model store
+(MODEL_STORE_DIR, holding <MODEL_BUCKET_NAME>/model.pkl) and hammered with single-row form
+posts at fixed concurrency, while a probe keeps requesting GET / to measure how responsive
+the event loop stays. Results are printed as JSON.
+
+    python benchmarks/inference_executor_load_test.py --model-store /path/to/store
+"""
+import argparse
+import http.client
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+import urllib.parse
+
+import numpy as np
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SAMPLE_ROW = {"Gender": 1, "Age": 44, "Driving_License": 1, "Region_Code": 28.0, "Previously_Insured": 0,
+              "Annual_Premium": 40454.0, "Policy_Sales_Channel": 26.0, "Vintage": 217,
+              "Vehicle_Age_lt_1_Year": 0, "Vehicle_Age_gt_2_Years": 1, "Vehicle_Damage_Yes": 1}
+
+
+def request(port: int, method: str, path: str, body: bytes = None, headers: dict = None):
+    connection = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+    started = time.perf_counter()
+    try:
+        connection.request(method, path, body=body, headers=headers or {})
+        response = connection.getresponse()
+        response.read()
+        return response.status, time.perf_counter() - started
+    finally:
+        connection.close()
+
+
+def start_app(port: int, env: dict) -> subprocess.Popen:
+    process = subprocess.Popen([sys.executable, "-m", "uvicorn", "app:app", "--port", str(port), "--log-level", "warning"],
+                               cwd=ROOT_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        try:
+            if request(port, "GET", "/")[0] == 200:
+                return process
+        except OSError:
+            time.sleep(0.2)
+    process.kill()
+    raise RuntimeError("App did not start within 60s")
+
+
+def percentiles(values) -> dict:
+    if not values:
+        return {}
+    values = np.array(values) * 1000
+    return {f"p{q}": round(float(np.percentile(values, q)), 3) for q in (50, 95, 99)}
+
+
+def run_mode(kind: str, args) -> dict:
+    env = dict(os.environ, INFERENCE_EXECUTOR=kind, MODEL_STORE_DIR=args.model_store,
+               INFERENCE_WORKERS=str(args.workers), MODEL_REFRESH_INTERVAL_SECONDS="0")
+    process = start_app(args.port, env)
+    body = urllib.parse.urlencode(SAMPLE_ROW).encode()
+    headers = {"Content-Type": "application/x-www-form-urlencoded"}
+    try:
+        # Load the model (in every pool worker) before measuring
+        deadline = time.time() + 120
+        while request(args.port, "POST", "/", body, headers)[0] != 200 and time.time() < deadline:
+            time.sleep(0.5)
+        for _ in range(args.workers * 2):
+            request(args.port, "POST", "/", body, headers)
+
+        latencies, statuses, probe_latencies = [], {}, []
+        remaining = [args.requests]
+        lock = threading.Lock()
+        done = threading.Event()
+
+        def worker():
+            while True:
+                with lock:
+                    if remaining[0] <= 0:
+                        return
+                    remaining[0] -= 1
+                status, latency = request(args.port, "POST", "/", body, headers)
+                with lock:
+                    latencies.append(latency)
+                    statuses[status] = statuses.get(status, 0) + 1
+
+        def probe():
+            while not done.is_set():
+                probe_latencies.append(request(args.port, "GET", "/")[1])
+                time.sleep(0.05)
+
+        probe_thread = threading.Thread(target=probe)
+        workers = [threading.Thread(target=worker) for _ in range(args.concurrency)]
+        started = time.perf_counter()
+        probe_thread.start()
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+        elapsed = time.perf_counter() - started
+        done.set()
+        probe_thread.join()
+
+        return {"executor": kind,
+                "throughput_rps": round(args.requests / elapsed, 2),
+                "predict_latency_ms": percentiles(latencies),
+                "event_loop_probe_latency_ms": percentiles(probe_latencies),
+                "status_codes": statuses}
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model-store", required=True, help="Local model store directory (MODEL_STORE_DIR)")
+    parser.add_argument("--executors", default="inline,thread,process")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--port", type=int, default=5055)
+    args = parser.parse_args()
+
+    results = [run_mode(kind, args) for kind in args.executors.split(",")]
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
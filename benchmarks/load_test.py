@@ -0,0 +1,283 @@
+"""
+Reproducible HTTP load test of app.py.
+
+Unless --url points at a running server, the app is started with uvicorn against a local fake
+model store (MODEL_STORE_DIR) holding a small forest trained on seeded synthetic data, so no S3
+access is needed and runs on the same machine are comparable. The tool replays a seeded mix of
+single-row form posts to / and CSV batch posts to /predict/batch, either closed-loop at a fixed
+concurrency or open-loop at a fixed request rate, and prints p50/p95/p99 latency, throughput and
+error rate as JSON.
+
+In --rps mode latency is measured from each request's scheduled start, so a server that falls
+behind shows up as growing latency rather than a silently lower request rate.
+
+    python benchmarks/load_test.py --concurrency 16 --duration 30
+    python benchmarks/load_test.py --rps 200 --duration 30 --mix form=0.9,batch=0.1 --env PREDICTION_CACHE=true
+"""
+import argparse
+import http.client
+import io
+import json
+import logging
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.parse
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+# Value ranges the synthetic rows are drawn from, resembling the training data
+SYNTHETIC_RANGES = {"Gender": (0, 1), "Age": (20, 85), "Driving_License": (0, 1), "Region_Code": (0, 52),
+                    "Previously_Insured": (0, 1), "Annual_Premium": (2630, 100000), "Policy_Sales_Channel": (1, 160),
+                    "Vintage": (10, 299), "Vehicle_Age_lt_1_Year": (0, 1), "Vehicle_Age_gt_2_Years": (0, 1),
+                    "Vehicle_Damage_Yes": (0, 1)}
+
+
+def synthetic_rows(n_rows: int, seed: int):
+    """
+    Returns a DataFrame of n_rows valid prediction inputs and a label loosely depending on them.
+    """
+    import pandas as pd
+    from src.serving.feature_encoder import get_feature_encoder
+
+    rng = np.random.default_rng(seed)
+    columns = {}
+    for name in get_feature_encoder().columns:
+        low, high = SYNTHETIC_RANGES[name]
+        columns[name] = rng.uniform(low, high, n_rows).round(1) if name == "Annual_Premium" else rng.integers(low, high + 1, n_rows)
+    rows = pd.DataFrame(columns)
+    logit = -1 + 2 * rows.Vehicle_Damage_Yes - 2 * rows.Previously_Insured + 0.02 * (rows.Age - 40) + rng.normal(0, 1, n_rows)
+    return rows, (logit > 0).astype(int).to_numpy()
+
+
+def create_fake_model_store(store_dir: str, n_estimators: int, seed: int) -> str:
+    """
+    Trains a forest with the same preprocessing as DataTransformation on synthetic data and saves it,
+    with its compiled forest, where Proj1Estimator looks for the production model in MODEL_STORE_DIR.
+    """
+    from sklearn.compose import ColumnTransformer
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.pipeline import Pipeline
+    from sklearn.preprocessing import MinMaxScaler, StandardScaler
+
+    from src.constants import SCHEMA_FILE_PATH
+    from src.entity.compiled_forest import CompiledForest
+    from src.entity.config_entity import VehiclePredictorConfig
+    from src.entity.estimator import MyModel
+    from src.utils.main_utils import read_yaml_file, save_object
+
+    schema_config = read_yaml_file(SCHEMA_FILE_PATH)
+    rows, labels = synthetic_rows(20000, seed)
+    preprocessor = Pipeline(steps=[("Preprocessor", ColumnTransformer(
+        [("StandardScaler", StandardScaler(), schema_config["num_features"]),
+         ("MinMaxScaler", MinMaxScaler(), schema_config["mm_columns"])], remainder="passthrough"))])
+    transformed = preprocessor.fit_transform(rows)
+    forest = RandomForestClassifier(n_estimators=n_estimators, min_samples_split=7, min_samples_leaf=6,
+                                    max_depth=10, criterion="entropy", random_state=seed).fit(transformed, labels)
+    model = MyModel(preprocessing_object=preprocessor, trained_model_object=forest,
+                    compiled_model=CompiledForest.from_model(preprocessor, forest))
+
+    config = VehiclePredictorConfig()
+    save_object(os.path.join(store_dir, config.model_bucket_name, config.model_file_path), model)
+    return store_dir
+
+
+def request(connection: http.client.HTTPConnection, method: str, path: str, body: bytes = None,
+            headers: dict = None) -> int:
+    connection.request(method, path, body=body, headers=headers or {})
+    response = connection.getresponse()
+    response.read()
+    return response.status
+
+
+def start_app(port: int, env: dict, timeout: float = 120) -> subprocess.Popen:
+    process = subprocess.Popen([sys.executable, "-m", "uvicorn", "app:app", "--port", str(port), "--log-level", "warning"],
+                               cwd=ROOT_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"App exited with code {process.returncode} during startup")
+        try:
+            connection = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+            if request(connection, "GET", "/health/ready") == 200:
+                connection.close()
+                return process
+        except OSError:
+            pass
+        time.sleep(0.2)
+    process.kill()
+    raise RuntimeError(f"App was not ready within {timeout}s")
+
+
+def build_payloads(args) -> Dict[str, List[Tuple[str, bytes, dict]]]:
+    """
+    Pre-encodes a seeded pool of request bodies per request kind, so encoding costs nothing during the run.
+    """
+    rows, _ = synthetic_rows(max(args.pool_size, args.batch_rows), args.seed + 1)
+    records = rows.to_dict(orient="records")
+    form_headers = {"Content-Type": "application/x-www-form-urlencoded"}
+    payloads = {"form": [("/", urllib.parse.urlencode(record).encode(), form_headers) for record in records[:args.pool_size]]}
+
+    batch_headers = {"Content-Type": "text/csv"}
+    rng = np.random.default_rng(args.seed + 2)
+    payloads["batch"] = []
+    for _ in range(max(1, args.pool_size // 100)):
+        buffer = io.StringIO()
+        rows.iloc[rng.choice(len(rows), args.batch_rows, replace=False)].to_csv(buffer, index=False)
+        payloads["batch"].append(("/predict/batch", buffer.getvalue().encode(), batch_headers))
+    return payloads
+
+
+def summarize(latencies: List[float], statuses: Dict[int, int], elapsed: float) -> dict:
+    count = sum(statuses.values())
+    errors = sum(n for status, n in statuses.items() if not 200 <= status < 300)
+    summary = {"requests": count, "errors": errors, "error_rate": round(errors / count, 4) if count else None,
+               "throughput_rps": round(count / elapsed, 2) if elapsed else None,
+               "status_codes": {str(status): n for status, n in sorted(statuses.items())}}
+    if latencies:
+        values = np.array(latencies) * 1000
+        summary["latency_ms"] = {"p50": round(float(np.percentile(values, 50)), 3),
+                                 "p95": round(float(np.percentile(values, 95)), 3),
+                                 "p99": round(float(np.percentile(values, 99)), 3),
+                                 "mean": round(float(values.mean()), 3),
+                                 "max": round(float(values.max()), 3)}
+    return summary
+
+
+def run_load(host: str, port: int, args) -> dict:
+    payloads = build_payloads(args)
+    kinds = list(args.mix)
+    rng = np.random.default_rng(args.seed)
+    # Seeded request sequence, cycled through when a run needs more requests than it holds
+    schedule_length = min(args.max_requests, 100_000)
+    schedule_kinds = rng.choice(len(kinds), size=schedule_length, p=np.array([args.mix[k] for k in kinds]))
+    schedule_payloads = rng.integers(0, 1 << 30, size=schedule_length)
+
+    results = {kind: ([], {}) for kind in kinds}
+    lock = threading.Lock()
+    next_index = [0]
+    n_threads = args.concurrency
+    started = time.perf_counter()
+    stop_at = started + args.duration
+
+    def sender():
+        connection = http.client.HTTPConnection(host, port, timeout=args.timeout)
+        while True:
+            with lock:
+                index = next_index[0]
+                next_index[0] += 1
+            if index >= args.max_requests:
+                break
+            scheduled = started + index / args.rps if args.rps else time.perf_counter()
+            if scheduled >= stop_at:
+                break
+            if args.rps:
+                time.sleep(max(0.0, scheduled - time.perf_counter()))
+            kind = kinds[schedule_kinds[index % schedule_length]]
+            path, body, headers = payloads[kind][schedule_payloads[index % schedule_length] % len(payloads[kind])]
+            try:
+                status = request(connection, "POST", path, body, headers)
+            except (OSError, http.client.HTTPException):
+                status = 599
+                connection.close()
+                connection = http.client.HTTPConnection(host, port, timeout=args.timeout)
+            latency = time.perf_counter() - scheduled
+            with lock:
+                latencies, statuses = results[kind]
+                latencies.append(latency)
+                statuses[status] = statuses.get(status, 0) + 1
+        connection.close()
+
+    threads = [threading.Thread(target=sender, daemon=True) for _ in range(n_threads)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    all_latencies, all_statuses = [], {}
+    for latencies, statuses in results.values():
+        all_latencies.extend(latencies)
+        for status, n in statuses.items():
+            all_statuses[status] = all_statuses.get(status, 0) + n
+
+    report = {"overall": summarize(all_latencies, all_statuses, elapsed), "elapsed_seconds": round(elapsed, 3)}
+    for kind, (latencies, statuses) in results.items():
+        report[kind] = summarize(latencies, statuses, elapsed)
+    return report
+
+
+def parse_mix(value: str) -> Dict[str, float]:
+    mix = {}
+    for part in value.split(","):
+        kind, _, weight = part.partition("=")
+        if kind not in ("form", "batch"):
+            raise argparse.ArgumentTypeError(f"Unknown request kind {kind!r}; expected form or batch")
+        mix[kind] = float(weight or 1)
+    total = sum(mix.values())
+    return {kind: weight / total for kind, weight in mix.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="Target an already running server instead of starting one, e.g. http://127.0.0.1:8080")
+    parser.add_argument("--model-store", help="Existing MODEL_STORE_DIR; a synthetic model is trained when omitted")
+    parser.add_argument("--n-estimators", type=int, default=200, help="Trees of the synthetic model")
+    parser.add_argument("--port", type=int, default=5060)
+    parser.add_argument("--env", action="append", default=[], help="KEY=VALUE passed to the app, repeatable")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix("form=1"), help="Request mix, e.g. form=0.9,batch=0.1")
+    parser.add_argument("--batch-rows", type=int, default=100, help="Rows per batch post")
+    parser.add_argument("--concurrency", type=int, default=16, help="Connections (closed loop) or sender threads (--rps)")
+    parser.add_argument("--rps", type=float, help="Open-loop request rate; closed loop at --concurrency when omitted")
+    parser.add_argument("--duration", type=float, default=30, help="Seconds to run")
+    parser.add_argument("--max-requests", type=int, default=10_000_000)
+    parser.add_argument("--warm-up", type=int, default=50, help="Requests sent and discarded before measuring")
+    parser.add_argument("--pool-size", type=int, default=1000, help="Distinct request bodies to cycle through")
+    parser.add_argument("--timeout", type=float, default=30)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Also write the JSON report to this file")
+    args = parser.parse_args()
+
+    # Keep the project's INFO logs from the model setup out of the JSON on stdout
+    logging.disable(logging.INFO)
+    process = None
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        try:
+            if args.url:
+                parsed = urllib.parse.urlparse(args.url)
+                host, port = parsed.hostname, parsed.port or 80
+            else:
+                model_store = args.model_store or create_fake_model_store(tmp_dir, args.n_estimators, args.seed)
+                env = dict(os.environ, MODEL_STORE_DIR=model_store, MODEL_REFRESH_INTERVAL_SECONDS="0")
+                env.update(item.split("=", 1) for item in args.env)
+                host, port = "127.0.0.1", args.port
+                process = start_app(port, env)
+
+            if args.warm_up:
+                warm_up = argparse.Namespace(**{**vars(args), "rps": None, "duration": 600, "max_requests": args.warm_up})
+                run_load(host, port, warm_up)
+
+            report = {"config": {"mix": args.mix, "concurrency": args.concurrency, "rps": args.rps,
+                                 "duration": args.duration, "batch_rows": args.batch_rows, "seed": args.seed,
+                                 "env": args.env, "url": args.url},
+                      **run_load(host, port, args)}
+        finally:
+            if process is not None:
+                process.terminate()
+                process.wait()
+
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
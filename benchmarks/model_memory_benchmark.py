@@ -0,0 +1,89 @@
+"""
+Per-worker memory of the pickled model artifact versus the memory-mappable layout written by
+save_object(..., mmap_arrays=True).
+
+The given MyModel is saved in both layouts; for each layout N worker processes load it and
+score a dummy batch, the way N uvicorn workers would, and report how much their memory grew.
+RSS counts mapped file pages in every process that touches them, so the private (RssAnon) and
+proportional (Pss) figures are the ones that show the shared page-cache copy. Linux only.
+
+    python benchmarks/model_memory_benchmark.py --model-file artifact/.../model.pkl --workers 4
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+
+def memory_kb() -> dict:
+    usage = {}
+    with open("/proc/self/status") as status:
+        for line in status:
+            name, _, value = line.partition(":")
+            if name in ("VmRSS", "RssAnon", "RssFile"):
+                usage[name] = int(value.split()[0])
+    with open("/proc/self/smaps_rollup") as smaps:
+        for line in smaps:
+            name, _, value = line.partition(":")
+            if name == "Pss":
+                usage[name] = int(value.split()[0])
+    return usage
+
+
+def worker(model_file: str, loaded, release, results) -> None:
+    from src.entity.estimator import MyModel  # noqa: F401 - import cost is not part of the model
+    from src.serving.feature_encoder import FeatureEncoder
+    from src.utils.main_utils import load_object
+
+    encoder = FeatureEncoder()
+    dummy_batch = encoder.dummy_rows(1000)
+    before = memory_kb()
+    model = load_object(model_file)
+    model.predict_array(dummy_batch, feature_names=encoder.columns)
+    loaded.wait()
+    after = memory_kb()
+    results.put({name: after[name] - before[name] for name in after})
+    release.wait()
+
+
+def run_layout(model_file: str, workers: int) -> dict:
+    context = multiprocessing.get_context("spawn")
+    loaded, release, results = context.Barrier(workers), context.Barrier(workers + 1), context.Queue()
+    processes = [context.Process(target=worker, args=(model_file, loaded, release, results)) for _ in range(workers)]
+    for process in processes:
+        process.start()
+    deltas = [results.get() for _ in processes]
+    release.wait()
+    for process in processes:
+        process.join()
+
+    return {name + "_mb": {"per_worker": round(sum(delta[name] for delta in deltas) / workers / 1024, 2),
+                           "total": round(sum(delta[name] for delta in deltas) / 1024, 2)}
+            for name in ("VmRSS", "RssAnon", "RssFile", "Pss")}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model-file", required=True, help="Pickled MyModel, e.g. the trainer's model.pkl")
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    from src.utils.main_utils import load_object, save_object
+
+    model = load_object(args.model_file)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        results = {"workers": args.workers}
+        for layout, mmap_arrays in (("pickle", False), ("mmap", True)):
+            model_file = os.path.join(tmp_dir, layout, "model.pkl")
+            save_object(model_file, model, mmap_arrays=mmap_arrays)
+            results[layout] = run_layout(model_file, args.workers)
+        print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""
+Export time of the Proj1-Data collection read by one sequential cursor vs N concurrent _id ranges.
+
+Synthetic vehicle insurance documents are inserted into a scratch collection, then exported with
+Proj1Data.export_collection_as_dataframe for every partition count, checking that each export
+returns the same rows in the same order. Without --uri the collection lives in mongomock and every
+cursor batch sleeps --round-trip-ms to stand in for the network round trip a real server costs;
+with --uri it is written to (and dropped from) that MongoDB server.
+
+    python benchmarks/mongo_export_benchmark.py --documents 200000 --partitions 1,2,4,8
+    python benchmarks/mongo_export_benchmark.py --uri mongodb://localhost:27017 --documents 2000000
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+from bisect import bisect_left
+
+import numpy as np
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+os.chdir(ROOT_DIR)
+
+
+def synthetic_documents(start: int, count: int, rng: np.random.Generator) -> list:
+    ages = rng.integers(20, 85, count)
+    premiums = rng.uniform(2630, 100000, count).round(1)
+    return [{"id": start + index + 1, "Gender": "Male" if index % 2 else "Female", "Age": int(ages[index]),
+             "Driving_License": 1, "Region_Code": float(index % 53), "Previously_Insured": int(index % 3 == 0),
+             "Vehicle_Age": ("< 1 Year", "1-2 Year", "> 2 Years")[index % 3], "Vehicle_Damage": "Yes" if index % 2 else "No",
+             "Annual_Premium": "na" if index % 997 == 0 else float(premiums[index]),
+             "Policy_Sales_Channel": float(index % 160), "Vintage": int(10 + index % 290), "Response": int(index % 7 == 0)}
+            for index in range(count)]
+
+
+class RoundTripCollection:
+    """
+    Stand-in for a remote collection: serves key range queries and key samples from a key-sorted
+    copy of a mongomock collection and sleeps once per batch_size documents of a cursor, like a
+    server round trip. mongomock itself evaluates every filter and $sample in Python over the whole
+    collection, which would measure its own CPU cost instead of the network-bound reads the
+    partitioning targets.
+    """
+
+    def __init__(self, collection, partition_key: str, round_trip_seconds: float):
+        self.collection = collection
+        self.round_trip_seconds = round_trip_seconds
+        self.documents = sorted(collection.find(), key=lambda document: document[partition_key])
+        self.keys = [document[partition_key] for document in self.documents]
+        self.partition_key = partition_key
+        self.rng = np.random.default_rng(0)
+
+    def aggregate(self, pipeline: list):
+        # Only the split point sampling of Proj1Data.get_split_points: $sample, then $project of the key
+        time.sleep(self.round_trip_seconds)
+        size = min(pipeline[0]["$sample"]["size"], len(self.keys))
+        return [{"key": self.keys[index]} for index in self.rng.choice(len(self.keys), size, replace=False)]
+
+    def find(self, query: dict, projection: dict = None, batch_size: int = 0, sort=None):
+        key_range = query.get(self.partition_key, {})
+        start = bisect_left(self.keys, key_range["$gte"]) if "$gte" in key_range else 0
+        stop = bisect_left(self.keys, key_range["$lt"]) if "$lt" in key_range else len(self.keys)
+        excluded = {name for name, value in (projection or {}).items() if not value}
+        for index in range(start, stop):
+            if batch_size and (index - start) % batch_size == 0:
+                time.sleep(self.round_trip_seconds)
+            yield {name: value for name, value in self.documents[index].items() if name not in excluded}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--uri", help="MongoDB server to benchmark against; mongomock when omitted")
+    parser.add_argument("--documents", type=int, default=100000)
+    parser.add_argument("--partitions", default="1,2,4,8", help="Comma-separated partition counts")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--round-trip-ms", type=float, default=5, help="Simulated latency per batch (mongomock only)")
+    parser.add_argument("--max-pool-size", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    os.environ["MONGODB_MAX_POOL_SIZE"] = str(args.max_pool_size)
+    from src.configuration.mongo_db_connection import MongoDBClient
+    from src.constants import SCHEMA_FILE_PATH
+    from src.data_access.proj1_data import Proj1Data
+    from src.utils.main_utils import read_schema_column_dtypes
+
+    database_name, collection_name = "Proj1-benchmark", "Proj1-Data-benchmark"
+    if args.uri:
+        os.environ["CONNECTION_URI"] = args.uri
+    else:
+        import mongomock
+        MongoDBClient.client = mongomock.MongoClient()
+    data = Proj1Data()
+    collection = data.mongo_client.client[database_name][collection_name]
+    collection.drop()
+
+    rng = np.random.default_rng(args.seed)
+    for start in range(0, args.documents, 50000):
+        collection.insert_many(synthetic_documents(start, min(50000, args.documents - start), rng))
+    if not args.uri:
+        stand_in = RoundTripCollection(collection, "_id", args.round_trip_ms / 1000)
+        data.get_collection = lambda name, database=None: stand_in
+
+    column_dtypes = read_schema_column_dtypes(SCHEMA_FILE_PATH)
+    report = {"server": "mongod" if args.uri else f"mongomock + {args.round_trip_ms}ms per batch",
+              "documents": args.documents, "batch_size": args.batch_size, "runs": []}
+    reference = None
+    try:
+        for n_partitions in (int(count) for count in args.partitions.split(",")):
+            timings = []
+            for _ in range(args.repeat):
+                started = time.perf_counter()
+                frame = data.export_collection_as_dataframe(collection_name, database_name, batch_size=args.batch_size,
+                                                            column_dtypes=column_dtypes, n_partitions=n_partitions)
+                timings.append(time.perf_counter() - started)
+            if reference is None:
+                reference = frame
+            report["runs"].append({"partitions": n_partitions, "rows": len(frame),
+                                   "best_seconds": round(min(timings), 3),
+                                   "speedup": round(report["runs"][0]["best_seconds"] / min(timings), 2)
+                                   if report["runs"] else 1.0,
+                                   "same_rows_in_order": bool(frame.equals(reference))})
+            print(json.dumps(report["runs"][-1]), file=sys.stderr)
+    finally:
+        collection.drop()
+
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
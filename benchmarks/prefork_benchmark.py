@@ -0,0 +1,146 @@
+"""
+Aggregate throughput and memory of the pre-fork runner as workers scale from 1 to the core count.
+
+For every worker count the runner (python -m src.serving.prefork_server) is started against a
+local fake model store, loaded closed-loop with the load_test.py request mix, and the memory of
+the master plus its workers is read from /proc once the load is over. Total RSS counts the shared
+model once per process; total PSS splits shared pages between the processes that map them, so
+it is the figure that shows copy-on-write sharing, next to each worker's private (unshared) memory.
+Linux only.
+
+    python benchmarks/prefork_benchmark.py --duration 20 --concurrency 32
+    python benchmarks/prefork_benchmark.py --workers 1,2,4,8 --pin-cores --no-gc-freeze
+"""
+import argparse
+import http.client
+import json
+import logging
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(BENCHMARKS_DIR)
+sys.path.insert(0, ROOT_DIR)
+sys.path.insert(0, BENCHMARKS_DIR)
+
+from load_test import create_fake_model_store, parse_mix, request, run_load  # noqa: E402
+
+
+def process_memory_kb(pid: int) -> dict:
+    usage = {}
+    with open(f"/proc/{pid}/status") as status:
+        for line in status:
+            name, _, value = line.partition(":")
+            if name == "VmRSS":
+                usage[name] = int(value.split()[0])
+    with open(f"/proc/{pid}/smaps_rollup") as smaps:
+        for line in smaps:
+            name, _, value = line.partition(":")
+            if name in ("Pss", "Private_Clean", "Private_Dirty"):
+                usage[name] = int(value.split()[0])
+    # Pages only this process maps (USS); copy-on-write pages still shared with the master are not counted
+    usage["Private"] = usage.pop("Private_Clean") + usage.pop("Private_Dirty")
+    return usage
+
+
+def child_pids(pid: int) -> list:
+    with open(f"/proc/{pid}/task/{pid}/children") as children:
+        return [int(child) for child in children.read().split()]
+
+
+def start_runner(port: int, workers: int, env: dict, args, timeout: float = 180) -> subprocess.Popen:
+    command = [sys.executable, "-m", "src.serving.prefork_server", "--host", "127.0.0.1", "--port", str(port),
+               "--workers", str(workers), "--log-level", "warning"]
+    if args.pin_cores:
+        command.append("--pin-cores")
+    if not args.gc_freeze:
+        command.append("--no-gc-freeze")
+    process = subprocess.Popen(command, cwd=ROOT_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Runner exited with code {process.returncode} during startup")
+        try:
+            # Every worker accepts on the same socket, so wait until all of them are up
+            if len(child_pids(process.pid)) >= workers:
+                connection = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+                if request(connection, "GET", "/health/ready") == 200:
+                    connection.close()
+                    return process
+        except OSError:
+            pass
+        time.sleep(0.2)
+    process.kill()
+    raise RuntimeError(f"Runner was not ready within {timeout}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", help="Comma-separated worker counts; 1 to the core count when omitted")
+    parser.add_argument("--pin-cores", action="store_true")
+    parser.add_argument("--no-gc-freeze", dest="gc_freeze", action="store_false")
+    parser.add_argument("--model-store", help="Existing MODEL_STORE_DIR; a synthetic model is trained when omitted")
+    parser.add_argument("--n-estimators", type=int, default=200)
+    parser.add_argument("--port", type=int, default=5070)
+    parser.add_argument("--env", action="append", default=[], help="KEY=VALUE passed to the runner, repeatable")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix("form=1"))
+    parser.add_argument("--batch-rows", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=20)
+    parser.add_argument("--warm-up", type=int, default=200)
+    parser.add_argument("--pool-size", type=int, default=1000)
+    parser.add_argument("--timeout", type=float, default=30)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output")
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    n_cores = len(os.sched_getaffinity(0))
+    worker_counts = [int(count) for count in args.workers.split(",")] if args.workers else list(range(1, n_cores + 1))
+    load_args = argparse.Namespace(rps=None, max_requests=10_000_000, **{name: getattr(args, name) for name in (
+        "mix", "batch_rows", "concurrency", "duration", "pool_size", "timeout", "seed")})
+
+    report = {"cores": n_cores, "pin_cores": args.pin_cores, "gc_freeze": args.gc_freeze,
+              "concurrency": args.concurrency, "mix": args.mix, "env": args.env, "runs": []}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        model_store = args.model_store or create_fake_model_store(tmp_dir, args.n_estimators, args.seed)
+        env = dict(os.environ, MODEL_STORE_DIR=model_store, MODEL_REFRESH_INTERVAL_SECONDS="0")
+        env.update(item.split("=", 1) for item in args.env)
+
+        for workers in worker_counts:
+            process = start_runner(args.port, workers, env, args)
+            try:
+                if args.warm_up:
+                    run_load("127.0.0.1", args.port, argparse.Namespace(**{**vars(load_args), "duration": 600,
+                                                                           "max_requests": args.warm_up}))
+                result = run_load("127.0.0.1", args.port, load_args)
+                pids = [process.pid] + child_pids(process.pid)
+                memory = [process_memory_kb(pid) for pid in pids]
+            finally:
+                process.terminate()
+                process.wait()
+
+            overall = result["overall"]
+            report["runs"].append({
+                "workers": workers,
+                "throughput_rps": overall["throughput_rps"],
+                "error_rate": overall["error_rate"],
+                "latency_ms": overall.get("latency_ms"),
+                "total_rss_mb": round(sum(usage["VmRSS"] for usage in memory) / 1024, 1),
+                "total_pss_mb": round(sum(usage["Pss"] for usage in memory) / 1024, 1),
+                "master_rss_mb": round(memory[0]["VmRSS"] / 1024, 1),
+                "worker_private_mb": [round(usage["Private"] / 1024, 1) for usage in memory[1:]],
+            })
+            print(json.dumps(report["runs"][-1]), file=sys.stderr)
+
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
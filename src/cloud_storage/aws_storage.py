@@ -112,6 +112,25 @@ class SimpleStorageService:
         except Exception as e:
             raise CustomException(e, sys) from e
 
+    def get_object_metadata(self, s3_key: str, bucket_name: str) -> dict:
+        """
+        Fetches the ETag and LastModified of an S3 object without downloading its body.
+
+        Args:
+            s3_key (str): Key path of the object.
+            bucket_name (str): Name of the S3 bucket.
+
+        Returns:
+            dict: {"etag": str, "last_modified": datetime, "version_id": str or None,
+                   "metadata": dict of the user metadata} of the object.
+        """
+        try:
+            response = self.s3_client.head_object(Bucket=bucket_name, Key=s3_key)
+            return {"etag": response["ETag"].strip('"'), "last_modified": response["LastModified"],
+                    "version_id": response.get("VersionId"), "metadata": response.get("Metadata", {})}
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
     def load_model(self, model_name: str, bucket_name: str, model_dir: str = None) -> object:
         """
         Loads a serialized model from the specified S3 bucket.
@@ -134,6 +153,82 @@ class SimpleStorageService:
         except Exception as e:
             raise CustomException(e, sys) from e
 
+    def download_folder(self, prefix: str, bucket_name: str, to_dir: str) -> List[str]:
+        """
+        Downloads every object under the given prefix into a local directory, keeping relative paths.
+
+        Args:
+            prefix (str): Key prefix ("folder") in the bucket.
+            bucket_name (str): Name of the S3 bucket.
+            to_dir (str): Local directory to download into.
+
+        Returns:
+            List[str]: Local paths of the downloaded files.
+        """
+        try:
+            downloaded = []
+            prefix = prefix.rstrip("/") + "/"
+            for file_object in self.get_bucket(bucket_name).objects.filter(Prefix=prefix):
+                local_path = os.path.join(to_dir, file_object.key[len(prefix):])
+                os.makedirs(os.path.dirname(local_path), exist_ok=True)
+                self.s3_client.download_file(bucket_name, file_object.key, local_path)
+                downloaded.append(local_path)
+            logging.info(f"Downloaded {len(downloaded)} objects under {prefix} from {bucket_name}")
+            return downloaded
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+    def download_object(self, s3_key: str, bucket_name: str, to_filename: str, etag: str = None,
+                        version_id: str = None) -> None:
+        """
+        Downloads one object, failing instead of returning another version of it.
+
+        Args:
+            s3_key (str): Key path of the object.
+            bucket_name (str): Name of the S3 bucket.
+            to_filename (str): Local path to write the object to.
+            etag (str): ETag the object must still have, as returned by get_object_metadata.
+            version_id (str): Exact object version to download, on versioned buckets.
+        """
+        try:
+            request = {"Bucket": bucket_name, "Key": s3_key}
+            if version_id:
+                request["VersionId"] = version_id
+            elif etag:
+                request["IfMatch"] = etag
+            body = self.s3_client.get_object(**request)["Body"]
+            with open(to_filename, "wb") as file_obj:
+                for chunk in body.iter_chunks(chunk_size=1024 * 1024):
+                    file_obj.write(chunk)
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+    def delete_folder(self, prefix: str, bucket_name: str, keep_prefix: str = None) -> int:
+        """
+        Deletes every object under the given prefix, except those under keep_prefix.
+
+        Args:
+            prefix (str): Key prefix ("folder") in the bucket.
+            bucket_name (str): Name of the S3 bucket.
+            keep_prefix (str): Key prefix inside prefix whose objects are kept.
+
+        Returns:
+            int: Number of deleted objects.
+        """
+        try:
+            prefix = prefix.rstrip("/") + "/"
+            keep_prefix = keep_prefix.rstrip("/") + "/" if keep_prefix else None
+            keys = [file_object.key for file_object in self.get_bucket(bucket_name).objects.filter(Prefix=prefix)
+                    if keep_prefix is None or not file_object.key.startswith(keep_prefix)]
+            # delete_objects takes at most 1000 keys per request
+            for start in range(0, len(keys), 1000):
+                self.s3_client.delete_objects(Bucket=bucket_name, Delete={
+                    "Objects": [{"Key": key} for key in keys[start:start + 1000]], "Quiet": True})
+            logging.info(f"Deleted {len(keys)} objects under {prefix} from {bucket_name}")
+            return len(keys)
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
     def create_folder(self, folder_name: str, bucket_name: str) -> None:
         """
         Creates a folder in the specified S3 bucket.
@@ -153,7 +248,8 @@ class SimpleStorageService:
                 self.s3_client.put_object(Bucket=bucket_name, Key=folder_obj)
             logging.info("Exited the create_folder method of SimpleStorageService class")
 
-    def upload_file(self, from_filename: str, to_filename: str, bucket_name: str, remove: bool = True):
+    def upload_file(self, from_filename: str, to_filename: str, bucket_name: str, remove: bool = True,
+                    metadata: dict = None):
         """
         Uploads a local file to the specified S3 bucket with an optional file deletion.
 
@@ -162,11 +258,13 @@ class SimpleStorageService:
             to_filename (str): Target file path in the bucket.
             bucket_name (str): Name of the S3 bucket.
             remove (bool): If True, deletes the local file after upload.
+            metadata (dict): Optional user metadata stored with the object.
         """
         logging.info("Entered the upload_file method of SimpleStorageService class")
         try:
             logging.info(f"Uploading {from_filename} to {to_filename} in {bucket_name}")
-            self.s3_resource.meta.client.upload_file(from_filename, bucket_name, to_filename)
+            self.s3_resource.meta.client.upload_file(from_filename, bucket_name, to_filename,
+                                                     ExtraArgs={"Metadata": metadata} if metadata else None)
             logging.info(f"Uploaded {from_filename} to {to_filename} in {bucket_name}")
 
             # Delete the local file if remove is True
@@ -0,0 +1,61 @@
+import os
+import shutil
+import sys
+from datetime import datetime, timezone
+
+from src.exception import CustomException
+from src.logger import logging
+from src.utils.main_utils import load_object
+
+
+class LocalStorageService:
+    """
+    A drop-in replacement for SimpleStorageService backed by a local directory, where each bucket
+    is a sub-directory. Used for local development and benchmarks in place of S3.
+    """
+
+    def __init__(self, root_dir: str):
+        """
+        :param root_dir: Directory holding one sub-directory per bucket
+        """
+        self.root_dir = root_dir
+
+    def _path(self, bucket_name: str, s3_key: str) -> str:
+        return os.path.join(self.root_dir, bucket_name, s3_key)
+
+    def s3_key_path_available(self, bucket_name, s3_key) -> bool:
+        return os.path.exists(self._path(bucket_name, s3_key))
+
+    def get_object_metadata(self, s3_key: str, bucket_name: str) -> dict:
+        """
+        Returns an ETag-like identifier (size and mtime) and the modification time of the file.
+        """
+        try:
+            stat = os.stat(self._path(bucket_name, s3_key))
+            return {"etag": f"{stat.st_size:x}-{stat.st_mtime_ns:x}",
+                    "last_modified": datetime.fromtimestamp(stat.st_mtime, tz=timezone.utc),
+                    "version_id": None, "metadata": {}}
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+    def load_model(self, model_name: str, bucket_name: str, model_dir: str = None) -> object:
+        try:
+            model_file = model_dir + "/" + model_name if model_dir else model_name
+            # Memory-mappable artifacts are mapped straight from the store directory
+            model = load_object(self._path(bucket_name, model_file))
+            logging.info("Production model loaded from local model store.")
+            return model
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+    def upload_file(self, from_filename: str, to_filename: str, bucket_name: str, remove: bool = True,
+                    metadata: dict = None):
+        try:
+            destination = self._path(bucket_name, to_filename)
+            os.makedirs(os.path.dirname(destination), exist_ok=True)
+            shutil.copyfile(from_filename, destination)
+            if remove:
+                os.remove(from_filename)
+            logging.info(f"Copied {from_filename} to {destination}")
+        except Exception as e:
+            raise CustomException(e, sys) from e
@@ -5,25 +5,38 @@
 # pipeline
 # app.py OR demo.py
 
+import hashlib
+import json
 import os
 import sys
+from datetime import datetime
+from typing import List, Optional, Tuple
 
+import numpy as np
+import pandas as pd
+from bson import ObjectId
 from pandas import DataFrame
 from sklearn.model_selection import train_test_split
 
+from src.entity.artifact_store import ArtifactStore, DIRECT_ARTIFACT_STORE
 from src.entity.config_entity import DataIngestionConfig
 from src.entity.artifact_entity import DataIngestionArtifact
 from src.exception import CustomException
 from src.logger import logger
 from src.data_access.proj1_data import Proj1Data
+from src.constants import SCHEMA_FILE_PATH
+from src.utils.main_utils import DataFrameWriter, load_dataframe, read_schema_column_dtypes, read_yaml_file, write_yaml_file
 
 class DataIngestion:
-    def __init__(self, data_ingestion_config: DataIngestionConfig = DataIngestionConfig()):
+    def __init__(self, data_ingestion_config: DataIngestionConfig = DataIngestionConfig(),
+                 artifact_store: Optional[ArtifactStore] = None):
         """
         :param data_ingestion_config: configuration for data ingestion
+        :param artifact_store: store handing the train and test sets to the next stages; files only when omitted
         """
         try:
             self.data_ingestion_config = data_ingestion_config
+            self.artifact_store = artifact_store or DIRECT_ARTIFACT_STORE
         except Exception as e:
             raise CustomException(e,sys)
         
@@ -31,7 +44,8 @@ class DataIngestion:
     def export_data_into_feature_store(self)->DataFrame:
         """
         Method Name :   export_data_into_feature_store
-        Description :   This method exports data from mongodb to csv file
+        Description :   This method exports data from mongodb to the feature store file, parquet with the
+                        column types of the schema or csv (see FEATURE_STORE_FORMAT)
         
         Output      :   data is returned as artifact of data ingestion components
         On Failure  :   Write an exception log and then raise an exception
@@ -39,15 +53,195 @@ class DataIngestion:
         try:
             logger.info(f"Exporting data from mongodb")
             my_data = Proj1Data()
+            column_dtypes = read_schema_column_dtypes(SCHEMA_FILE_PATH)
             dataframe = my_data.export_collection_as_dataframe(collection_name=
-                                                                   self.data_ingestion_config.collection_name)
+                                                                   self.data_ingestion_config.collection_name,
+                                                               batch_size=self.data_ingestion_config.export_batch_size,
+                                                               column_dtypes=column_dtypes,
+                                                               n_partitions=self.data_ingestion_config.export_partitions)
             
             logger.info(f"Shape of dataframe: {dataframe.shape}")
             feature_store_file_path  = self.data_ingestion_config.feature_store_file_path
-            dir_path = os.path.dirname(feature_store_file_path)
-            os.makedirs(dir_path,exist_ok=True)
             logger.info(f"Saving exported data into feature store file path: {feature_store_file_path}")
-            dataframe.to_csv(feature_store_file_path,index=False,header=True)
+            self.artifact_store.put_dataframe(feature_store_file_path, dataframe, column_dtypes, keep_in_memory=False)
+            return dataframe
+
+        except Exception as e:
+            raise CustomException(e,sys)
+
+    def stream_data_into_feature_store(self) -> int:
+        """
+        Method Name :   stream_data_into_feature_store
+        Description :   This method streams data from mongodb into the feature store, train and test files
+                        batch by batch, so memory stays flat however large the collection is. Each row goes to
+                        the test set with probability train_test_split_ratio, instead of an exact split.
+
+        Output      :   number of rows exported
+        On Failure  :   Write an exception log and then raise an exception
+        """
+        try:
+            logger.info(f"Streaming data from mongodb in batches of {self.data_ingestion_config.export_batch_size}")
+            column_dtypes = read_schema_column_dtypes(SCHEMA_FILE_PATH)
+            rng = np.random.default_rng()
+            n_rows = 0
+            # Every file gets the columns of the first batch
+            with DataFrameWriter(self.data_ingestion_config.feature_store_file_path, column_dtypes) as feature_store_writer, \
+                    DataFrameWriter(self.data_ingestion_config.training_file_path, column_dtypes) as train_writer, \
+                    DataFrameWriter(self.data_ingestion_config.testing_file_path, column_dtypes) as test_writer:
+                for batch in Proj1Data().iter_collection_batches(self.data_ingestion_config.collection_name,
+                                                                 batch_size=self.data_ingestion_config.export_batch_size,
+                                                                 column_dtypes=column_dtypes):
+                    is_test = rng.random(len(batch)) < self.data_ingestion_config.train_test_split_ratio
+                    feature_store_writer.write(batch)
+                    train_writer.write(batch[~is_test])
+                    test_writer.write(batch[is_test])
+                    n_rows += len(batch)
+
+            logger.info(f"Streamed {n_rows} rows into feature store file path: "
+                        f"{self.data_ingestion_config.feature_store_file_path}")
+            return n_rows
+
+        except Exception as e:
+            raise CustomException(e,sys)
+
+    def read_watermark(self) -> Optional[dict]:
+        """
+        Returns the watermark of the feature store snapshot, or None when there is no snapshot yet.
+        """
+        watermark_file_path = self.data_ingestion_config.watermark_file_path
+        if not os.path.exists(watermark_file_path):
+            return None
+        watermark = read_yaml_file(watermark_file_path)
+        if watermark.get("value_type") == "ObjectId":
+            watermark["value"] = ObjectId(watermark["value"])
+        return watermark
+
+    def write_snapshot_part(self, my_data: Proj1Data, query: dict,
+                            column_dtypes: dict) -> Tuple[Optional[str], Optional[List[str]], int]:
+        """
+        Method Name :   write_snapshot_part
+        Description :   This method exports the documents matching query, in watermark key order, into a new
+                        parquet part file of the feature store snapshot, batch by batch
+
+        Output      :   part file name (None when no document matched), fields seen and number of rows
+        On Failure  :   Write an exception log and then raise an exception
+        """
+        try:
+            snapshot_dir = self.data_ingestion_config.snapshot_dir
+            os.makedirs(snapshot_dir, exist_ok=True)
+            part_file_name = f"part-{datetime.now().strftime('%Y%m%d%H%M%S%f')}.parquet"
+            part_file_path = os.path.join(snapshot_dir, part_file_name)
+
+            seen_columns = {}
+            # Declared types, so that a later batch with missing ints still fits the file's schema
+            with DataFrameWriter(part_file_path + ".inprogress", column_dtypes, file_format="parquet") as writer:
+                for batch in my_data.iter_collection_batches(self.data_ingestion_config.collection_name,
+                                                             batch_size=self.data_ingestion_config.export_batch_size,
+                                                             column_dtypes=column_dtypes, query=query,
+                                                             sort_key=self.data_ingestion_config.watermark_key):
+                    seen_columns.update(dict.fromkeys(batch.columns))
+                    writer.write(batch)
+
+            if writer.columns is None:
+                return None, None, 0
+            os.replace(part_file_path + ".inprogress", part_file_path)
+            columns, n_rows = writer.columns, writer.rows
+            if len(seen_columns) > len(columns):
+                logger.warning(f"Fields first seen after the first batch are not stored: {list(seen_columns)[len(columns):]}")
+            # All fields seen, so that documents with them do not trigger another refresh on the next run
+            return part_file_name, list(seen_columns), n_rows
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def update_feature_store_snapshot(self) -> DataFrame:
+        """
+        Method Name :   update_feature_store_snapshot
+        Description :   This method brings the columnar feature store snapshot kept across training runs up to
+                        date. Only documents whose watermark key is above the stored watermark are fetched from
+                        mongodb and appended as a new part file; the whole collection is re-exported only when
+                        requested, on the first run, or when the schema or the documents' fields have changed.
+                        Documents are assumed to be insert-only with increasing watermark keys (as ObjectIds
+                        are); documents updated in place are only picked up by a full refresh.
+
+        Output      :   full snapshot is returned as a dataframe
+        On Failure  :   Write an exception log and then raise an exception
+        """
+        try:
+            config = self.data_ingestion_config
+            column_dtypes = read_schema_column_dtypes(SCHEMA_FILE_PATH)
+            schema_hash = hashlib.sha256(json.dumps(column_dtypes).encode()).hexdigest()
+            watermark = self.read_watermark()
+            my_data = Proj1Data()
+            # Documents inserted while exporting wait for the next run instead of racing the watermark
+            upper = my_data.get_max_key(config.collection_name, config.watermark_key)
+
+            refresh_reason = None
+            if config.force_full_refresh:
+                refresh_reason = "requested"
+            elif watermark is None or watermark["value"] is None:
+                refresh_reason = "no snapshot yet"
+            elif (watermark["collection"], watermark["key"]) != (config.collection_name, config.watermark_key):
+                refresh_reason = "collection or watermark key changed"
+            elif watermark["schema_hash"] != schema_hash:
+                refresh_reason = "schema changed"
+            elif not all(os.path.exists(os.path.join(config.snapshot_dir, part)) for part in watermark["parts"]):
+                refresh_reason = "snapshot files missing"
+
+            if refresh_reason is None:
+                parts, columns, n_rows = list(watermark["parts"]), watermark["columns"], watermark["rows"]
+                if upper is not None and upper > watermark["value"]:
+                    part, part_columns, part_rows = self.write_snapshot_part(
+                        my_data, {config.watermark_key: {"$gt": watermark["value"], "$lte": upper}}, column_dtypes)
+                    if part is not None and set(part_columns) != set(columns):
+                        os.remove(os.path.join(config.snapshot_dir, part))
+                        refresh_reason = "document fields changed"
+                    elif part is not None:
+                        parts.append(part)
+                        n_rows += part_rows
+                        logger.info(f"Appended {part_rows} new documents to the feature store snapshot")
+                else:
+                    logger.info("No new documents since the last ingestion")
+
+            if refresh_reason is not None:
+                logger.info(f"Full refresh of the feature store snapshot: {refresh_reason}")
+                query = {config.watermark_key: {"$lte": upper}} if upper is not None else \
+                    {config.watermark_key: {"$exists": True}}
+                part, columns, n_rows = self.write_snapshot_part(my_data, query, column_dtypes)
+                parts = [part] if part is not None else []
+
+            value = upper if upper is not None or refresh_reason is not None else watermark["value"]
+            write_yaml_file(config.watermark_file_path, {
+                "collection": config.collection_name, "key": config.watermark_key,
+                "value": str(value) if isinstance(value, ObjectId) else value,
+                "value_type": type(value).__name__, "schema_hash": schema_hash, "columns": columns,
+                "rows": n_rows, "parts": parts, "updated_at": datetime.now().isoformat()}, replace=True)
+            # Parts of earlier snapshots, and of runs that failed before updating the watermark
+            for file_name in os.listdir(config.snapshot_dir):
+                if file_name.startswith("part-") and file_name not in parts:
+                    os.remove(os.path.join(config.snapshot_dir, file_name))
+
+            frames = [load_dataframe(os.path.join(config.snapshot_dir, part)) for part in parts]
+            return pd.concat(frames, ignore_index=True) if frames else DataFrame(columns=columns)
+
+        except Exception as e:
+            raise CustomException(e,sys)
+
+    def export_incremental_into_feature_store(self) -> DataFrame:
+        """
+        Method Name :   export_incremental_into_feature_store
+        Description :   This method updates the feature store snapshot and saves it as this run's feature store file
+
+        Output      :   data is returned as artifact of data ingestion components
+        On Failure  :   Write an exception log and then raise an exception
+        """
+        try:
+            dataframe = self.update_feature_store_snapshot()
+            logger.info(f"Shape of dataframe: {dataframe.shape}")
+            feature_store_file_path = self.data_ingestion_config.feature_store_file_path
+            logger.info(f"Saving feature store snapshot into feature store file path: {feature_store_file_path}")
+            self.artifact_store.put_dataframe(feature_store_file_path, dataframe, read_schema_column_dtypes(SCHEMA_FILE_PATH),
+                                              keep_in_memory=False)
             return dataframe
 
         except Exception as e:
@@ -67,12 +261,11 @@ class DataIngestion:
             train_set, test_set = train_test_split(dataframe, test_size=self.data_ingestion_config.train_test_split_ratio)
             logger.info("Performed train test split on the dataframe")
             # logger.info("Exited split_data_as_train_test method of DataIngestion class")
-            dir_path = os.path.dirname(self.data_ingestion_config.training_file_path)
-            os.makedirs(dir_path,exist_ok=True)
-            
+            column_dtypes = read_schema_column_dtypes(SCHEMA_FILE_PATH)
+
             logger.info(f"Exporting train and test file path.")
-            train_set.to_csv(self.data_ingestion_config.training_file_path,index=False,header=True)
-            test_set.to_csv(self.data_ingestion_config.testing_file_path,index=False,header=True)
+            self.artifact_store.put_dataframe(self.data_ingestion_config.training_file_path, train_set, column_dtypes)
+            self.artifact_store.put_dataframe(self.data_ingestion_config.testing_file_path, test_set, column_dtypes)
 
             logger.info(f"Exported train and test file path.")
         except Exception as e:
@@ -89,13 +282,26 @@ class DataIngestion:
         logger.info("Entered initiate_data_ingestion method of DataIngestion class")
 
         try:
-            dataframe = self.export_data_into_feature_store()
+            if self.data_ingestion_config.incremental:
+                dataframe = self.export_incremental_into_feature_store()
+
+                logger.info("Got the data from the feature store snapshot")
+
+                self.split_data_as_train_test(dataframe)
+
+                logger.info("Performed train test split on the dataset")
+            elif self.data_ingestion_config.streaming_export:
+                self.stream_data_into_feature_store()
+
+                logger.info("Streamed the data from mongodb into train and test sets")
+            else:
+                dataframe = self.export_data_into_feature_store()
 
-            logger.info("Got the data from mongodb")
+                logger.info("Got the data from mongodb")
 
-            self.split_data_as_train_test(dataframe)
+                self.split_data_as_train_test(dataframe)
 
-            logger.info("Performed train test split on the dataset")
+                logger.info("Performed train test split on the dataset")
 
             logger.info("Exited initiate_data_ingestion method of DataIngestion class")
 
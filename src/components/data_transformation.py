@@ -1,5 +1,6 @@
 import pandas as pd, numpy as np
 import sys
+from typing import Optional
 
 from sklearn.pipeline import Pipeline
 from sklearn.preprocessing import StandardScaler, MinMaxScaler
@@ -7,30 +8,35 @@ from sklearn.compose import ColumnTransformer
 from imblearn.combine import SMOTEENN
 
 from src.entity.artifact_entity import DataIngestionArtifact, DataValidationArtifact, DataTransformationArtifact
+from src.entity.artifact_store import ArtifactStore, DIRECT_ARTIFACT_STORE
 from src.entity.config_entity import DataTransformationConfig
 
 from src.constants import *
 
 from src.logger import logger
 from src.exception import CustomException
-from src.utils.main_utils import read_yaml_file, save_numpy_array_data, save_object
+from src.utils.main_utils import read_schema_column_dtypes, read_yaml_file
 
 class DataTransformation:
     def __init__(self, data_ingestion_artifact: DataIngestionArtifact,
                        data_transformation_config: DataTransformationConfig,
-                       data_validation_artifact: DataValidationArtifact):
+                       data_validation_artifact: DataValidationArtifact,
+                       artifact_store: Optional[ArtifactStore] = None):
         try:
             self.data_ingestion_artifact = data_ingestion_artifact
             self.data_transformation_config = data_transformation_config
             self.data_validation_artifact = data_validation_artifact
+            self.artifact_store = artifact_store or DIRECT_ARTIFACT_STORE
             self.schema_config = read_yaml_file(SCHEMA_FILE_PATH)
         except Exception as e:
             raise CustomException(e, sys)
     
-    @staticmethod
-    def read_data(path) -> pd.DataFrame:
+    def read_data(self, path, columns: list = None) -> pd.DataFrame:
+        """
+        Reads the given columns of a data file (all columns when omitted).
+        """
         try:
-            return pd.read_csv(path)
+            return self.artifact_store.get_dataframe(path, columns=columns)
         except Exception as e:
             raise CustomException(e, sys)
         
@@ -107,15 +113,16 @@ class DataTransformation:
             if not self.data_validation_artifact.validation_status:
                 raise Exception(self.data_validation_artifact.message)
 
-            # Load train and test data
-            train_df = self.read_data(path=self.data_ingestion_artifact.trained_file_path)
-            test_df = self.read_data(path=self.data_ingestion_artifact.test_file_path)
+            # Load the schema columns of train and test data
+            columns = list(read_schema_column_dtypes(SCHEMA_FILE_PATH))
+            train_df = self.read_data(path=self.data_ingestion_artifact.trained_file_path, columns=columns)
+            test_df = self.read_data(path=self.data_ingestion_artifact.test_file_path, columns=columns)
             logger.info("Train-Test data loaded")
 
-            input_feature_train_df = train_df.drop(columns=[TARGET_COLUMN], axis=1)
+            input_feature_train_df = train_df.drop(columns=[TARGET_COLUMN])
             target_feature_train_df = train_df[TARGET_COLUMN]
 
-            input_feature_test_df = test_df.drop(columns=[TARGET_COLUMN], axis=1)
+            input_feature_test_df = test_df.drop(columns=[TARGET_COLUMN])
             target_feature_test_df = test_df[TARGET_COLUMN]
             logger.info("Input and Target cols defined for both train and test df.")
 
@@ -151,9 +158,9 @@ class DataTransformation:
             test_arr = np.c_[input_feature_test_final, np.array(target_feature_test_final)]
             logger.info("feature-target concatenation done for train-test df.")
 
-            save_object(self.data_transformation_config.transformed_object_file_path, preprocessor)
-            save_numpy_array_data(self.data_transformation_config.transformed_train_file_path, array=train_arr)
-            save_numpy_array_data(self.data_transformation_config.transformed_test_file_path, array=test_arr)
+            self.artifact_store.put_object(self.data_transformation_config.transformed_object_file_path, preprocessor)
+            self.artifact_store.put_array(self.data_transformation_config.transformed_train_file_path, train_arr)
+            self.artifact_store.put_array(self.data_transformation_config.transformed_test_file_path, test_arr)
             logger.info("Saving transformation object and transformed files.")
 
             data_transformation_artifact = DataTransformationConfig(
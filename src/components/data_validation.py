@@ -1,20 +1,24 @@
 import json, os, sys
 
 import pandas as pd
+from typing import Optional
 
 from src.exception import CustomException
 from src.logger import logger
 from src.utils.main_utils import read_yaml_file
 
+from src.entity.artifact_store import ArtifactStore, DIRECT_ARTIFACT_STORE
 from src.entity.config_entity import DataValidationConfig
 from src.entity.artifact_entity import DataIngestionArtifact, DataValidationArtifact
 from src.constants import SCHEMA_FILE_PATH
 
 class DataValidation:
-    def __init__(self, data_validation_config: DataValidationConfig, data_ingestion_artifact: DataIngestionArtifact):
+    def __init__(self, data_validation_config: DataValidationConfig, data_ingestion_artifact: DataIngestionArtifact,
+                 artifact_store: Optional[ArtifactStore] = None):
         try:
             self.data_validation_config = data_validation_config
             self.data_ingestion_artifact = data_ingestion_artifact
+            self.artifact_store = artifact_store or DIRECT_ARTIFACT_STORE
             self.schema_config = read_yaml_file(SCHEMA_FILE_PATH)
         except Exception as e:
             raise CustomException(e, sys)
@@ -54,10 +58,12 @@ class DataValidation:
         except Exception as e:
             raise CustomException(e, sys)
 
-    @staticmethod
-    def read_data(path) -> pd.DataFrame:
+    def read_data(self, path) -> pd.DataFrame:
+        """
+        Reads only the columns and dtypes of a data file: the checks below do not need its rows.
+        """
         try:
-            df = pd.read_csv(path)
+            df = self.artifact_store.get_dataframe_schema(path)
             return df
         except Exception as e:
             raise CustomException(e, sys)
@@ -67,8 +73,8 @@ class DataValidation:
             validation_error_message = ""
             logger.info("Starting data validation")
 
-            train_df, test_df = (DataValidation.read_data(self.data_ingestion_artifact.trained_file_path),
-                                 DataValidation.read_data(self.data_ingestion_artifact.test_file_path))
+            train_df, test_df = (self.read_data(self.data_ingestion_artifact.trained_file_path),
+                                 self.read_data(self.data_ingestion_artifact.test_file_path))
 
 
             # check cols len of df for train/test
@@ -0,0 +1,225 @@
+import copy
+import json
+import os
+import sys
+import time
+from typing import Iterator, List, Optional, Tuple
+
+import numpy as np
+from sklearn.metrics import f1_score, precision_score, recall_score
+from sklearn.model_selection import train_test_split
+
+from src.entity.artifact_entity import (ClassificationMetricArtifact, DataTransformationArtifact,
+                                        ModelCompactionArtifact, ModelTrainerArtifact)
+from src.entity.artifact_store import ArtifactStore, DIRECT_ARTIFACT_STORE
+from src.entity.compiled_forest import CompiledForest
+from src.entity.config_entity import ModelCompactionConfig
+from src.entity.estimator import MyModel
+from src.exception import CustomException
+from src.logger import logger
+from src.utils.main_utils import get_mmap_arrays_dir, load_object, save_object
+
+
+class ModelCompaction:
+    def __init__(self, data_transformation_artifact: DataTransformationArtifact,
+                 model_trainer_artifact: ModelTrainerArtifact,
+                 model_compaction_config: ModelCompactionConfig,
+                 artifact_store: Optional[ArtifactStore] = None):
+        """
+        :param data_transformation_artifact: Output reference of data transformation artifact stage
+        :param model_trainer_artifact: Output reference of model trainer artifact stage
+        :param model_compaction_config: Configuration for model compaction
+        :param artifact_store: Store holding the transformed test array; files only when omitted
+        """
+        self.data_transformation_artifact = data_transformation_artifact
+        self.model_trainer_artifact = model_trainer_artifact
+        self.model_compaction_config = model_compaction_config
+        self.artifact_store = artifact_store or DIRECT_ARTIFACT_STORE
+
+    @staticmethod
+    def get_tree_margins(forest, x_test: np.ndarray) -> np.ndarray:
+        """
+        Method Name :   get_tree_margins
+        Description :   This function computes, for every tree and test row, the tree's probability of the
+                        positive class minus that of the negative class. A subset of trees predicts the
+                        positive class for a row exactly when its summed margin is above zero.
+
+        Output      :   Returns an array of shape (n_trees, n_rows)
+        """
+        x_test = x_test.astype(np.float32)
+        return np.stack([(lambda proba: proba[:, 1] - proba[:, 0])(tree.predict_proba(x_test))
+                         for tree in forest.estimators_])
+
+    @staticmethod
+    def select_trees(margins: np.ndarray, y_true: np.ndarray, block_size: int = 16) -> Iterator[Tuple[List[int], float]]:
+        """
+        Method Name :   select_trees
+        Description :   This function greedily grows a subset of trees, adding at every step the tree that
+                        gives the subset the best F1 score on the given rows
+
+        Output      :   Yields the selected tree indices and their F1 score after every step
+        """
+        n_positive = int(y_true.sum())
+        votes = np.zeros(margins.shape[1])
+        selected, remaining = [], list(range(margins.shape[0]))
+        while remaining:
+            best_f1, best_position = -1.0, 0
+            # Candidates are scored in blocks to bound the memory of the (candidates, rows) matrix
+            for block_start in range(0, len(remaining), block_size):
+                block = remaining[block_start:block_start + block_size]
+                predicted = (votes + margins[block]) > 0
+                true_positives = (predicted & y_true).sum(axis=1)
+                denominator = predicted.sum(axis=1) + n_positive
+                f1 = np.divide(2 * true_positives, denominator, out=np.zeros(len(block)), where=denominator > 0)
+                position = int(np.argmax(f1))
+                if f1[position] > best_f1:
+                    best_f1, best_position = float(f1[position]), block_start + position
+            tree_index = remaining.pop(best_position)
+            votes += margins[tree_index]
+            selected.append(tree_index)
+            yield list(selected), best_f1
+
+    @staticmethod
+    def build_forest(forest, tree_indices: List[int]):
+        """
+        Returns a copy of the fitted forest keeping only the given trees, in their original order.
+        """
+        compacted_forest = copy.copy(forest)
+        compacted_forest.estimators_ = [forest.estimators_[index] for index in sorted(tree_indices)]
+        compacted_forest.n_estimators = len(compacted_forest.estimators_)
+        return compacted_forest
+
+    @staticmethod
+    def measure_model(model_file_path: str, rows, repeats: int = 5) -> dict:
+        """
+        Method Name :   measure_model
+        Description :   This function measures the size on disk, load time and predict latency of a saved MyModel
+
+        Output      :   Returns a dictionary of the measurements
+        """
+        size_bytes = os.path.getsize(model_file_path)
+        arrays_dir = get_mmap_arrays_dir(model_file_path)
+        if os.path.isdir(arrays_dir):
+            size_bytes += sum(os.path.getsize(os.path.join(arrays_dir, name)) for name in os.listdir(arrays_dir))
+
+        load_seconds = []
+        for _ in range(repeats):
+            started = time.perf_counter()
+            model = load_object(model_file_path)
+            load_seconds.append(time.perf_counter() - started)
+
+        def predict_ms(batch, n_calls: int) -> float:
+            model.predict(batch)
+            timings = []
+            for _ in range(n_calls):
+                started = time.perf_counter()
+                model.predict(batch)
+                timings.append(time.perf_counter() - started)
+            return round(float(np.median(timings)) * 1000, 3)
+
+        return {"size_bytes": size_bytes,
+                "load_ms": round(float(np.median(load_seconds)) * 1000, 3),
+                "predict_single_row_ms": predict_ms(rows.iloc[:1], 10 * repeats),
+                "predict_batch_ms": predict_ms(rows.iloc[:1000], repeats),
+                "batch_size": min(len(rows), 1000)}
+
+    def initiate_model_compaction(self) -> ModelCompactionArtifact:
+        """
+        Method Name :   initiate_model_compaction
+        Description :   This function splits the test array into a selection part and a held-out part, selects
+                        the smallest greedy subset of at least min_trees trees whose F1 score on the selection
+                        part stays within the configured tolerance of the full forest, and keeps it only if it
+                        also does on the held-out part. The subset is saved as a new MyModel with a report
+                        comparing it with the original; the reported scores are those of the held-out part
+
+        Output      :   Returns model compaction artifact
+        On Failure  :   Write an exception log and then raise an exception
+        """
+        logger.info("Entered initiate_model_compaction method of ModelCompaction class")
+        try:
+            trained_model: MyModel = load_object(self.model_trainer_artifact.trained_model_file_path)
+            forest = trained_model.trained_model_object
+            original_n_trees = len(forest.estimators_)
+            f1_tolerance = self.model_compaction_config.f1_tolerance
+            report = {"original_n_trees": original_n_trees, "f1_tolerance": f1_tolerance,
+                      "min_trees": self.model_compaction_config.min_trees}
+
+            test_arr = self.artifact_store.get_array(self.data_transformation_artifact.transformed_test_file_path)
+            x_test, y_test = test_arr[:, :-1], test_arr[:, -1]
+            if len(forest.classes_) != 2:
+                raise ValueError("Forest compaction supports binary classifiers only")
+
+            # Selecting trees on the rows the scores are reported on would overstate the compacted F1
+            select_rows, holdout_rows = train_test_split(
+                np.arange(len(y_test)), train_size=self.model_compaction_config.selection_fraction,
+                stratify=y_test, random_state=self.model_compaction_config._random_state)
+            x_select, y_select = x_test[select_rows], y_test[select_rows]
+            x_holdout, y_holdout = x_test[holdout_rows], y_test[holdout_rows]
+
+            selection_f1 = f1_score(y_select, forest.predict(x_select))
+            target_f1 = selection_f1 - f1_tolerance
+            logger.info(f"Full forest selection F1 {selection_f1:.4f}; compacting to F1 >= {target_f1:.4f}")
+
+            margins = self.get_tree_margins(forest, x_select)
+            compacted_forest = forest
+            for tree_indices, greedy_f1 in self.select_trees(margins, y_select == forest.classes_[1]):
+                if len(tree_indices) == original_n_trees:
+                    break
+                if len(tree_indices) < self.model_compaction_config.min_trees or greedy_f1 < target_f1:
+                    continue
+                # The greedy score sums margins in a different order than sklearn; confirm on the real forest
+                candidate = self.build_forest(forest, tree_indices)
+                if f1_score(y_select, candidate.predict(x_select)) >= target_f1:
+                    compacted_forest = candidate
+                    break
+
+            full_f1 = f1_score(y_holdout, forest.predict(x_holdout))
+            y_pred = compacted_forest.predict(x_holdout)
+            compacted_f1 = f1_score(y_holdout, y_pred)
+            if compacted_f1 < full_f1 - f1_tolerance:
+                logger.info(f"Compacted forest held-out F1 {compacted_f1:.4f} is below the tolerance of "
+                            f"the full forest's {full_f1:.4f}")
+                compacted_forest, y_pred, compacted_f1 = forest, None, full_f1
+
+            n_trees = len(compacted_forest.estimators_)
+            report.update(n_trees=n_trees, original_f1=full_f1, compacted_f1=compacted_f1)
+            os.makedirs(os.path.dirname(self.model_compaction_config.report_file_path), exist_ok=True)
+            if n_trees == original_n_trees:
+                logger.info("No smaller subset of trees stays within the F1 tolerance; keeping the trained model")
+                with open(self.model_compaction_config.report_file_path, "w") as file:
+                    json.dump(report, file)
+                return ModelCompactionArtifact(is_compacted=False, original_n_trees=original_n_trees,
+                                               n_trees=n_trees, report_file_path=self.model_compaction_config.report_file_path)
+
+            preprocessing_obj = trained_model.preprocessing_object
+            compiled_model = CompiledForest.from_model(preprocessing_obj, compacted_forest)
+            test_df = CompiledForest.inverse_transform(preprocessing_obj, x_test)
+            if not compiled_model.verify(preprocessing_obj, compacted_forest, test_df):
+                logger.info("Compiled compacted forest does not match; shipping it without a compiled forest")
+                compiled_model = None
+            compacted_model = MyModel(preprocessing_object=preprocessing_obj, trained_model_object=compacted_forest,
+                                      compiled_model=compiled_model)
+            save_object(self.model_compaction_config.compacted_model_file_path, compacted_model,
+                        mmap_arrays=self.model_compaction_config.mmap_model_artifact)
+
+            report["original"] = self.measure_model(self.model_trainer_artifact.trained_model_file_path, test_df)
+            report["compacted"] = self.measure_model(self.model_compaction_config.compacted_model_file_path, test_df)
+            with open(self.model_compaction_config.report_file_path, "w") as file:
+                json.dump(report, file)
+            logger.info(f"Compacted forest from {original_n_trees} to {n_trees} trees: {report}")
+
+            metric_artifact = ClassificationMetricArtifact(f1_score=compacted_f1,
+                                                           precision_score=precision_score(y_holdout, y_pred),
+                                                           recall_score=recall_score(y_holdout, y_pred))
+            model_compaction_artifact = ModelCompactionArtifact(
+                is_compacted=True,
+                original_n_trees=original_n_trees,
+                n_trees=n_trees,
+                report_file_path=self.model_compaction_config.report_file_path,
+                compacted_model_file_path=self.model_compaction_config.compacted_model_file_path,
+                metric_artifact=metric_artifact)
+            logger.info(f"Model compaction artifact: {model_compaction_artifact}")
+            return model_compaction_artifact
+
+        except Exception as e:
+            raise CustomException(e, sys) from e
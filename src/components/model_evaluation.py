@@ -5,11 +5,12 @@ from typing import Optional
 from src.exception import CustomException
 from src.logger import logger
 
-from src.constants import TARGET_COLUMN
+from src.constants import SCHEMA_FILE_PATH, TARGET_COLUMN
 from src.utils.main_utils import *
 from sklearn.metrics import f1_score
 
 from src.entity.artifact_entity import DataIngestionArtifact, ModelTrainerArtifact, ModelEvaluationArtifact
+from src.entity.artifact_store import ArtifactStore, DIRECT_ARTIFACT_STORE
 from src.entity.config_entity import ModelEvaluationConfig
 from src.entity.s3_estimator import Proj1Estimator
 
@@ -21,10 +22,12 @@ class ModelEvaluationResponse:
     difference: float
 
 class ModelEvaluation:
-    def __init__(self, data_ingestion_artifact: DataIngestionArtifact, model_evaluation_config: ModelEvaluationConfig, model_trainer_artifact: ModelTrainerArtifact):
+    def __init__(self, data_ingestion_artifact: DataIngestionArtifact, model_evaluation_config: ModelEvaluationConfig, model_trainer_artifact: ModelTrainerArtifact,
+                 artifact_store: Optional[ArtifactStore] = None):
         self.data_ingestion_artifact = data_ingestion_artifact
         self.model_evaluation_config = model_evaluation_config
         self.model_trainer_artifact = model_trainer_artifact
+        self.artifact_store = artifact_store or DIRECT_ARTIFACT_STORE
 
     def get_best_model(self) -> Optional[Proj1Estimator]:
         """
@@ -87,7 +90,8 @@ class ModelEvaluation:
         On Failure  :   Write an exception log and then raise an exception
         """
         try:
-            test_df = pd.read_csv(self.data_ingestion_artifact.test_file_path)
+            columns = list(read_schema_column_dtypes(SCHEMA_FILE_PATH))
+            test_df = self.artifact_store.get_dataframe(self.data_ingestion_artifact.test_file_path, columns=columns)
             X, y = test_df.drop(TARGET_COLUMN, axis = 1), test_df[TARGET_COLUMN]
 
             logger.info("Test data loaded and now transforming it for prediction...")
@@ -1,5 +1,5 @@
 import sys, json
-from typing import Tuple
+from typing import Optional, Tuple
 
 import numpy as np
 from sklearn.ensemble import RandomForestClassifier
@@ -7,20 +7,25 @@ from sklearn.metrics import accuracy_score, f1_score, precision_score, recall_sc
 
 from src.exception import CustomException
 from src.logger import logger
-from src.utils.main_utils import load_numpy_array_data, load_object, save_object
+from src.utils.main_utils import save_object
+from src.entity.artifact_store import ArtifactStore, DIRECT_ARTIFACT_STORE
 from src.entity.config_entity import ModelTrainerConfig
 from src.entity.artifact_entity import DataTransformationArtifact, ModelTrainerArtifact, ClassificationMetricArtifact
 from src.entity.estimator import MyModel
+from src.entity.compiled_forest import CompiledForest
 
 class ModelTrainer:
     def __init__(self, data_transformation_artifact: DataTransformationArtifact,
-                        model_trainer_config: ModelTrainerConfig):
+                        model_trainer_config: ModelTrainerConfig,
+                        artifact_store: Optional[ArtifactStore] = None):
         """
         :param data_transformation_artifact: Output reference of data transformation artifact stage
         :param model_trainer_config: Configuration for model training
+        :param artifact_store: Store holding the transformed arrays and preprocessing object; files only when omitted
         """
         self.data_transformation_artifact = data_transformation_artifact
         self.model_trainer_config = model_trainer_config
+        self.artifact_store = artifact_store or DIRECT_ARTIFACT_STORE
 
     def get_model_object_and_report(self, train: np.array, test: np.array) -> Tuple[object, object]:
         """
@@ -66,6 +71,33 @@ class ModelTrainer:
         except Exception as e:
             raise CustomException(e, sys) from e
 
+    def export_compiled_model(self, preprocessing_obj: object, trained_model: object, test: np.array) -> Optional[CompiledForest]:
+        """
+        Method Name :   export_compiled_model
+        Description :   This function flattens the trained forest into packed node arrays with the
+                        preprocessing folded into the thresholds, and checks on the test array that it
+                        reproduces the sklearn probabilities bit for bit
+        
+        Output      :   Returns the compiled forest, or None if it could not be built or verified
+        On Failure  :   Write an exception log and continue with the sklearn model only
+        """
+        try:
+            logger.info("Compiling the trained forest")
+            compiled_model = CompiledForest.from_model(preprocessing_obj, trained_model)
+
+            test_df = CompiledForest.inverse_transform(preprocessing_obj, test[:, :-1])
+            if not compiled_model.verify(preprocessing_obj, trained_model, test_df):
+                logger.info("Compiled forest does not match the trained model; skipping export")
+                return None
+
+            compiled_model.save(self.model_trainer_config.compiled_model_file_path)
+            logger.info(f"Compiled forest saved to {self.model_trainer_config.compiled_model_file_path}")
+            return compiled_model
+
+        except Exception as e:
+            logger.error(f"Compiled forest export failed: {e}")
+            return None
+
     def initiate_model_trainer(self) -> ModelTrainerArtifact:
         logger.info("Entered initiate_model_trainer method of ModelTrainer class")
         """
@@ -78,8 +110,8 @@ class ModelTrainer:
         try:
             logger.info("Starting Model Trainer Component")
             # Load transformed train and test data
-            train_arr = load_numpy_array_data(file_path=self.data_transformation_artifact.transformed_train_file_path)
-            test_arr = load_numpy_array_data(file_path=self.data_transformation_artifact.transformed_test_file_path)
+            train_arr = self.artifact_store.get_array(self.data_transformation_artifact.transformed_train_file_path)
+            test_arr = self.artifact_store.get_array(self.data_transformation_artifact.transformed_test_file_path)
             logger.info("train-test data loaded")
             
             # Train model and get metrics
@@ -87,7 +119,7 @@ class ModelTrainer:
             logger.info("Model object and artifact loaded.")
             
             # Load preprocessing object
-            preprocessing_obj = load_object(self.data_transformation_artifact.transformed_object_file_path)
+            preprocessing_obj = self.artifact_store.get_object(self.data_transformation_artifact.transformed_object_file_path)
             logger.info("Preprocessing obj loaded.")
 
             # Check if the model's accuracy meets the expected threshold
@@ -95,16 +127,22 @@ class ModelTrainer:
                 logger.info("No model found with score above the base score")
                 raise Exception("No model found with score above the base score")
 
+            # Export the compiled forest used for low-latency serving
+            compiled_model = self.export_compiled_model(preprocessing_obj, trained_model, test_arr)
+
             # Save the final model object that includes both preprocessing and the trained model
             logger.info("Saving new model as performace is better than previous one.")
-            my_model = MyModel(preprocessing_object=preprocessing_obj, trained_model_object=trained_model)
-            save_object(self.model_trainer_config.trained_model_file_path, my_model)
+            my_model = MyModel(preprocessing_object=preprocessing_obj, trained_model_object=trained_model,
+                               compiled_model=compiled_model)
+            save_object(self.model_trainer_config.trained_model_file_path, my_model,
+                        mmap_arrays=self.model_trainer_config.mmap_model_artifact)
             logger.info("Saved final model object that includes both preprocessing and the trained model")
 
             # Create and return the ModelTrainerArtifact
             model_trainer_artifact = ModelTrainerArtifact(
                 trained_model_file_path=self.model_trainer_config.trained_model_file_path,
                 metric_artifact=metric_artifact,
+                compiled_model_file_path=self.model_trainer_config.compiled_model_file_path if compiled_model else None,
             )
 
             logger.info(f"Model trainer artifact: {model_trainer_artifact}")
@@ -5,7 +5,7 @@ import certifi
 
 from src.exception import CustomException
 from src.logger import logger
-from src.constants import DATABASE_NAME
+from src.constants import DATABASE_NAME, MONGODB_MAX_POOL_SIZE
 
 import logging
 logging.getLogger("pymongo").setLevel(logging.WARNING)
@@ -54,7 +54,8 @@ class MongoDBClient:
                     raise Exception(f"Environment variable 'CONNECTION_URI' is not set.")
                 
                 # Establish a new MongoDB client connection
-                MongoDBClient.client = pymongo.MongoClient(mongo_db_url, tlsCAFile=ca)
+                # maxPoolSize bounds the connections shared by all threads, e.g. the partitioned export's readers
+                MongoDBClient.client = pymongo.MongoClient(mongo_db_url, tlsCAFile=ca, maxPoolSize=MONGODB_MAX_POOL_SIZE)
                 
             # Use the shared MongoClient for this instance
             self.client = MongoDBClient.client
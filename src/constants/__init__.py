@@ -1,10 +1,12 @@
 import os
+import tempfile
 from datetime import date
 
 # For MongoDB connection
 DATABASE_NAME = "Proj1"
 COLLECTION_NAME = "Proj1-Data"
 MONGODB_URL_KEY = "MONGODB_URL"
+MONGODB_MAX_POOL_SIZE: int = int(os.getenv("MONGODB_MAX_POOL_SIZE", 100))
 
 PIPELINE_NAME: str = ""
 ARTIFACT_DIR: str = "artifact"
@@ -15,15 +17,18 @@ TARGET_COLUMN = "Response"
 CURRENT_YEAR = date.today().year
 PREPROCSSING_OBJECT_FILE_NAME = "preprocessing.pkl"
 
-FILE_NAME: str = "data.csv"
-TRAIN_FILE_NAME: str = "train.csv"
-TEST_FILE_NAME: str = "test.csv"
+FEATURE_STORE_FORMAT: str = os.getenv("FEATURE_STORE_FORMAT", "parquet")  # "parquet" or "csv"
+FEATURE_STORE_PARQUET_COMPRESSION: str = os.getenv("FEATURE_STORE_PARQUET_COMPRESSION", "zstd")
+FILE_NAME: str = f"data.{FEATURE_STORE_FORMAT}"
+TRAIN_FILE_NAME: str = f"train.{FEATURE_STORE_FORMAT}"
+TEST_FILE_NAME: str = f"test.{FEATURE_STORE_FORMAT}"
 SCHEMA_FILE_PATH = os.path.join("config", "schema.yaml")
 
 
 AWS_ACCESS_KEY_ID_ENV_KEY = "AWS_ACCESS_KEY_ID"
 AWS_SECRET_ACCESS_KEY_ENV_KEY = "AWS_SECRET_ACCESS_KEY"
 REGION_NAME = "us-east-1"
+MODEL_STORE_DIR_ENV_KEY = "MODEL_STORE_DIR"
 
 
 """
@@ -34,6 +39,23 @@ DATA_INGESTION_DIR_NAME: str = "data_ingestion"
 DATA_INGESTION_FEATURE_STORE_DIR: str = "feature_store"
 DATA_INGESTION_INGESTED_DIR: str = "ingested"
 DATA_INGESTION_TRAIN_TEST_SPLIT_RATIO: float = 0.25
+DATA_INGESTION_EXPORT_BATCH_SIZE: int = int(os.getenv("INGESTION_BATCH_SIZE", 10000))
+DATA_INGESTION_STREAMING_EXPORT: bool = os.getenv("STREAMING_INGESTION", "false").lower() == "true"
+DATA_INGESTION_EXPORT_PARTITIONS: int = int(os.getenv("INGESTION_PARTITIONS", 1))  # 1 reads one sequential cursor
+DATA_INGESTION_PARTITION_KEY: str = os.getenv("INGESTION_PARTITION_KEY", "_id")
+DATA_INGESTION_PARTITION_SAMPLE_SIZE: int = 1000
+DATA_INGESTION_INCREMENTAL: bool = os.getenv("INCREMENTAL_INGESTION", "false").lower() == "true"
+DATA_INGESTION_FULL_REFRESH: bool = os.getenv("INGESTION_FULL_REFRESH", "false").lower() == "true"
+DATA_INGESTION_WATERMARK_KEY: str = os.getenv("INGESTION_WATERMARK_KEY", "_id")
+DATA_INGESTION_SNAPSHOT_DIR: str = os.path.join(ARTIFACT_DIR, "feature_store_snapshot")  # shared by all runs
+DATA_INGESTION_WATERMARK_FILE_NAME: str = "watermark.yaml"
+
+"""
+Artifact store related constant start with ARTIFACT_STORE VAR NAME
+"""
+ARTIFACT_STORE_IN_MEMORY: bool = os.getenv("ARTIFACT_STORE_IN_MEMORY", "true").lower() == "true"
+ARTIFACT_STORE_ASYNC_WRITES: bool = os.getenv("ARTIFACT_STORE_ASYNC_WRITES", "true").lower() == "true"
+ARTIFACT_STORE_WRITE_WORKERS: int = int(os.getenv("ARTIFACT_STORE_WRITE_WORKERS", 2))
 
 """
 Data Validation realted contant start with DATA_VALIDATION VAR NAME
@@ -54,6 +76,8 @@ MODEL TRAINER related constant start with MODEL_TRAINER var name
 MODEL_TRAINER_DIR_NAME: str = "model_trainer"
 MODEL_TRAINER_TRAINED_MODEL_DIR: str = "trained_model"
 MODEL_TRAINER_TRAINED_MODEL_NAME: str = "model.pkl"
+MODEL_TRAINER_COMPILED_MODEL_NAME: str = "compiled_model.npz"
+MODEL_TRAINER_MMAP_ARTIFACT: bool = os.getenv("MMAP_MODEL_ARTIFACT", "false").lower() == "true"
 MODEL_TRAINER_EXPECTED_SCORE: float = 0.6
 MODEL_TRAINER_MODEL_CONFIG_FILE_PATH: str = os.path.join("config", "model.yaml")
 MODEL_TRAINING_RESULT_FILE_NAME: str = "train_result.yaml"
@@ -64,6 +88,18 @@ MIN_SAMPLES_SPLIT_MAX_DEPTH: int = 10
 MIN_SAMPLES_SPLIT_CRITERION: str = 'entropy'
 MIN_SAMPLES_SPLIT_RANDOM_STATE: int = 101
 
+"""
+MODEL Compaction related constants start with MODEL_COMPACTION var name
+"""
+MODEL_COMPACTION_DIR_NAME: str = "model_compaction"
+MODEL_COMPACTION_COMPACTED_MODEL_DIR: str = "compacted_model"
+MODEL_COMPACTION_REPORT_FILE_NAME: str = "report.yaml"
+MODEL_COMPACTION_ENABLED: bool = os.getenv("MODEL_COMPACTION", "false").lower() == "true"
+MODEL_COMPACTION_F1_TOLERANCE: float = float(os.getenv("MODEL_COMPACTION_F1_TOLERANCE", 0.005))
+MODEL_COMPACTION_MIN_TREES: int = int(os.getenv("MODEL_COMPACTION_MIN_TREES", 10))
+MODEL_COMPACTION_SELECTION_FRACTION: float = float(os.getenv("MODEL_COMPACTION_SELECTION_FRACTION", 0.5))
+MODEL_COMPACTION_RANDOM_STATE: int = 101
+
 """
 MODEL Evaluation related constants
 """
@@ -71,6 +107,56 @@ MODEL_EVALUATION_CHANGED_THRESHOLD_SCORE: float = 0.02
 MODEL_BUCKET_NAME = "mlopsproj-7567"
 MODEL_PUSHER_S3_KEY = "model-registry"
 
+"""
+Model serving related constants start with MODEL_SERVING var name
+"""
+MODEL_SERVING_REFRESH_INTERVAL_SECONDS: int = int(os.getenv("MODEL_REFRESH_INTERVAL_SECONDS", 60))
+MODEL_SERVING_BATCH_CHUNK_SIZE: int = 10000
+MODEL_SERVING_UPLOAD_READ_SIZE: int = 1024 * 1024
+MODEL_SERVING_MICRO_BATCHING: bool = os.getenv("MICRO_BATCHING", "false").lower() == "true"
+MODEL_SERVING_MICRO_BATCH_MAX_SIZE: int = int(os.getenv("MICRO_BATCH_MAX_SIZE", 64))
+MODEL_SERVING_MICRO_BATCH_MAX_WAIT_MS: float = float(os.getenv("MICRO_BATCH_MAX_WAIT_MS", 2))
+MODEL_SERVING_EXECUTOR: str = os.getenv("INFERENCE_EXECUTOR", "thread")  # "thread", "process" or "inline"
+MODEL_SERVING_EXECUTOR_WORKERS: int = int(os.getenv("INFERENCE_WORKERS", 4))
+MODEL_SERVING_EXECUTOR_QUEUE_SIZE: int = int(os.getenv("INFERENCE_QUEUE_SIZE", 64))
+MODEL_SERVING_PREDICT_TIMEOUT_SECONDS: float = float(os.getenv("INFERENCE_TIMEOUT_SECONDS", 2))
+MODEL_MMAP_CACHE_DIR: str = os.getenv("MODEL_MMAP_CACHE_DIR", os.path.join(tempfile.gettempdir(), "vehicle-insurance-models"))
+MODEL_SERVING_WARM_UP: bool = os.getenv("WARM_UP_ON_STARTUP", "true").lower() == "true"
+MODEL_SERVING_WARM_UP_BATCH_SIZE: int = int(os.getenv("WARM_UP_BATCH_SIZE", 64))
+MODEL_SERVING_WARM_UP_RETRY_SECONDS: float = float(os.getenv("WARM_UP_RETRY_SECONDS", 5))
+MODEL_SERVING_EARLY_EXIT_CHUNK_SIZE: int = int(os.getenv("EARLY_EXIT_CHUNK_SIZE", 0))  # 0 evaluates every tree
+MODEL_SERVING_PREDICTION_CACHE: bool = os.getenv("PREDICTION_CACHE", "false").lower() == "true"
+MODEL_SERVING_PREDICTION_CACHE_MAX_ENTRIES: int = int(os.getenv("PREDICTION_CACHE_MAX_ENTRIES", 100000))
+MODEL_SERVING_PREDICTION_CACHE_MAX_BYTES: int = int(os.getenv("PREDICTION_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+MODEL_SERVING_PREDICTION_CACHE_TTL_SECONDS: float = float(os.getenv("PREDICTION_CACHE_TTL_SECONDS", 3600))
+MODEL_SERVING_REGISTRY_KEY_PREFIX: str = os.getenv("MODEL_REGISTRY_KEY_PREFIX", "models")  # <prefix>/<model key>/model.pkl
+MODEL_SERVING_REGISTRY_MEMORY_BUDGET_BYTES: int = int(os.getenv("MODEL_REGISTRY_MEMORY_BUDGET_MB", 1024)) * 1024 * 1024
+MODEL_SERVING_REGISTRY_ALLOWED_KEYS: str = os.getenv("MODEL_REGISTRY_ALLOWED_KEYS", "")  # comma-separated; empty allows any key
+MODEL_SERVING_MODEL_KEY_HEADER: str = "X-Model-Key"
+MODEL_SERVING_PREFORK_WORKERS: int = int(os.getenv("SERVER_WORKERS", 0))  # 0 forks one worker per available core
+MODEL_SERVING_ADMISSION_CONTROL: bool = os.getenv("ADMISSION_CONTROL", "true").lower() == "true"
+MODEL_SERVING_PREDICT_MAX_CONCURRENCY: int = int(os.getenv("PREDICT_MAX_CONCURRENCY", 64))
+MODEL_SERVING_PREDICT_MAX_QUEUE: int = int(os.getenv("PREDICT_MAX_QUEUE", 256))
+MODEL_SERVING_PREDICT_QUEUE_TIMEOUT_SECONDS: float = float(os.getenv("PREDICT_QUEUE_TIMEOUT_SECONDS", 1))
+MODEL_SERVING_TRAIN_MAX_CONCURRENCY: int = int(os.getenv("TRAIN_MAX_CONCURRENCY", 2))
+MODEL_SERVING_TRAIN_MAX_QUEUE: int = int(os.getenv("TRAIN_MAX_QUEUE", 0))
+MODEL_SERVING_STATIC_MAX_CONCURRENCY: int = int(os.getenv("STATIC_MAX_CONCURRENCY", 32))
+MODEL_SERVING_STATIC_MAX_QUEUE: int = int(os.getenv("STATIC_MAX_QUEUE", 64))
+MODEL_SERVING_REQUEST_DEADLINE_SECONDS: float = float(os.getenv("REQUEST_DEADLINE_SECONDS", 5))  # 0 disables
+MODEL_SERVING_REQUEST_DEADLINE_HEADER: str = "X-Request-Deadline-Ms"
+MODEL_SERVING_TRAINING_JOBS_DIR: str = os.getenv("TRAINING_JOBS_DIR", "")  # empty keeps jobs per serving process
+MODEL_SERVING_PREFORK_PIN_CORES: bool = os.getenv("SERVER_PIN_CORES", "false").lower() == "true"
+MODEL_SERVING_PREDICTION_LOG: str = os.getenv("PREDICTION_LOG", "none")  # "none", "mongo", "ndjson" or "parquet"
+MODEL_SERVING_PREDICTION_LOG_COLLECTION: str = os.getenv("PREDICTION_LOG_COLLECTION", "Proj1-Predictions")
+MODEL_SERVING_PREDICTION_LOG_DIR: str = os.getenv("PREDICTION_LOG_DIR", "prediction_logs")
+# Records, not requests: a /predict/batch chunk of MODEL_SERVING_BATCH_CHUNK_SIZE rows is kept or dropped as a whole
+MODEL_SERVING_PREDICTION_LOG_MAX_BUFFER: int = int(os.getenv("PREDICTION_LOG_MAX_BUFFER", 50000))
+MODEL_SERVING_PREDICTION_LOG_BATCH_SIZE: int = int(os.getenv("PREDICTION_LOG_BATCH_SIZE", 500))
+MODEL_SERVING_PREDICTION_LOG_FLUSH_INTERVAL_SECONDS: float = float(os.getenv("PREDICTION_LOG_FLUSH_INTERVAL_SECONDS", 1))
+MODEL_SERVING_PREDICTION_LOG_MAX_RETRIES: int = int(os.getenv("PREDICTION_LOG_MAX_RETRIES", 3))
+MODEL_SERVING_PREDICTION_LOG_ROTATE_BYTES: int = int(os.getenv("PREDICTION_LOG_ROTATE_MB", 64)) * 1024 * 1024
+MODEL_SERVING_PREDICTION_LOG_ROTATE_SECONDS: float = float(os.getenv("PREDICTION_LOG_ROTATE_SECONDS", 3600))
+
 
 APP_HOST = "0.0.0.0"
 APP_PORT = 5000
\ No newline at end of file
@@ -1,11 +1,14 @@
 import sys
+from concurrent.futures import ThreadPoolExecutor
 import pandas as pd
 import numpy as np
-from typing import Optional
+from typing import Dict, Iterator, List, Optional
 
 from src.configuration.mongo_db_connection import MongoDBClient
-from src.constants import DATABASE_NAME
+from src.constants import (DATABASE_NAME, DATA_INGESTION_EXPORT_BATCH_SIZE, DATA_INGESTION_EXPORT_PARTITIONS,
+                           DATA_INGESTION_PARTITION_KEY, DATA_INGESTION_PARTITION_SAMPLE_SIZE)
 from src.exception import CustomException
+from src.logger import logger
 
 class Proj1Data:
     """
@@ -21,7 +24,178 @@ class Proj1Data:
         except Exception as e:
             raise CustomException(e, sys)
 
-    def export_collection_as_dataframe(self, collection_name: str, database_name: Optional[str] = None) -> pd.DataFrame:
+    def get_collection(self, collection_name: str, database_name: Optional[str] = None):
+        """
+        Returns a collection of the default or the given database.
+        """
+        if database_name is None:
+            return self.mongo_client.database[collection_name]
+        return self.mongo_client.client[database_name][collection_name]
+
+    @staticmethod
+    def to_typed_column(values: list, dtype: Optional[str] = None) -> np.ndarray:
+        """
+        Converts the values of one field into a column array, with 'na' and missing values as NaN.
+
+        dtype is the type declared in config/schema.yaml: "int" and "float" columns become int64 or
+        float64 arrays (float64 when an int column has missing values); "category" and undeclared
+        columns get the dtype inferred from their values.
+        """
+        column = np.array(values, dtype=object)
+        column[(column == "na") | pd.isna(column)] = np.nan
+        if dtype in ("int", "float"):
+            column = pd.to_numeric(column).astype(np.float64)
+            if dtype == "int" and not np.isnan(column).any():
+                column = column.astype(np.int64)
+            return column
+        return pd.Series(column, dtype=object).infer_objects().to_numpy()
+
+    def iter_collection_batches(self, collection_name: str, database_name: Optional[str] = None,
+                                batch_size: int = DATA_INGESTION_EXPORT_BATCH_SIZE,
+                                column_dtypes: Optional[Dict[str, str]] = None, query: Optional[dict] = None,
+                                sort_key: Optional[str] = None) -> Iterator[pd.DataFrame]:
+        """
+        Streams a MongoDB collection as DataFrames of at most batch_size rows.
+
+        The server-side cursor fetches batch_size documents per round trip and leaves '_id' out, and
+        every batch is converted into typed column arrays before the next one is read, so memory is
+        bounded by the batch size instead of the collection size.
+
+        Parameters:
+        ----------
+        collection_name : str
+            The name of the MongoDB collection to export.
+        database_name : Optional[str]
+            Name of the database (optional). Defaults to DATABASE_NAME.
+        batch_size : int
+            Number of documents per cursor round trip and per yielded DataFrame.
+        column_dtypes : Optional[Dict[str, str]]
+            Column types of config/schema.yaml ("int", "float" or "category"); other fields are kept as objects.
+        query : Optional[dict]
+            Filter of the documents to export (optional). Defaults to the whole collection.
+        sort_key : Optional[str]
+            Field to return the documents in ascending order of (optional).
+
+        Yields:
+        -------
+        pd.DataFrame
+            Batches with the fields of their documents as columns, in first-seen order.
+        """
+        try:
+            collection = self.get_collection(collection_name, database_name)
+            yield from self._iter_batches(collection, query or {}, batch_size, column_dtypes or {}, sort_key=sort_key)
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def _iter_batches(self, collection, query: dict, batch_size: int, column_dtypes: Dict[str, str],
+                      sort_key: Optional[str] = None) -> Iterator[pd.DataFrame]:
+        cursor = collection.find(query, projection={"_id": 0}, batch_size=batch_size,
+                                 sort=[(sort_key, 1)] if sort_key else None)
+        documents: List[dict] = []
+        for document in cursor:
+            documents.append(document)
+            if len(documents) == batch_size:
+                yield self._to_frame(documents, column_dtypes)
+                documents = []
+        if documents:
+            yield self._to_frame(documents, column_dtypes)
+
+    def _to_frame(self, documents: List[dict], column_dtypes: Dict[str, str]) -> pd.DataFrame:
+        columns = list(dict.fromkeys(key for document in documents for key in document))
+        return pd.DataFrame({column: self.to_typed_column([document.get(column) for document in documents],
+                                                          column_dtypes.get(column))
+                             for column in columns})
+
+    def get_max_key(self, collection_name: str, key: str, database_name: Optional[str] = None):
+        """
+        Returns the largest value of key in the collection, or None when no document has it.
+        """
+        try:
+            documents = list(self.get_collection(collection_name, database_name)
+                             .find({key: {"$exists": True}}, projection={key: 1}, sort=[(key, -1)], limit=1))
+            return documents[0][key] if documents else None
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def get_split_points(self, collection, n_partitions: int, partition_key: str = DATA_INGESTION_PARTITION_KEY,
+                         sample_size: int = DATA_INGESTION_PARTITION_SAMPLE_SIZE) -> list:
+        """
+        Returns up to n_partitions - 1 ascending partition_key values splitting the collection into ranges
+        of about equal size, as quantiles of a $sample of the keys. Fewer are returned for small collections.
+        """
+        if n_partitions <= 1:
+            return []
+        sample = collection.aggregate([{"$sample": {"size": sample_size}},
+                                       {"$project": {"_id": 0, "key": f"${partition_key}"}}])
+        keys = sorted(document["key"] for document in sample if document.get("key") is not None)
+        if not keys:
+            return []
+        split_points = [keys[len(keys) * index // n_partitions] for index in range(1, n_partitions)]
+        # Duplicate keys would give empty ranges
+        return list(dict.fromkeys(split_points))
+
+    def export_collection_partitioned(self, collection_name: str, database_name: Optional[str] = None,
+                                      n_partitions: int = DATA_INGESTION_EXPORT_PARTITIONS,
+                                      batch_size: int = DATA_INGESTION_EXPORT_BATCH_SIZE,
+                                      column_dtypes: Optional[Dict[str, str]] = None,
+                                      partition_key: str = DATA_INGESTION_PARTITION_KEY) -> pd.DataFrame:
+        """
+        Exports a MongoDB collection by reading n_partitions key ranges concurrently.
+
+        The ranges are bounded by split points sampled from partition_key ("_id" by default, or an
+        indexed field such as "id"), and each is read by its own cursor, sorted by the key, on a thread
+        of a pool sharing the connections of MongoDBClient.client (see MONGODB_MAX_POOL_SIZE). The
+        partitions are concatenated in key order, so rows come out sorted by partition_key whatever
+        the order in which the ranges finish. Documents without the key are not exported.
+
+        Parameters:
+        ----------
+        collection_name : str
+            The name of the MongoDB collection to export.
+        database_name : Optional[str]
+            Name of the database (optional). Defaults to DATABASE_NAME.
+        n_partitions : int
+            Number of key ranges, and of threads reading them.
+        batch_size : int
+            Number of documents per cursor round trip.
+        column_dtypes : Optional[Dict[str, str]]
+            Column types of config/schema.yaml, see iter_collection_batches.
+        partition_key : str
+            Indexed field the ranges are taken over.
+
+        Returns:
+        -------
+        pd.DataFrame
+            DataFrame containing the collection data, with '_id' column removed and 'na' values replaced with NaN.
+        """
+        try:
+            collection = self.get_collection(collection_name, database_name)
+            split_points = self.get_split_points(collection, n_partitions, partition_key)
+            bounds = [None] + split_points + [None]
+            queries = []
+            for lower, upper in zip(bounds[:-1], bounds[1:]):
+                key_range = {"$exists": True}
+                if lower is not None:
+                    key_range["$gte"] = lower
+                if upper is not None:
+                    key_range["$lt"] = upper
+                queries.append({partition_key: key_range})
+
+            def read_partition(query: dict) -> List[pd.DataFrame]:
+                return list(self._iter_batches(collection, query, batch_size, column_dtypes or {}, sort_key=partition_key))
+
+            with ThreadPoolExecutor(max_workers=len(queries), thread_name_prefix="mongo-export") as executor:
+                # map() returns the partitions in range order
+                batches = [batch for partition in executor.map(read_partition, queries) for batch in partition]
+            return pd.concat(batches, ignore_index=True) if batches else pd.DataFrame()
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def export_collection_as_dataframe(self, collection_name: str, database_name: Optional[str] = None,
+                                       batch_size: int = DATA_INGESTION_EXPORT_BATCH_SIZE,
+                                       column_dtypes: Optional[Dict[str, str]] = None,
+                                       n_partitions: int = DATA_INGESTION_EXPORT_PARTITIONS) -> pd.DataFrame:
         """
         Exports an entire MongoDB collection as a pandas DataFrame.
 
@@ -31,6 +205,12 @@ class Proj1Data:
             The name of the MongoDB collection to export.
         database_name : Optional[str]
             Name of the database (optional). Defaults to DATABASE_NAME.
+        batch_size : int
+            Number of documents fetched and converted at a time.
+        column_dtypes : Optional[Dict[str, str]]
+            Column types of config/schema.yaml, see iter_collection_batches.
+        n_partitions : int
+            Read this many _id ranges concurrently with export_collection_partitioned when above 1.
 
         Returns:
         -------
@@ -38,20 +218,20 @@ class Proj1Data:
             DataFrame containing the collection data, with '_id' column removed and 'na' values replaced with NaN.
         """
         try:
-            # Access specified collection from the default or specified database
-            if database_name is None:
-                collection = self.mongo_client.database[collection_name]
-            else:
-                collection = self.mongo_client[database_name][collection_name]
-
-            # Convert collection data to DataFrame and preprocess
-            print("Fetching data from mongoDB")
-            df = pd.DataFrame(list(collection.find()))
-            print(f"Data fecthed with len: {len(df)}")
-            if "id" in df.columns.to_list():
-                df = df.drop(columns=["_id"], axis=1)
-            df.replace({"na":np.nan},inplace=True)
+            if n_partitions > 1:
+                logger.info(f"Fetching data from mongoDB in {n_partitions} partitions")
+                df = self.export_collection_partitioned(collection_name, database_name, n_partitions=n_partitions,
+                                                        batch_size=batch_size, column_dtypes=column_dtypes)
+                logger.info(f"Data fetched with len: {len(df)}")
+                return df
+
+            # Typed batches instead of one list of dicts for the whole collection
+            logger.info("Fetching data from mongoDB")
+            batches = list(self.iter_collection_batches(collection_name, database_name, batch_size=batch_size,
+                                                        column_dtypes=column_dtypes))
+            df = pd.concat(batches, ignore_index=True) if batches else pd.DataFrame()
+            logger.info(f"Data fetched with len: {len(df)}")
             return df
 
         except Exception as e:
-            raise CustomException(e, sys)
\ No newline at end of file
+            raise CustomException(e, sys)
@@ -1,4 +1,5 @@
 from dataclasses import dataclass
+from typing import Optional
 
 @dataclass
 class DataIngestionArtifact:
@@ -27,6 +28,16 @@ class ClassificationMetricArtifact:
 class ModelTrainerArtifact:
     trained_model_file_path: str 
     metric_artifact: ClassificationMetricArtifact
+    compiled_model_file_path: Optional[str] = None
+
+@dataclass
+class ModelCompactionArtifact:
+    is_compacted: bool
+    original_n_trees: int
+    n_trees: int
+    report_file_path: str
+    compacted_model_file_path: Optional[str] = None
+    metric_artifact: Optional[ClassificationMetricArtifact] = None
 
 @dataclass
 class ModelEvaluationArtifact:
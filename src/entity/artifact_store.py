@@ -0,0 +1,184 @@
+import sys
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.entity.config_entity import ArtifactStoreConfig
+from src.exception import CustomException
+from src.logger import logger
+from src.utils.main_utils import (load_dataframe, load_dataframe_schema, load_numpy_array_data, load_object,
+                                  save_dataframe, save_numpy_array_data, save_object)
+
+
+class ArtifactStore:
+    """
+    Hands the dataframes, arrays and objects of one training run from stage to stage.
+
+    Artifacts are keyed by their file path in the run's artifact directory. put_* keeps the object in
+    memory and writes its file on a background thread, so the next stage does not wait for the disk
+    and does not parse the file again; get_* returns the in-memory object when there is one, and
+    otherwise reads the file once any pending write of it is done. The files keep their usual layout
+    and are all written once flush() returns.
+
+    Stored objects are shared rather than copied, so stages must not modify them in place: arrays
+    are handed out read-only, and dataframes rely on pandas copy-on-write.
+    """
+
+    def __init__(self, config: ArtifactStoreConfig = ArtifactStoreConfig()):
+        """
+        :param config: Whether to keep artifacts in memory and to write them asynchronously
+        """
+        self.keep_in_memory = config.keep_in_memory
+        self._artifacts: Dict[str, object] = {}
+        self._writes: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        if config.async_writes:
+            self._executor = ThreadPoolExecutor(max_workers=config.max_write_workers,
+                                                thread_name_prefix="artifact-writer")
+
+    def _put(self, file_path: str, obj: object, save: Callable[[], None], keep_in_memory: bool = True) -> None:
+        with self._lock:
+            if self.keep_in_memory and keep_in_memory:
+                self._artifacts[file_path] = obj
+            else:
+                self._artifacts.pop(file_path, None)
+            if self._executor is not None:
+                previous = self._writes.get(file_path)
+
+                def write() -> None:
+                    # A file put twice is written in put order
+                    if previous is not None:
+                        previous.exception()
+                    save()
+
+                self._writes[file_path] = self._executor.submit(write)
+                return
+        save()
+
+    def _wait(self, file_path: str) -> None:
+        with self._lock:
+            write = self._writes.get(file_path)
+        if write is not None:
+            write.result()
+
+    def put_dataframe(self, file_path: str, dataframe: pd.DataFrame, column_dtypes: dict = None,
+                      keep_in_memory: bool = True) -> None:
+        """
+        Stores a dataframe and writes it as CSV or Parquet, by the extension of file_path.
+        keep_in_memory=False only writes it, for artifacts no later stage reads.
+        """
+        try:
+            self._put(file_path, dataframe, lambda: save_dataframe(file_path, dataframe, column_dtypes),
+                      keep_in_memory=keep_in_memory)
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+    def put_array(self, file_path: str, array: np.ndarray) -> None:
+        """
+        Stores a numpy array, as a read-only view, and writes it as .npy.
+        """
+        try:
+            array = array.view()
+            array.flags.writeable = False
+            self._put(file_path, array, lambda: save_numpy_array_data(file_path, array))
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+    def put_object(self, file_path: str, obj: object) -> None:
+        """
+        Stores an object and pickles it with save_object.
+        """
+        try:
+            self._put(file_path, obj, lambda: save_object(file_path, obj))
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+    def get_dataframe(self, file_path: str, columns: List[str] = None) -> pd.DataFrame:
+        """
+        Returns the given columns (all when omitted) of a stored dataframe, or reads them from its file.
+        """
+        try:
+            dataframe = self._artifacts.get(file_path)
+            if dataframe is not None:
+                return dataframe[list(columns)] if columns is not None else dataframe.copy(deep=False)
+            self._wait(file_path)
+            return load_dataframe(file_path, columns=columns)
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+    def get_dataframe_schema(self, file_path: str) -> pd.DataFrame:
+        """
+        Returns an empty dataframe with the columns and dtypes of a stored dataframe or of its file.
+        """
+        try:
+            dataframe = self._artifacts.get(file_path)
+            if dataframe is not None:
+                return dataframe.iloc[:0]
+            self._wait(file_path)
+            return load_dataframe_schema(file_path)
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+    def get_array(self, file_path: str) -> np.ndarray:
+        """
+        Returns a stored numpy array (read-only), or loads it from its file.
+        """
+        try:
+            array = self._artifacts.get(file_path)
+            if array is not None:
+                return array
+            self._wait(file_path)
+            return load_numpy_array_data(file_path)
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+    def get_object(self, file_path: str) -> object:
+        """
+        Returns a stored object, or loads it with load_object.
+        """
+        try:
+            obj = self._artifacts.get(file_path)
+            if obj is not None:
+                return obj
+            self._wait(file_path)
+            return load_object(file_path)
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+    def flush(self) -> None:
+        """
+        Waits until every artifact put so far is written; raises if any write failed.
+        """
+        with self._lock:
+            writes = dict(self._writes)
+        try:
+            for file_path, write in writes.items():
+                if write.exception() is not None:
+                    logger.error(f"Writing artifact {file_path} failed: {write.exception()}")
+            for write in writes.values():
+                write.result()
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+    def close(self) -> None:
+        """
+        Waits for the pending writes, logging failures, and releases the stored artifacts.
+        """
+        try:
+            self.flush()
+        except CustomException:
+            pass
+        finally:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+            with self._lock:
+                self._artifacts.clear()
+                self._writes.clear()
+
+
+# Reads and writes artifact files directly, for components run outside of a TrainPipeline
+DIRECT_ARTIFACT_STORE = ArtifactStore(ArtifactStoreConfig(keep_in_memory=False, async_writes=False))
@@ -0,0 +1,353 @@
+import os
+import sys
+from typing import List, Tuple
+
+import numpy as np
+import pandas as pd
+import sklearn
+from sklearn.compose import ColumnTransformer
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import FunctionTransformer, MinMaxScaler, StandardScaler
+
+from src.exception import CustomException
+from src.logger import logger
+
+_SIGN_BIT = np.uint64(1 << 63)
+
+
+def _to_ordered_key(x: np.ndarray) -> np.ndarray:
+    """Maps float64 values to uint64 keys with the same ordering."""
+    bits = x.view(np.uint64)
+    return np.where(bits & _SIGN_BIT, ~bits, bits | _SIGN_BIT)
+
+
+def _from_ordered_key(key: np.ndarray) -> np.ndarray:
+    bits = np.where(key & _SIGN_BIT, key ^ _SIGN_BIT, ~key)
+    return bits.view(np.float64)
+
+
+class CompiledForest:
+    """
+    A RandomForestClassifier flattened into packed node arrays and evaluated with NumPy.
+
+    All trees are stored back to back in `feature`, `threshold`, `left`, `right` and `value`;
+    `roots` holds the offset of every tree. Leaves point to themselves with an infinite threshold,
+    so every row can walk every tree level-synchronously for `max_depth` steps.
+
+    The StandardScaler/MinMaxScaler steps of the fitted ColumnTransformer are folded into the
+    thresholds: each threshold is replaced by the largest raw float64 value whose transformed,
+    float32-cast value still goes left in sklearn, so the forest is evaluated on raw input columns
+    and its decisions, probabilities and labels are identical to preprocessing + sklearn predict.
+    """
+
+    def __init__(self, feature_names: List[str], feature: np.ndarray, threshold: np.ndarray,
+                 left: np.ndarray, right: np.ndarray, value: np.ndarray, roots: np.ndarray,
+                 max_depth: int, classes: np.ndarray):
+        self.feature_names = list(feature_names)
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.value = value
+        self.roots = roots
+        self.max_depth = int(max_depth)
+        self.classes = classes
+
+    @property
+    def n_trees(self) -> int:
+        return len(self.roots)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(array.nbytes for array in self.arrays().values())
+
+    def arrays(self) -> dict:
+        """
+        Returns the packed arrays by name, as stored by save().
+        """
+        return {"feature": self.feature, "threshold": self.threshold, "left": self.left, "right": self.right,
+                "value": self.value, "roots": self.roots, "classes": self.classes}
+
+    @staticmethod
+    def _get_column_transformer(preprocessing_object) -> ColumnTransformer:
+        if isinstance(preprocessing_object, Pipeline):
+            steps = [step for _, step in preprocessing_object.steps if step not in (None, "passthrough")]
+            if len(steps) != 1:
+                raise ValueError("Only a single-step preprocessing pipeline can be folded into the forest")
+            preprocessing_object = steps[0]
+        if not isinstance(preprocessing_object, ColumnTransformer):
+            raise ValueError(f"Cannot fold {type(preprocessing_object).__name__} into the forest")
+        return preprocessing_object
+
+    @staticmethod
+    def _get_output_columns(column_transformer: ColumnTransformer) -> List[Tuple[int, object, int]]:
+        """
+        Lists, for every output column of the fitted ColumnTransformer, the index of the raw input
+        column it comes from, the fitted scaler applied to it (None for passthrough) and the index
+        of that column within the scaler.
+        """
+        input_names = list(column_transformer.feature_names_in_)
+        output_columns = []
+        for _, transformer, columns in column_transformer.transformers_:
+            if transformer == "drop":
+                continue
+            columns = [input_names[column] if isinstance(column, (int, np.integer)) else column
+                       for column in np.atleast_1d(columns)]
+            # Recent sklearn releases fit the passthrough remainder as an identity FunctionTransformer
+            if transformer == "passthrough" or (isinstance(transformer, FunctionTransformer) and transformer.func is None):
+                output_columns.extend((input_names.index(column), None, 0) for column in columns)
+            elif isinstance(transformer, (StandardScaler, MinMaxScaler)):
+                output_columns.extend((input_names.index(column), transformer, k) for k, column in enumerate(columns))
+            else:
+                raise ValueError(f"Cannot fold {type(transformer).__name__} into the forest")
+        return output_columns
+
+    @staticmethod
+    def _transform_column(x: np.ndarray, scaler, k: int) -> np.ndarray:
+        """
+        Applies the k-th column of a fitted scaler to raw float64 values with the same
+        floating point operations sklearn uses in transform().
+        """
+        if scaler is None:
+            return x
+        if isinstance(scaler, StandardScaler):
+            if scaler.with_mean:
+                x = x - scaler.mean_[k]
+            if scaler.with_std:
+                x = x / scaler.scale_[k]
+            return x
+        x = x * scaler.scale_[k]
+        x = x + scaler.min_[k]
+        if scaler.clip:
+            x = np.clip(x, scaler.feature_range[0], scaler.feature_range[1])
+        return x
+
+    @classmethod
+    def _fold_thresholds(cls, thresholds: np.ndarray, scaler, k: int) -> np.ndarray:
+        """
+        Finds, for every threshold t, the largest raw float64 x with float32(transform(x)) <= t.
+        The transform is monotonically non-decreasing, so a bisection over the ordered bit
+        patterns of float64 gives the exact boundary in 64 vectorized steps.
+        """
+        def goes_left(x):
+            return cls._transform_column(x, scaler, k).astype(np.float32) <= thresholds
+
+        with np.errstate(over="ignore", invalid="ignore"):
+            max_finite = np.finfo(np.float64).max
+            low = _to_ordered_key(np.full(thresholds.shape, -max_finite))
+            high = _to_ordered_key(np.full(thresholds.shape, max_finite))
+            always_left = goes_left(np.full(thresholds.shape, max_finite))
+            never_left = ~goes_left(np.full(thresholds.shape, -max_finite))
+
+            for _ in range(64):
+                mid = low + (high - low) // np.uint64(2)
+                left = goes_left(_from_ordered_key(mid))
+                low = np.where(left, mid, low)
+                high = np.where(left, high, mid)
+
+            folded = _from_ordered_key(low)
+        folded = np.where(always_left, np.inf, folded)
+        return np.where(never_left, -np.inf, folded)
+
+    @staticmethod
+    def _leaf_probabilities(tree, n_classes: int) -> np.ndarray:
+        value = tree.tree_.value[:, 0, :n_classes].astype(np.float64)
+        sklearn_version = tuple(int(part) for part in sklearn.__version__.split(".")[:2])
+        if sklearn_version < (1, 4):
+            # Older releases store weighted counts and normalize them in predict_proba
+            normalizer = value.sum(axis=1)[:, np.newaxis]
+            normalizer[normalizer == 0.0] = 1.0
+            value = value / normalizer
+        return value
+
+    @classmethod
+    def from_model(cls, preprocessing_object, trained_model_object) -> "CompiledForest":
+        """
+        Flattens a fitted RandomForestClassifier and folds the fitted preprocessing into it.
+        """
+        try:
+            if getattr(trained_model_object, "n_outputs_", 1) != 1:
+                raise ValueError("Only single-output forests can be compiled")
+            column_transformer = cls._get_column_transformer(preprocessing_object)
+            output_columns = cls._get_output_columns(column_transformer)
+            n_classes = len(trained_model_object.classes_)
+
+            features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+            max_depth, offset = 0, 0
+            for estimator in trained_model_object.estimators_:
+                tree = estimator.tree_
+                is_leaf = tree.children_left == -1
+                node_ids = np.arange(tree.node_count) + offset
+
+                feature = np.where(is_leaf, 0, tree.feature)
+                threshold = np.where(is_leaf, np.inf, tree.threshold)
+                raw_feature = np.empty_like(feature)
+                for output_index in np.unique(feature[~is_leaf]):
+                    raw_index, scaler, k = output_columns[output_index]
+                    nodes = ~is_leaf & (feature == output_index)
+                    raw_feature[nodes] = raw_index
+                    threshold[nodes] = cls._fold_thresholds(threshold[nodes], scaler, k)
+                raw_feature[is_leaf] = 0
+
+                features.append(raw_feature)
+                thresholds.append(threshold)
+                lefts.append(np.where(is_leaf, node_ids, tree.children_left + offset))
+                rights.append(np.where(is_leaf, node_ids, tree.children_right + offset))
+                values.append(cls._leaf_probabilities(estimator, n_classes))
+                roots.append(offset)
+                max_depth = max(max_depth, tree.max_depth)
+                offset += tree.node_count
+
+            compiled_forest = cls(feature_names=list(column_transformer.feature_names_in_),
+                                  feature=np.concatenate(features).astype(np.intp),
+                                  threshold=np.concatenate(thresholds).astype(np.float64),
+                                  left=np.concatenate(lefts).astype(np.intp),
+                                  right=np.concatenate(rights).astype(np.intp),
+                                  value=np.concatenate(values),
+                                  roots=np.array(roots, dtype=np.intp),
+                                  max_depth=max_depth,
+                                  classes=np.asarray(trained_model_object.classes_))
+            logger.info(f"Compiled forest of {compiled_forest.n_trees} trees, {offset} nodes, "
+                        f"{compiled_forest.nbytes} bytes")
+            return compiled_forest
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+    def to_array(self, dataframe: pd.DataFrame) -> np.ndarray:
+        """
+        Selects the raw input columns in training order as a float64 matrix.
+        """
+        return dataframe[self.feature_names].to_numpy(dtype=np.float64)
+
+    def _check_input(self, X: np.ndarray) -> np.ndarray:
+        X = np.ascontiguousarray(X, dtype=np.float64)
+        if X.ndim != 2 or X.shape[1] != len(self.feature_names):
+            raise ValueError(f"Expected input of shape (n, {len(self.feature_names)}), got {X.shape}")
+        if np.isnan(X).any():
+            raise ValueError("Input contains NaN")
+        return X
+
+    def apply(self, X: np.ndarray, start: int = 0, stop: int = None) -> np.ndarray:
+        """
+        Returns the global leaf index reached by every row in trees start..stop-1 (all trees by
+        default), shape (n_rows, n_trees).
+        """
+        X = self._check_input(X)
+        roots = self.roots[start:stop]
+        depth = self.max_depth if start == 0 and stop is None else int(self._tree_stats()[0][start:stop].max(initial=0))
+
+        flat_X = X.ravel()
+        row_offsets = (np.arange(X.shape[0]) * X.shape[1])[:, np.newaxis]
+        node = np.broadcast_to(roots, (X.shape[0], len(roots)))
+        for _ in range(depth):
+            go_left = flat_X[row_offsets + self.feature[node]] <= self.threshold[node]
+            node = np.where(go_left, self.left[node], self.right[node])
+        return node
+
+    def _tree_stats(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Returns, per tree, its depth and its swing: the largest difference between two class
+        probabilities at any of its leaves, i.e. how far one tree can move a vote margin.
+        """
+        if getattr(self, "_cached_tree_stats", None) is None:
+            is_leaf = self.left == np.arange(len(self.left))
+            node_depth = np.zeros(len(self.left), dtype=np.intp)
+            internal = np.flatnonzero(~is_leaf)
+            for _ in range(self.max_depth):
+                node_depth[self.left[internal]] = node_depth[internal] + 1
+                node_depth[self.right[internal]] = node_depth[internal] + 1
+            swing = np.where(is_leaf, self.value.max(axis=1) - self.value.min(axis=1), 0.0)
+            self._cached_tree_stats = (np.maximum.reduceat(node_depth, self.roots), np.maximum.reduceat(swing, self.roots))
+        return self._cached_tree_stats
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        """
+        Averages the leaf probabilities of all trees, accumulating them in tree order like sklearn.
+        """
+        leaf_values = self.value[self.apply(X)]
+        # cumsum adds strictly sequentially, reproducing sklearn's per-tree `out += proba`
+        proba = np.cumsum(leaf_values, axis=1)[:, -1]
+        proba /= self.n_trees
+        return proba
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        return self.classes.take(np.argmax(self.predict_proba(X), axis=1), axis=0)
+
+    def predict_early_exit(self, X: np.ndarray, chunk_size: int = 16) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Predicts labels identical to predict(), evaluating trees chunk by chunk and settling a row
+        as soon as its leading class is ahead of every other class by more than the largest
+        swing the remaining trees could produce.
+
+        Rows that are still undecided after the last chunk are scored with predict(), so ties and
+        near-ties are resolved with exactly the full forest's arithmetic.
+
+        :return: labels, and the number of trees evaluated for every row
+        """
+        X = self._check_input(X)
+        n_rows, n_classes = X.shape[0], self.value.shape[1]
+        swing = self._tree_stats()[1]
+        # remaining_swing[k]: the most trees k.. can move the margin between two classes
+        remaining_swing = np.append(np.cumsum(swing[::-1])[::-1], 0.0)
+        # Slack for the rounding difference between chunked sums and the sequential full-forest sum
+        tolerance = 1e-9 * self.n_trees
+
+        labels = np.empty(n_rows, dtype=self.classes.dtype)
+        trees_used = np.full(n_rows, self.n_trees, dtype=np.intp)
+        votes = np.zeros((n_rows, n_classes))
+        active = np.arange(n_rows)
+        for start in range(0, self.n_trees, chunk_size):
+            stop = min(start + chunk_size, self.n_trees)
+            votes[active] += self.value[self.apply(X[active], start, stop)].sum(axis=1)
+            if stop == self.n_trees or n_classes < 2:
+                break
+
+            active_votes = votes[active]
+            top_two = np.partition(active_votes, n_classes - 2, axis=1)[:, -2:]
+            decided = top_two[:, 1] - top_two[:, 0] > remaining_swing[stop] + tolerance
+            settled = active[decided]
+            labels[settled] = self.classes.take(np.argmax(active_votes[decided], axis=1), axis=0)
+            trees_used[settled] = stop
+            active = active[~decided]
+            if not active.size:
+                break
+
+        if active.size:
+            labels[active] = self.predict(X[active])
+        return labels, trees_used
+
+    @classmethod
+    def inverse_transform(cls, preprocessing_object, transformed: np.ndarray) -> pd.DataFrame:
+        """
+        Maps transformed feature rows back to (approximately) raw input columns, e.g. to verify
+        the compiled forest on the transformed test array.
+        """
+        column_transformer = cls._get_column_transformer(preprocessing_object)
+        raw = pd.DataFrame(index=range(len(transformed)), columns=column_transformer.feature_names_in_, dtype=np.float64)
+        for output_index, (raw_index, scaler, k) in enumerate(cls._get_output_columns(column_transformer)):
+            x = transformed[:, output_index].astype(np.float64)
+            if isinstance(scaler, StandardScaler):
+                x = x * (scaler.scale_[k] if scaler.with_std else 1.0) + (scaler.mean_[k] if scaler.with_mean else 0.0)
+            elif isinstance(scaler, MinMaxScaler):
+                x = (x - scaler.min_[k]) / scaler.scale_[k]
+            raw.iloc[:, raw_index] = x
+        return raw
+
+    def verify(self,preprocessing_object, trained_model_object, dataframe: pd.DataFrame) -> bool:
+        """
+        Checks that the compiled forest reproduces preprocessing + sklearn probabilities bit for bit.
+        """
+        expected = trained_model_object.predict_proba(preprocessing_object.transform(dataframe))
+        actual = self.predict_proba(self.to_array(dataframe))
+        return bool(np.array_equal(expected, actual))
+
+    def save(self, file_path: str) -> None:
+        os.makedirs(os.path.dirname(file_path) or ".", exist_ok=True)
+        np.savez(file_path, feature_names=np.array(self.feature_names), max_depth=self.max_depth, **self.arrays())
+
+    @classmethod
+    def load(cls, file_path: str) -> "CompiledForest":
+        with np.load(file_path, allow_pickle=False) as arrays:
+            return cls(feature_names=arrays["feature_names"].tolist(), max_depth=int(arrays["max_depth"]),
+                       **{name: arrays[name] for name in ("feature", "threshold", "left", "right",
+                                                          "value", "roots", "classes")})
@@ -13,6 +13,12 @@ class TrainingPipelineConfig:
 
 training_pipeline_config: TrainingPipelineConfig = TrainingPipelineConfig()
 
+@dataclass
+class ArtifactStoreConfig:
+    keep_in_memory: bool = ARTIFACT_STORE_IN_MEMORY
+    async_writes: bool = ARTIFACT_STORE_ASYNC_WRITES
+    max_write_workers: int = ARTIFACT_STORE_WRITE_WORKERS
+
 
 @dataclass
 class DataIngestionConfig:
@@ -22,6 +28,14 @@ class DataIngestionConfig:
     testing_file_path: str = os.path.join(data_ingestion_dir, DATA_INGESTION_INGESTED_DIR, TEST_FILE_NAME)
     train_test_split_ratio: float = DATA_INGESTION_TRAIN_TEST_SPLIT_RATIO
     collection_name:str = DATA_INGESTION_COLLECTION_NAME
+    export_batch_size: int = DATA_INGESTION_EXPORT_BATCH_SIZE
+    streaming_export: bool = DATA_INGESTION_STREAMING_EXPORT
+    export_partitions: int = DATA_INGESTION_EXPORT_PARTITIONS
+    incremental: bool = DATA_INGESTION_INCREMENTAL
+    force_full_refresh: bool = DATA_INGESTION_FULL_REFRESH
+    watermark_key: str = DATA_INGESTION_WATERMARK_KEY
+    snapshot_dir: str = DATA_INGESTION_SNAPSHOT_DIR
+    watermark_file_path: str = os.path.join(DATA_INGESTION_SNAPSHOT_DIR, DATA_INGESTION_WATERMARK_FILE_NAME)
 
 @dataclass
 class DataValidationConfig:
@@ -31,14 +45,16 @@ class DataValidationConfig:
 @dataclass
 class DataTransformationConfig:
     data_transformation_dir: str = os.path.join(training_pipeline_config.artifact_dir, DATA_TRANSFORMATION_DIR_NAME)
-    transformed_train_file_path: str = os.path.join(data_transformation_dir, DATA_TRANSFORMATION_TRANSFORMED_DATA_DIR, TRAIN_FILE_NAME.replace("csv", "npy"))
-    transformed_test_file_path: str = os.path.join(data_transformation_dir, DATA_TRANSFORMATION_TRANSFORMED_DATA_DIR, TEST_FILE_NAME.replace("csv", "npy"))
+    transformed_train_file_path: str = os.path.join(data_transformation_dir, DATA_TRANSFORMATION_TRANSFORMED_DATA_DIR, os.path.splitext(TRAIN_FILE_NAME)[0] + ".npy")
+    transformed_test_file_path: str = os.path.join(data_transformation_dir, DATA_TRANSFORMATION_TRANSFORMED_DATA_DIR, os.path.splitext(TEST_FILE_NAME)[0] + ".npy")
     transformed_object_file_path: str = os.path.join(data_transformation_dir, DATA_TRANSFORMATION_TRANSFORMED_OBJECT_DIR, PREPROCSSING_OBJECT_FILE_NAME)
 
 @dataclass
 class ModelTrainerConfig:
     model_trainer_dir: str = os.path.join(training_pipeline_config.artifact_dir, MODEL_TRAINER_DIR_NAME)
     trained_model_file_path: str = os.path.join(model_trainer_dir, MODEL_TRAINER_TRAINED_MODEL_DIR, MODEL_FILE_NAME)
+    compiled_model_file_path: str = os.path.join(model_trainer_dir, MODEL_TRAINER_TRAINED_MODEL_DIR, MODEL_TRAINER_COMPILED_MODEL_NAME)
+    mmap_model_artifact: bool = MODEL_TRAINER_MMAP_ARTIFACT
     expected_accuracy: float = MODEL_TRAINER_EXPECTED_SCORE
     model_config_file_path: str = MODEL_TRAINER_MODEL_CONFIG_FILE_PATH
     _n_estimators = MODEL_TRAINER_N_ESTIMATORS
@@ -48,6 +64,18 @@ class ModelTrainerConfig:
     _criterion = MIN_SAMPLES_SPLIT_CRITERION
     _random_state = MIN_SAMPLES_SPLIT_RANDOM_STATE
 
+@dataclass
+class ModelCompactionConfig:
+    model_compaction_dir: str = os.path.join(training_pipeline_config.artifact_dir, MODEL_COMPACTION_DIR_NAME)
+    compacted_model_file_path: str = os.path.join(model_compaction_dir, MODEL_COMPACTION_COMPACTED_MODEL_DIR, MODEL_FILE_NAME)
+    report_file_path: str = os.path.join(model_compaction_dir, MODEL_COMPACTION_REPORT_FILE_NAME)
+    enabled: bool = MODEL_COMPACTION_ENABLED
+    f1_tolerance: float = MODEL_COMPACTION_F1_TOLERANCE
+    min_trees: int = MODEL_COMPACTION_MIN_TREES
+    selection_fraction: float = MODEL_COMPACTION_SELECTION_FRACTION
+    _random_state = MODEL_COMPACTION_RANDOM_STATE
+    mmap_model_artifact: bool = MODEL_TRAINER_MMAP_ARTIFACT
+
 @dataclass
 class ModelEvaluationConfig:
     changed_threshold_score: float = MODEL_EVALUATION_CHANGED_THRESHOLD_SCORE
@@ -62,4 +90,26 @@ class ModelPusherConfig:
 @dataclass
 class VehiclePredictorConfig:
     model_file_path: str = MODEL_FILE_NAME
-    model_bucket_name: str = MODEL_BUCKET_NAME
\ No newline at end of file
+    model_bucket_name: str = MODEL_BUCKET_NAME
+    model_refresh_interval: int = MODEL_SERVING_REFRESH_INTERVAL_SECONDS
+
+@dataclass
+class ModelRegistryConfig:
+    model_bucket_name: str = MODEL_BUCKET_NAME
+    model_key_prefix: str = MODEL_SERVING_REGISTRY_KEY_PREFIX
+    memory_budget_bytes: int = MODEL_SERVING_REGISTRY_MEMORY_BUDGET_BYTES
+    allowed_model_keys: str = MODEL_SERVING_REGISTRY_ALLOWED_KEYS
+    model_refresh_interval: int = MODEL_SERVING_REFRESH_INTERVAL_SECONDS
+
+@dataclass
+class PredictionLogConfig:
+    sink: str = MODEL_SERVING_PREDICTION_LOG
+    database_name: str = DATABASE_NAME
+    collection_name: str = MODEL_SERVING_PREDICTION_LOG_COLLECTION
+    log_dir: str = MODEL_SERVING_PREDICTION_LOG_DIR
+    max_buffer_records: int = MODEL_SERVING_PREDICTION_LOG_MAX_BUFFER
+    batch_size: int = MODEL_SERVING_PREDICTION_LOG_BATCH_SIZE
+    flush_interval_seconds: float = MODEL_SERVING_PREDICTION_LOG_FLUSH_INTERVAL_SECONDS
+    max_retries: int = MODEL_SERVING_PREDICTION_LOG_MAX_RETRIES
+    rotate_bytes: int = MODEL_SERVING_PREDICTION_LOG_ROTATE_BYTES
+    rotate_seconds: float = MODEL_SERVING_PREDICTION_LOG_ROTATE_SECONDS
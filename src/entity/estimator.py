@@ -1,10 +1,45 @@
 import sys
+import time
+from dataclasses import dataclass
+from typing import Callable, List
+
+import numpy as np
 import pandas as pd
 
 from sklearn.pipeline import Pipeline
 
+from src.entity.compiled_forest import CompiledForest
 from src.exception import CustomException
 from src.logger import logger
+from src.utils.main_utils import DeferredObject
+
+
+def _ignore(value) -> None:
+    pass
+
+
+@dataclass
+class PredictionHooks:
+    """
+    Serving-side behaviour of MyModel prediction, installed with set_prediction_hooks.
+    The defaults evaluate every tree and record nothing, which is what training and evaluation use.
+    """
+    early_exit_chunk_size: int = 0  # 0 evaluates every tree
+    observe_transform_seconds: Callable[[float], None] = _ignore
+    observe_predict_seconds: Callable[[float], None] = _ignore
+    observe_trees_evaluated: Callable[[np.ndarray], None] = _ignore
+
+
+_prediction_hooks = PredictionHooks()
+
+
+def set_prediction_hooks(hooks: PredictionHooks) -> None:
+    """
+    Replaces the process-wide prediction hooks; called by the serving layer so src.entity never imports it.
+    """
+    global _prediction_hooks
+    _prediction_hooks = hooks
+
 
 class TargetValueMapping:
     def __init__(self):
@@ -19,13 +54,37 @@ class TargetValueMapping:
         return dict(zip(mapping_response.values(),mapping_response.keys()))
 
 class MyModel:
-    def __init__(self, preprocessing_object: Pipeline, trained_model_object: object):
+    def __init__(self, preprocessing_object: Pipeline, trained_model_object: object, compiled_model: CompiledForest = None):
         """
         :param preprocessing_object: Input Object of preprocesser
         :param trained_model_object: Input Object of trained model 
+        :param compiled_model: Optional compiled forest with the preprocessing folded in, used for prediction when present
         """
         self.preprocessing_object = preprocessing_object
         self.trained_model_object = trained_model_object
+        self.compiled_model = compiled_model
+
+    @property
+    def trained_model_object(self) -> object:
+        trained_model_object = self.__dict__["trained_model_object"]
+        if isinstance(trained_model_object, DeferredObject):
+            # Memory-mapped artifacts only unpickle the sklearn model once something needs it
+            trained_model_object = self.__dict__["trained_model_object"] = trained_model_object.load()
+        return trained_model_object
+
+    @trained_model_object.setter
+    def trained_model_object(self, trained_model_object: object) -> None:
+        self.__dict__["trained_model_object"] = trained_model_object
+
+    def __mmap_state__(self) -> dict:
+        """
+        State written by save_object(..., mmap_arrays=True). With a compiled forest the sklearn model
+        is not needed for prediction, so it is stored deferred and never loaded by serving workers.
+        """
+        state = dict(self.__dict__)
+        if getattr(self, "compiled_model", None) is not None and not isinstance(state["trained_model_object"], DeferredObject):
+            state["trained_model_object"] = DeferredObject.wrap(state["trained_model_object"])
+        return state
 
     def predict(self, dataframe: pd.DataFrame) -> pd.DataFrame:
         """
@@ -35,17 +94,98 @@ class MyModel:
         try:
             logger.info("Starting prediction process.")
 
-            transformed_feature = self.preprocessing_object.transform(dataframe)
+            # Models pickled before the compiled forest existed have no such attribute
+            compiled_model = getattr(self, "compiled_model", None)
+            started = time.perf_counter()
+            if compiled_model is not None:
+                logger.info("Using the compiled forest to get predictions")
+                array = compiled_model.to_array(dataframe)
+                transformed = time.perf_counter()
+                predictions = self._predict_compiled(compiled_model, array)
+            else:
+                transformed_feature = self.preprocessing_object.transform(dataframe)
+                transformed = time.perf_counter()
 
-            logger.info("Using the trained model to get predictions")
-            predictions = self.trained_model_object.predict(transformed_feature)
+                logger.info("Using the trained model to get predictions")
+                predictions = self.trained_model_object.predict(transformed_feature)
 
+            _prediction_hooks.observe_transform_seconds(transformed - started)
+            _prediction_hooks.observe_predict_seconds(time.perf_counter() - transformed)
             return predictions
 
         except Exception as e:
             logger.error("Error occurred in predict method")
             raise CustomException(e, sys)
 
+    def _predict_compiled(self, compiled_model: CompiledForest, array: np.ndarray) -> np.ndarray:
+        """
+        Predicts with the compiled forest, using early-exit voting when the prediction hooks set a chunk size.
+        Early exit returns the same labels as the full forest.
+        """
+        hooks = _prediction_hooks
+        if hooks.early_exit_chunk_size <= 0:
+            return compiled_model.predict(array)
+        predictions, trees_used = compiled_model.predict_early_exit(array, chunk_size=hooks.early_exit_chunk_size)
+        hooks.observe_trees_evaluated(trees_used)
+        return predictions
+
+    @property
+    def feature_names(self) -> List[str]:
+        """
+        Input columns of the model, in the order it was trained on.
+        """
+        compiled_model = getattr(self, "compiled_model", None)
+        if compiled_model is not None:
+            return compiled_model.feature_names
+        return list(self.preprocessing_object.feature_names_in_)
+
+    def predict_array(self, array: np.ndarray, feature_names: List[str]) -> np.ndarray:
+        """
+        Predicts on already encoded numeric rows whose columns are given by feature_names.
+        Uses the compiled forest directly when the column order matches, avoiding a DataFrame.
+        """
+        try:
+            compiled_model = getattr(self, "compiled_model", None)
+            if compiled_model is not None and list(feature_names) == compiled_model.feature_names:
+                started = time.perf_counter()
+                predictions = self._predict_compiled(compiled_model, array)
+                _prediction_hooks.observe_predict_seconds(time.perf_counter() - started)
+                return predictions
+            return self.predict(pd.DataFrame(array, columns=feature_names))
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    @property
+    def classes(self) -> np.ndarray:
+        """
+        Class labels, in the column order of predict_proba_array.
+        """
+        compiled_model = getattr(self, "compiled_model", None)
+        if compiled_model is not None:
+            return compiled_model.classes
+        return self.trained_model_object.classes_
+
+    def predict_proba_array(self, array: np.ndarray, feature_names: List[str]) -> np.ndarray:
+        """
+        Class probabilities of already encoded numeric rows, one column per entry of `classes`.
+        Always evaluates every tree, so early exit does not apply.
+        """
+        try:
+            started = time.perf_counter()
+            compiled_model = getattr(self, "compiled_model", None)
+            if compiled_model is not None and list(feature_names) == compiled_model.feature_names:
+                probabilities = compiled_model.predict_proba(array)
+            else:
+                dataframe = pd.DataFrame(array, columns=feature_names)
+                if compiled_model is not None:
+                    probabilities = compiled_model.predict_proba(compiled_model.to_array(dataframe))
+                else:
+                    probabilities = self.trained_model_object.predict_proba(self.preprocessing_object.transform(dataframe))
+            _prediction_hooks.observe_predict_seconds(time.perf_counter() - started)
+            return probabilities
+        except Exception as e:
+            raise CustomException(e, sys)
+
     def __repr__(self):
         return f"{type(self.trained_model_object).__name__}()"
 
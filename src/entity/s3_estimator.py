@@ -1,10 +1,20 @@
 
-from src.cloud_storage.aws_storage import SimpleStorageService
+from src.cloud_storage.local_storage import LocalStorageService
+from src.constants import MODEL_MMAP_CACHE_DIR, MODEL_STORE_DIR_ENV_KEY
 from src.exception import CustomException
 from src.entity.estimator import MyModel
+from src.utils.main_utils import get_mmap_arrays_dir, load_object
+import hashlib
+import os
+import re
+import shutil
 import sys
+import tempfile
 from pandas import DataFrame
 
+# S3 user metadata of the model file naming the key prefix of its .npy blobs
+ARRAYS_PREFIX_METADATA_KEY = "arrays-prefix"
+
 
 class Proj1Estimator:
     """
@@ -17,7 +27,14 @@ class Proj1Estimator:
         :param model_path: Location of your model in bucket
         """
         self.bucket_name = bucket_name
-        self.s3 = SimpleStorageService()
+        # A local directory can stand in for S3, e.g. for development and benchmarks
+        model_store_dir = os.getenv(MODEL_STORE_DIR_ENV_KEY)
+        if model_store_dir:
+            self.s3 = LocalStorageService(model_store_dir)
+        else:
+            # Imported here so boto3 is only loaded when S3 is actually used
+            from src.cloud_storage.aws_storage import SimpleStorageService
+            self.s3 = SimpleStorageService()
 
         self.model_path = model_path
         self.loaded_model: MyModel = None
@@ -30,15 +47,113 @@ class Proj1Estimator:
             return False
 
     def load_model(self,)->MyModel:
+        if not isinstance(self.s3, LocalStorageService):
+            metadata = self.s3.get_object_metadata(s3_key=self.model_path, bucket_name=self.bucket_name)
+            if metadata["metadata"].get(ARRAYS_PREFIX_METADATA_KEY):
+                return self.load_mmap_model(metadata)
         return self.s3.load_model(self.model_path,bucket_name=self.bucket_name)
 
+    def load_mmap_model(self, metadata: dict) -> MyModel:
+        """
+        Loads a model saved with save_object(..., mmap_arrays=True) from S3. The model file is
+        downloaded at the exact version described by metadata (from get_object_metadata), then the
+        .npy blobs under the prefix recorded in that version's metadata. Both are downloaded once per
+        model version into MODEL_MMAP_CACHE_DIR, so every worker on the host memory-maps the same
+        files and shares one page-cache copy.
+        """
+        try:
+            version = re.sub(r"[^A-Za-z0-9_.-]", "_", self._model_version(metadata))
+            model_dir = os.path.join(MODEL_MMAP_CACHE_DIR, self.bucket_name, version)
+            model_file = os.path.join(model_dir, os.path.basename(self.model_path))
+
+            if not os.path.exists(model_file):
+                os.makedirs(os.path.dirname(model_dir), exist_ok=True)
+                download_dir = tempfile.mkdtemp(dir=os.path.dirname(model_dir))
+                try:
+                    # Fails rather than pairing the blobs with a model file uploaded since the metadata was read
+                    self.s3.download_object(self.model_path, bucket_name=self.bucket_name,
+                                            to_filename=os.path.join(download_dir, os.path.basename(self.model_path)),
+                                            etag=metadata["etag"], version_id=metadata["version_id"])
+                    self.s3.download_folder(metadata["metadata"][ARRAYS_PREFIX_METADATA_KEY], bucket_name=self.bucket_name,
+                                            to_dir=os.path.join(download_dir, os.path.basename(get_mmap_arrays_dir(self.model_path))))
+                except Exception:
+                    shutil.rmtree(download_dir, ignore_errors=True)
+                    raise
+                try:
+                    os.rename(download_dir, model_dir)
+                except OSError:
+                    # Another worker finished the same download first
+                    shutil.rmtree(download_dir, ignore_errors=True)
+
+            return load_object(model_file)
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    @staticmethod
+    def _model_version(metadata: dict) -> str:
+        return f"{metadata['etag']}@{metadata['last_modified'].isoformat()}"
+
+    def get_model_version(self) -> str:
+        """
+        Returns an identifier of the model object currently stored in the bucket,
+        built from its ETag and LastModified timestamp.
+        """
+        try:
+            return self._model_version(self.s3.get_object_metadata(s3_key=self.model_path, bucket_name=self.bucket_name))
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    @staticmethod
+    def _arrays_digest(from_file: str, arrays_dir: str) -> str:
+        """
+        Content hash of a model file and its .npy blobs, naming the S3 prefix of the blobs.
+        """
+        digest = hashlib.sha256()
+        for file_path in [from_file] + [os.path.join(arrays_dir, name) for name in sorted(os.listdir(arrays_dir))]:
+            digest.update(os.path.basename(file_path).encode() + b"\0")
+            with open(file_path, "rb") as file_obj:
+                for chunk in iter(lambda: file_obj.read(1024 * 1024), b""):
+                    digest.update(chunk)
+        return digest.hexdigest()[:16]
+
     def save_model(self,from_file,remove:bool=False)->None:
         try:
+            arrays_dir = get_mmap_arrays_dir(from_file)
+            if not os.path.isdir(arrays_dir):
+                self.s3.upload_file(from_file,
+                                    to_filename=self.model_path,
+                                    bucket_name=self.bucket_name,
+                                    remove=remove
+                                    )
+                return
+
+            if isinstance(self.s3, LocalStorageService):
+                # The local store maps the files in place, in the layout save_object wrote them
+                for file_name in sorted(os.listdir(arrays_dir)):
+                    self.s3.upload_file(os.path.join(arrays_dir, file_name),
+                                        to_filename=get_mmap_arrays_dir(self.model_path) + "/" + file_name,
+                                        bucket_name=self.bucket_name, remove=remove)
+                self.s3.upload_file(from_file, to_filename=self.model_path, bucket_name=self.bucket_name, remove=remove)
+                return
+
+            # The blobs go first, under a prefix of their own, so no model file version ever
+            # references blobs of another version or missing ones
+            arrays_prefix = get_mmap_arrays_dir(self.model_path) + "/" + self._arrays_digest(from_file, arrays_dir)
+            for file_name in sorted(os.listdir(arrays_dir)):
+                self.s3.upload_file(os.path.join(arrays_dir, file_name),
+                                    to_filename=arrays_prefix + "/" + file_name,
+                                    bucket_name=self.bucket_name,
+                                    remove=remove
+                                    )
             self.s3.upload_file(from_file,
                                 to_filename=self.model_path,
                                 bucket_name=self.bucket_name,
-                                remove=remove
+                                remove=remove,
+                                metadata={ARRAYS_PREFIX_METADATA_KEY: arrays_prefix}
                                 )
+            # Blobs of the previous models, now that the new model file is live
+            self.s3.delete_folder(get_mmap_arrays_dir(self.model_path), bucket_name=self.bucket_name,
+                                  keep_prefix=arrays_prefix)
         except Exception as e:
             raise CustomException(e, sys)
 
@@ -1,6 +1,11 @@
 import sys
+from typing import Callable, List, Optional, Sequence, Tuple
+
+import numpy as np
 from src.entity.config_entity import VehiclePredictorConfig
-from src.entity.s3_estimator import Proj1Estimator
+from src.serving.model_cache import ModelCache, get_model_cache
+from src.serving.model_registry import UnknownModelError, get_model_registry
+from src.serving.prediction_cache import get_prediction_cache
 from src.exception import CustomException
 from src.logger import logger
 from pandas import DataFrame
@@ -83,15 +88,30 @@ class VehicleData:
             raise CustomException(e, sys) from e
 
 class VehicleDataClassifier:
-    def __init__(self, prediction_pipeline_config: VehiclePredictorConfig = VehiclePredictorConfig(),) -> None:
+    def __init__(self, prediction_pipeline_config: VehiclePredictorConfig = VehiclePredictorConfig(),
+                 model_key: Optional[str] = None) -> None:
         """
         :param prediction_pipeline_config: Configuration for prediction the value
+        :param model_key: Optional key of a model in the ModelRegistry to predict with instead of the production model
         """
         try:
             self.prediction_pipeline_config = prediction_pipeline_config
+            self.model_key = model_key
         except Exception as e:
             raise CustomException(e, sys)
 
+    def get_model_cache(self) -> ModelCache:
+        """
+        Returns the ModelCache of the registry model when a model key is set, else of the production model.
+        UnknownModelError is raised as is, so callers can tell a bad model key from a failed prediction.
+        """
+        if self.model_key is None:
+            return get_model_cache(self.prediction_pipeline_config)
+        return get_model_registry().get_model_cache(self.model_key)
+
+    def _cache_version(self, model_cache: ModelCache) -> str:
+        return str(model_cache.version) if self.model_key is None else f"{self.model_key}:{model_cache.version}"
+
     def predict(self, dataframe) -> str:
         """
         This is the method of VehicleDataClassifier
@@ -99,14 +119,77 @@ class VehicleDataClassifier:
         """
         try:
             logger.info("Entered predict method of VehicleDataClassifier class")
-            model = Proj1Estimator(
-                        bucket_name = self.prediction_pipeline_config.model_bucket_name,
-                        model_path = self.prediction_pipeline_config.model_file_path,
-                    )
-            
+            model = self.get_model_cache().get_model()
+
+            if get_prediction_cache() is not None and set(dataframe.columns) == set(model.feature_names):
+                feature_names = list(model.feature_names)
+                return self.predict_features(dataframe[feature_names].to_numpy(dtype=np.float64), feature_names)
+
             result =  model.predict(dataframe)
             logger.info("Prediction made!!")
             return result
         
+        except UnknownModelError:
+            raise
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def predict_features(self, features: np.ndarray, feature_names: List[str]) -> np.ndarray:
+        """
+        This is the method of VehicleDataClassifier for rows already encoded by FeatureEncoder
+        Returns: Predictions for every row of features
+        """
+        try:
+            model_cache = self.get_model_cache()
+            model = model_cache.get_model()
+            return np.asarray(self._score_cached(features, self._cache_version(model_cache),
+                                                 lambda rows: model.predict_array(rows, feature_names=feature_names)))
+        except UnknownModelError:
+            raise
         except Exception as e:
-            raise CustomException(e, sys)
\ No newline at end of file
+            raise CustomException(e, sys)
+
+    def predict_features_with_probability(self, features: np.ndarray,
+                                          feature_names: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        This is the method of VehicleDataClassifier for rows already encoded by FeatureEncoder
+        Returns: Predictions for every row of features, and the probability of the positive (last) class
+        """
+        try:
+            model_cache = self.get_model_cache()
+            model = model_cache.get_model()
+
+            def score(rows: np.ndarray) -> List[Tuple[object, float]]:
+                probabilities = model.predict_proba_array(rows, feature_names=feature_names)
+                labels = model.classes.take(np.argmax(probabilities, axis=1), axis=0)
+                return list(zip(labels.tolist(), probabilities[:, -1].tolist()))
+
+            # Probabilities are cached apart from the labels of predict_features
+            scored = self._score_cached(features, f"{self._cache_version(model_cache)}:probability", score)
+            labels, probabilities = zip(*scored) if scored else ((), ())
+            return np.asarray(labels), np.asarray(probabilities, dtype=np.float64)
+        except UnknownModelError:
+            raise
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    @staticmethod
+    def _score_cached(features: np.ndarray, cache_version: str, score: Callable[[np.ndarray], Sequence]) -> Sequence:
+        """
+        Returns score(features), looking rows up in the prediction cache when it is enabled and
+        scoring only the missing rows, in a single model call.
+        """
+        prediction_cache = get_prediction_cache()
+        if prediction_cache is None:
+            return score(features)
+
+        features = np.atleast_2d(features)
+        keys = [prediction_cache.make_key(row, cache_version) for row in features]
+        predictions = [prediction_cache.get(key) for key in keys]
+        missing = [i for i, prediction in enumerate(predictions) if prediction is None]
+        if missing:
+            computed = score(features[missing])
+            for i, prediction in zip(missing, computed):
+                prediction_cache.put(keys[i], prediction)
+                predictions[i] = prediction
+        return predictions
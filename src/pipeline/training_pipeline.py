@@ -1,4 +1,7 @@
 import sys
+import time
+from typing import Callable, Optional
+
 from src.exception import CustomException
 from src.logger import logger
 
@@ -6,13 +9,17 @@ from src.components.data_ingestion import DataIngestion
 from src.components.data_validation import DataValidation
 from src.components.data_transformation import DataTransformation
 from src.components.model_trainer import ModelTrainer
+from src.components.model_compaction import ModelCompaction
 from src.components.model_evaluation import ModelEvaluation
 from src.components.model_pusher import ModelPusher
 
-from src.entity.config_entity import (DataIngestionConfig,
+from src.entity.artifact_store import ArtifactStore, DIRECT_ARTIFACT_STORE
+from src.entity.config_entity import (ArtifactStoreConfig,
+                                          DataIngestionConfig,
                                           DataValidationConfig,
                                           DataTransformationConfig,
                                           ModelTrainerConfig,
+                                          ModelCompactionConfig,
                                           ModelEvaluationConfig,
                                           ModelPusherConfig)
                                           
@@ -20,17 +27,27 @@ from src.entity.artifact_entity import (DataIngestionArtifact,
                                             DataValidationArtifact,
                                             DataTransformationArtifact,
                                             ModelTrainerArtifact,
+                                            ModelCompactionArtifact,
                                             ModelEvaluationArtifact,
                                             ModelPusherArtifact)
 
 
 
 class TrainPipeline:
-    def __init__(self):
+    def __init__(self, stage_callback: Optional[Callable[[str, str, Optional[float]], None]] = None):
+        """
+        :param stage_callback: Optional callable notified with (stage name, status, duration in seconds)
+                               when a stage starts, completes or fails
+        """
+        self.stage_callback = stage_callback
+        self.artifact_store_config = ArtifactStoreConfig()
+        # Replaced by an in-memory store for the length of run_pipeline
+        self.artifact_store: ArtifactStore = DIRECT_ARTIFACT_STORE
         self.data_ingestion_config = DataIngestionConfig()
         self.data_validation_config = DataValidationConfig()
         self.data_transformation_config = DataTransformationConfig()
         self.model_trainer_config = ModelTrainerConfig()
+        self.model_compaction_config = ModelCompactionConfig()
         self.model_evaluation_config = ModelEvaluationConfig()
         self.model_pusher_config = ModelPusherConfig()
 
@@ -42,7 +59,8 @@ class TrainPipeline:
         try:
             logger.info("Entered the start_data_ingestion method of TrainPipeline class")
             logger.info("Getting the data from mongodb")
-            data_ingestion = DataIngestion(data_ingestion_config=self.data_ingestion_config)
+            data_ingestion = DataIngestion(data_ingestion_config=self.data_ingestion_config,
+                                           artifact_store=self.artifact_store)
             data_ingestion_artifact = data_ingestion.initiate_data_ingestion()
             logger.info("Got the train_set and test_set from mongodb")
             logger.info("Exited the start_data_ingestion method of TrainPipeline class")
@@ -58,7 +76,8 @@ class TrainPipeline:
 
         try:
             data_validation = DataValidation(data_ingestion_artifact=data_ingestion_artifact,
-                                             data_validation_config=self.data_validation_config
+                                             data_validation_config=self.data_validation_config,
+                                             artifact_store=self.artifact_store
                                              )
 
             data_validation_artifact = data_validation.initiate_data_validation()
@@ -78,7 +97,8 @@ class TrainPipeline:
         try:
             data_transformation = DataTransformation(data_ingestion_artifact=data_ingestion_artifact,
                                                      data_transformation_config=self.data_transformation_config,
-                                                     data_validation_artifact=data_validation_artifact)
+                                                     data_validation_artifact=data_validation_artifact,
+                                                     artifact_store=self.artifact_store)
             data_transformation_artifact = data_transformation.initiate_data_transformation()
             return data_transformation_artifact
         except Exception as e:
@@ -90,13 +110,36 @@ class TrainPipeline:
         """
         try:
             model_trainer = ModelTrainer(data_transformation_artifact=data_transformation_artifact,
-                                         model_trainer_config=self.model_trainer_config)
+                                         model_trainer_config=self.model_trainer_config,
+                                         artifact_store=self.artifact_store)
             
             model_trainer_artifact = model_trainer.initiate_model_trainer()
             return model_trainer_artifact
 
         except Exception as e:
             raise CustomException(e, sys)
+
+    def start_model_compaction(self, data_transformation_artifact: DataTransformationArtifact,
+                               model_trainer_artifact: ModelTrainerArtifact) -> ModelTrainerArtifact:
+        """
+        This method of TrainPipeline class is responsible for compacting the trained forest; it returns the
+        trainer artifact that evaluation should use, pointing at the compacted model when there is one
+        """
+        try:
+            if not self.model_compaction_config.enabled:
+                logger.info("Model compaction is disabled")
+                return model_trainer_artifact
+            model_compaction = ModelCompaction(data_transformation_artifact=data_transformation_artifact,
+                                               model_trainer_artifact=model_trainer_artifact,
+                                               model_compaction_config=self.model_compaction_config,
+                                               artifact_store=self.artifact_store)
+            model_compaction_artifact: ModelCompactionArtifact = model_compaction.initiate_model_compaction()
+            if not model_compaction_artifact.is_compacted:
+                return model_trainer_artifact
+            return ModelTrainerArtifact(trained_model_file_path=model_compaction_artifact.compacted_model_file_path,
+                                        metric_artifact=model_compaction_artifact.metric_artifact)
+        except Exception as e:
+            raise CustomException(e, sys)
         
 
     def start_model_evaluation(self, data_ingestion_artifact: DataIngestionArtifact,
@@ -107,7 +150,8 @@ class TrainPipeline:
         try:
             model_evaluation = ModelEvaluation(model_evaluation_config=self.model_evaluation_config,
                                                data_ingestion_artifact=data_ingestion_artifact,
-                                               model_trainer_artifact=model_trainer_artifact)
+                                               model_trainer_artifact=model_trainer_artifact,
+                                               artifact_store=self.artifact_store)
             model_evaluation_artifact = model_evaluation.initiate_model_evaluation()
             return model_evaluation_artifact
         except Exception as e:
@@ -126,24 +170,61 @@ class TrainPipeline:
         except Exception as e:
             raise CustomException(e, sys)
 
+    def run_stage(self, stage_name: str, stage_method: Callable, **kwargs):
+        """
+        This method of TrainPipeline class runs one stage and reports its status and duration to stage_callback
+        """
+        started = time.perf_counter()
+        self._report_stage(stage_name, "running", None)
+        try:
+            artifact = stage_method(**kwargs)
+        except Exception:
+            self._report_stage(stage_name, "failed", time.perf_counter() - started)
+            raise
+        self._report_stage(stage_name, "completed", time.perf_counter() - started)
+        return artifact
+
+    def _report_stage(self, stage_name: str, status: str, duration: Optional[float]) -> None:
+        if self.stage_callback is not None:
+            try:
+                self.stage_callback(stage_name, status, duration)
+            except Exception as e:
+                logger.error(f"Stage callback failed for {stage_name}: {e}")
+
     def run_pipeline(self, ) -> None:
             """
-            This method of TrainPipeline class is responsible for running complete pipeline
+            This method of TrainPipeline class is responsible for running complete pipeline. The stages hand
+            their data to each other in memory through a new artifact store, which writes the artifact files
             """
+            self.artifact_store = ArtifactStore(self.artifact_store_config)
             try:
-                data_ingestion_artifact = self.start_data_ingestion()
-                data_validation_artifact = self.start_data_validation(data_ingestion_artifact=data_ingestion_artifact)
-                data_transformation_artifact = self.start_data_transformation(data_ingestion_artifact=data_ingestion_artifact, 
-                                                                              data_validation_artifact=data_validation_artifact)
-
-                model_trainer_artifact = self.start_model_trainer(data_transformation_artifact=data_transformation_artifact)
-
-                model_evaluation_artifact = self.start_model_evaluation(data_ingestion_artifact=data_ingestion_artifact,
-                                                                        model_trainer_artifact=model_trainer_artifact)
+                data_ingestion_artifact = self.run_stage("data_ingestion", self.start_data_ingestion)
+                data_validation_artifact = self.run_stage("data_validation", self.start_data_validation,
+                                                          data_ingestion_artifact=data_ingestion_artifact)
+                data_transformation_artifact = self.run_stage("data_transformation", self.start_data_transformation,
+                                                              data_ingestion_artifact=data_ingestion_artifact, 
+                                                              data_validation_artifact=data_validation_artifact)
+
+                model_trainer_artifact = self.run_stage("model_trainer", self.start_model_trainer,
+                                                        data_transformation_artifact=data_transformation_artifact)
+                model_trainer_artifact = self.run_stage("model_compaction", self.start_model_compaction,
+                                                        data_transformation_artifact=data_transformation_artifact,
+                                                        model_trainer_artifact=model_trainer_artifact)
+
+                model_evaluation_artifact = self.run_stage("model_evaluation", self.start_model_evaluation,
+                                                           data_ingestion_artifact=data_ingestion_artifact,
+                                                           model_trainer_artifact=model_trainer_artifact)
+                # Every artifact of the run is on disk before the model is pushed
+                self.artifact_store.flush()
                 if not model_evaluation_artifact.is_model_accepted:
                     logger.info(f"Model not accepted.")
                     return None
-                model_pusher_artifact = self.start_model_pusher(model_evaluation_artifact=model_evaluation_artifact)
+                model_pusher_artifact = self.run_stage("model_pusher", self.start_model_pusher,
+                                                       model_evaluation_artifact=model_evaluation_artifact)
                 
             except Exception as e:
-                raise CustomException(e, sys)
\ No newline at end of file
+                raise CustomException(e, sys)
+            finally:
+                # Frees the run's data; the pending writes of a failed run are still completed
+                self.artifact_store.close()
+                self.artifact_store = DIRECT_ARTIFACT_STORE
\ No newline at end of file
@@ -0,0 +1,203 @@
+import asyncio
+import time
+from collections import deque
+from contextvars import ContextVar
+from typing import Deque, Dict, Optional
+
+from starlette.responses import JSONResponse
+
+from src.logger import logger
+from src.serving.metrics import REQUESTS_SHED, stage_timer
+
+# perf_counter() time by which the current request must be answered, set by AdmissionControlMiddleware
+request_deadline: ContextVar[Optional[float]] = ContextVar("request_deadline", default=None)
+
+
+def remaining_seconds() -> Optional[float]:
+    """
+    Returns the time left before the current request's deadline, or None when it has none.
+    """
+    deadline = request_deadline.get()
+    return None if deadline is None else deadline - time.perf_counter()
+
+
+class RequestShedError(Exception):
+    """
+    Raised when a request is rejected by admission control instead of being served late.
+    """
+
+    def __init__(self, message: str, reason: str):
+        super().__init__(message)
+        self.reason = reason
+
+
+class AdmissionLimiter:
+    """
+    Concurrency limit with a bounded FIFO wait queue for one group of routes.
+
+    Up to `max_concurrency` requests run at once; up to `max_queue` more wait for a slot, each for at
+    most `queue_timeout_seconds` or until its deadline. Everything beyond that is shed right away,
+    so an overloaded service answers quickly instead of letting every request's latency grow.
+    """
+
+    def __init__(self, name: str, max_concurrency: int, max_queue: int, queue_timeout_seconds: float,
+                 status_code: int = 503, retry_after_seconds: int = 1):
+        """
+        :param name: Route group name, used in counters and logs
+        :param max_concurrency: Requests of the group handled at the same time
+        :param max_queue: Requests allowed to wait for a slot
+        :param queue_timeout_seconds: Longest time a request waits for a slot
+        :param status_code: Status of shed requests, 503 or 429
+        :param retry_after_seconds: Retry-After sent with shed requests
+        """
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout_seconds = queue_timeout_seconds
+        self.status_code = status_code
+        self.retry_after_seconds = retry_after_seconds
+
+        self.in_flight = 0
+        self.admitted = 0
+        self.shed = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._wait_seconds = stage_timer(f"admission_wait_{name}")
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    def _shed(self, reason: str, message: str) -> RequestShedError:
+        self.shed += 1
+        REQUESTS_SHED.inc(1, self.name, reason)
+        return RequestShedError(message, reason)
+
+    async def acquire(self, deadline: Optional[float] = None) -> None:
+        """
+        Waits for a slot; raises RequestShedError when the queue is full or no slot frees up in time.
+        """
+        if self.in_flight < self.max_concurrency and not self._waiters:
+            self.in_flight += 1
+            self.admitted += 1
+            return
+        if self.queued >= self.max_queue:
+            raise self._shed("queue_full", f"Too many {self.name} requests; {self.max_queue} already waiting")
+
+        timeout = self.queue_timeout_seconds
+        if deadline is not None:
+            timeout = min(timeout, deadline - time.perf_counter())
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(waiter, timeout=max(timeout, 0))
+        except asyncio.TimeoutError:
+            self._abandon(waiter)
+            reason = "deadline" if deadline is not None and time.perf_counter() >= deadline else "queue_timeout"
+            raise self._shed(reason, f"No {self.name} slot became free within {timeout:.3f}s") from None
+        except asyncio.CancelledError:
+            # The client went away while waiting
+            self._abandon(waiter)
+            raise
+        self._wait_seconds.observe(time.perf_counter() - started)
+        self.admitted += 1
+
+    def _abandon(self, waiter: asyncio.Future) -> None:
+        if waiter.done() and not waiter.cancelled():
+            # The slot was handed over just as the wait ended; pass it on
+            self.release()
+        else:
+            try:
+                self._waiters.remove(waiter)
+            except ValueError:
+                pass
+
+    def release(self) -> None:
+        """
+        Frees a slot, handing it straight to the oldest waiting request if there is one.
+        """
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.in_flight -= 1
+
+    def stats(self) -> dict:
+        return {"max_concurrency": self.max_concurrency, "max_queue": self.max_queue,
+                "in_flight": self.in_flight, "queued": self.queued, "admitted": self.admitted, "shed": self.shed}
+
+
+def route_group(method: str, path: str) -> Optional[str]:
+    """
+    Maps a request to its admission group; health, readiness, metrics and stats routes have none
+    so probes keep working under overload.
+    """
+    if path.startswith("/static/") or (path == "/" and method == "GET"):
+        return "static"
+    if path == "/train" or path.startswith("/train/"):
+        return "train"
+    if (path == "/" and method == "POST") or path == "/predict/batch" or \
+            (path.startswith("/v1/") and path.endswith("/predict")):
+        return "predict"
+    return None
+
+
+class AdmissionControlMiddleware:
+    """
+    ASGI middleware applying an AdmissionLimiter per route group and a deadline per request.
+
+    The deadline comes from the X-Request-Deadline-Ms header (a budget in milliseconds) or the
+    group's default, limits how long the request may queue for a slot and is published through
+    `request_deadline`, so the inference executor does not start work whose answer would be too late.
+    A slot is held until the response, streamed ones included, has been sent.
+    """
+
+    def __init__(self, app, limiters: Dict[str, AdmissionLimiter], default_deadline_seconds: Dict[str, float],
+                 deadline_header: str):
+        """
+        :param app: ASGI application
+        :param limiters: AdmissionLimiter of each route group
+        :param default_deadline_seconds: Deadline of each route group when the request sets none; 0 for none
+        :param deadline_header: Header carrying a per-request deadline in milliseconds
+        """
+        self.app = app
+        self.limiters = limiters
+        self.default_deadline_seconds = default_deadline_seconds
+        self.deadline_header = deadline_header.lower().encode("latin-1")
+
+    def _deadline(self, scope, group: str) -> Optional[float]:
+        budget = self.default_deadline_seconds.get(group, 0)
+        for name, value in scope.get("headers", ()):
+            if name == self.deadline_header:
+                try:
+                    budget = float(value) / 1000
+                except ValueError:
+                    pass
+                break
+        return time.perf_counter() + budget if budget > 0 else None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        group = route_group(scope["method"], scope["path"])
+        limiter = self.limiters.get(group)
+        if limiter is None:
+            return await self.app(scope, receive, send)
+
+        deadline = self._deadline(scope, group)
+        try:
+            await limiter.acquire(deadline)
+        except RequestShedError as e:
+            logger.debug(f"Shed {scope['method']} {scope['path']}: {e}")
+            response = JSONResponse({"status": False, "error": f"{e}", "reason": e.reason},
+                                    status_code=limiter.status_code,
+                                    headers={"Retry-After": str(limiter.retry_after_seconds)})
+            return await response(scope, receive, send)
+
+        token = request_deadline.set(deadline)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            request_deadline.reset(token)
+            limiter.release()
@@ -0,0 +1,243 @@
+import io
+import json
+import sys
+import time
+from typing import Any, AsyncIterator, Callable, List, Mapping, Optional
+
+import numpy as np
+import pandas as pd
+from starlette.concurrency import run_in_threadpool
+
+from src.exception import CustomException
+from src.logger import logger
+from src.serving.feature_encoder import FeatureEncodingError, get_feature_encoder
+from src.serving.model_cache import get_model_cache
+from src.serving.model_registry import UnknownModelError, get_model_registry
+
+
+class BatchPredictionError(ValueError):
+    """
+    Raised when a batch payload cannot be parsed into prediction rows or a row fails validation.
+    """
+
+
+class BatchPredictor:
+    """
+    Scores CSV or JSON payloads of VehicleData rows chunk by chunk.
+
+    The request body is consumed incrementally; every `chunk_size` rows are turned into one
+    DataFrame, converted to a float64 matrix, validated in one pass by FeatureEncoder.validate_many
+    (same types and ranges as /predict) and scored with a single vectorized MyModel.predict_array
+    call, so memory stays bounded by the chunk size rather than the payload size.
+
+    A failure in the first chunk is raised before the response starts (a 400 for invalid rows).
+    Once predictions have been streamed, a failing chunk ends the body with an error record instead:
+    for JSON output the last element of the array is `{"error": "<message>"}`, for CSV output the
+    last line is `error: <message>`. Predictions before the error record are valid, one per input row.
+    """
+
+    def __init__(self, chunk_size: int, model_key: Optional[str] = None,
+                 prediction_logger: Optional[Callable[[np.ndarray, np.ndarray, float], None]] = None):
+        """
+        :param chunk_size: Number of rows scored per MyModel.predict call
+        :param model_key: Optional key of a ModelRegistry model to score with instead of the production model
+        :param prediction_logger: Optional callback receiving the features, predictions and seconds of every scored chunk
+        """
+        self.chunk_size = chunk_size
+        self.model_key = model_key
+        self.prediction_logger = prediction_logger
+        self.encoder = get_feature_encoder()
+        self.columns: List[str] = self.encoder.columns
+
+    def _to_frame(self, frame: pd.DataFrame) -> pd.DataFrame:
+        missing_columns = [column for column in self.columns if column not in frame.columns]
+        if missing_columns:
+            raise BatchPredictionError(f"Missing columns in batch payload: {missing_columns}")
+        return frame[self.columns]
+
+    async def iter_csv_frames(self, byte_chunks: AsyncIterator[bytes]) -> AsyncIterator[pd.DataFrame]:
+        """
+        Splits a streamed CSV body (with header row) into DataFrames of at most chunk_size rows.
+        """
+        header = None
+        pending = b""
+        lines: List[bytes] = []
+
+        async for chunk in byte_chunks:
+            pending += chunk
+            *complete, pending = pending.split(b"\n")
+            for line in complete:
+                if not line.strip():
+                    continue
+                if header is None:
+                    header = line
+                    continue
+                lines.append(line)
+                if len(lines) >= self.chunk_size:
+                    yield self._parse_csv_lines(header, lines)
+                    lines = []
+
+        if pending.strip():
+            if header is None:
+                header = pending
+            else:
+                lines.append(pending)
+        if header is None:
+            raise BatchPredictionError("CSV payload is empty")
+        if lines:
+            yield self._parse_csv_lines(header, lines)
+
+    def _parse_csv_lines(self, header: bytes, lines: List[bytes]) -> pd.DataFrame:
+        buffer = io.BytesIO(b"\n".join([header, *lines]))
+        return self._to_frame(pd.read_csv(buffer, skipinitialspace=True))
+
+    async def iter_json_frames(self, byte_chunks: AsyncIterator[bytes]) -> AsyncIterator[pd.DataFrame]:
+        """
+        Splits a streamed JSON array of objects (or newline-delimited JSON objects) into
+        DataFrames of at most chunk_size rows without materializing the whole document.
+        """
+        decoder = json.JSONDecoder()
+        text = ""
+        position = 0
+        finished = False
+        records: List[dict] = []
+        decode_tail = b""
+
+        async for chunk in byte_chunks:
+            # Keep incomplete multi-byte UTF-8 sequences for the next chunk
+            data = decode_tail + chunk
+            try:
+                text = text[position:] + data.decode("utf-8")
+                decode_tail = b""
+            except UnicodeDecodeError as e:
+                text = text[position:] + data[:e.start].decode("utf-8")
+                decode_tail = data[e.start:]
+            position = 0
+
+            while not finished:
+                while position < len(text) and text[position] in " \t\r\n,[":
+                    position += 1
+                if position >= len(text):
+                    break
+                if text[position] == "]":
+                    finished = True
+                    break
+                try:
+                    record, end = decoder.raw_decode(text, position)
+                except json.JSONDecodeError:
+                    # The object is split across chunks; wait for more data
+                    break
+                if not isinstance(record, dict):
+                    raise BatchPredictionError("JSON payload must contain objects of VehicleData fields")
+                records.append(record)
+                position = end
+                if len(records) >= self.chunk_size:
+                    yield self._to_frame(pd.DataFrame.from_records(records))
+                    records = []
+
+        if not finished and text[position:].strip():
+            raise BatchPredictionError("JSON payload is truncated or malformed")
+        if records:
+            yield self._to_frame(pd.DataFrame.from_records(records))
+
+    def _encode(self, frame: pd.DataFrame, first_row: int) -> np.ndarray:
+        features = np.empty((len(frame), len(self.columns)), dtype=self.encoder.dtype)
+        for index, name in enumerate(self.columns):
+            column = pd.to_numeric(frame[name], errors="coerce")
+            features[:, index] = column.to_numpy(dtype=np.float64, na_value=np.nan)
+        try:
+            return self.encoder.validate_many(features, first_row)
+        except FeatureEncodingError as e:
+            raise BatchPredictionError(self._describe_invalid_row(frame, first_row) or f"{e}") from None
+
+    def _describe_invalid_row(self, frame: pd.DataFrame, first_row: int) -> Optional[str]:
+        """
+        Encodes the rows of a chunk that failed validation one by one, to name the first invalid
+        value as it was sent (missing, not a number, out of range).
+        """
+        # Blank CSV cells and JSON nulls are read as NaN; report them as missing values
+        records: List[Mapping[str, Any]] = frame.astype(object).where(frame.notna(), None).to_dict("records")
+        row = np.empty((1, len(self.columns)), dtype=self.encoder.dtype)
+        for index, record in enumerate(records):
+            try:
+                self.encoder.encode(record, out=row)
+            except FeatureEncodingError as e:
+                return f"Row {first_row + index}: {e}"
+        return None
+
+    async def predict_frames(self, frames: AsyncIterator[pd.DataFrame]) -> AsyncIterator[List[int]]:
+        """
+        Validates and encodes every frame, then runs one vectorized MyModel.predict_array per frame
+        off the event loop and yields the labels. Invalid rows raise BatchPredictionError with their
+        0-based row number in the payload.
+        """
+        if self.model_key is None:
+            model = get_model_cache().get_model()
+        else:
+            model = await run_in_threadpool(get_model_registry().get_model, self.model_key)
+        rows = 0
+        async for frame in frames:
+            features = await run_in_threadpool(self._encode, frame, rows)
+            started = time.perf_counter()
+            predictions = await run_in_threadpool(model.predict_array, features, self.columns)
+            if self.prediction_logger is not None:
+                self.prediction_logger(features, predictions, time.perf_counter() - started)
+            rows += len(frame)
+            yield [int(value) for value in predictions]
+
+    async def stream(self, byte_chunks: AsyncIterator[bytes], content_type: str) -> AsyncIterator[bytes]:
+        """
+        Yields the serialized predictions of the payload, in the same format as the input:
+        a CSV with a `prediction` column for CSV input and a JSON array otherwise.
+
+        The first chunk is parsed and scored before the first byte is yielded, so malformed
+        payloads surface as an error before the response has started.
+        """
+        is_csv = "csv" in content_type
+        frames = self.iter_csv_frames(byte_chunks) if is_csv else self.iter_json_frames(byte_chunks)
+        labels = self.predict_frames(frames)
+
+        try:
+            first = await labels.__anext__()
+        except StopAsyncIteration:
+            first = []
+        except (BatchPredictionError, UnknownModelError):
+            raise
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+        return self._serialize(first, labels, is_csv)
+
+    async def _serialize(self, first: List[int], labels: AsyncIterator[List[int]], is_csv: bool) -> AsyncIterator[bytes]:
+        total = len(first)
+        if is_csv:
+            yield b"prediction\n"
+            if first:
+                yield ("\n".join(map(str, first)) + "\n").encode()
+        else:
+            yield b"[" + ",".join(map(str, first)).encode()
+        separator = b"," if first else b""
+        try:
+            async for chunk in labels:
+                total += len(chunk)
+                if is_csv:
+                    yield ("\n".join(map(str, chunk)) + "\n").encode()
+                else:
+                    yield separator + ",".join(map(str, chunk)).encode()
+                    separator = b","
+        except Exception as e:
+            # The status line is already sent: report the error in the body, without internal details
+            if isinstance(e, BatchPredictionError):
+                message = f"{e}"
+            else:
+                logger.error(f"Batch prediction failed after {total} rows: {e}")
+                message = f"Batch prediction failed after {total} rows"
+            if is_csv:
+                yield f"error: {message}\n".encode()
+            else:
+                yield separator + json.dumps({"error": message}).encode() + b"]"
+            logger.info(f"Batch prediction streamed {total} rows before an error")
+            return
+        if not is_csv:
+            yield b"]"
+        logger.info(f"Batch prediction streamed {total} rows")
@@ -0,0 +1,198 @@
+import io
+import sys
+import time
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+
+from src.exception import CustomException
+from src.serving.feature_encoder import FeatureEncodingError, get_feature_encoder
+from src.serving.model_cache import get_model_cache
+from src.serving.model_registry import UnknownModelError, get_model_registry
+
+ARROW_STREAM_CONTENT_TYPE = "application/vnd.apache.arrow.stream"
+ARROW_FILE_CONTENT_TYPE = "application/vnd.apache.arrow.file"
+NPY_CONTENT_TYPE = "application/x-npy"
+COLUMNAR_CONTENT_TYPES = (ARROW_STREAM_CONTENT_TYPE, ARROW_FILE_CONTENT_TYPE, NPY_CONTENT_TYPE)
+
+
+class ColumnarFormatError(ValueError):
+    """
+    Raised when a columnar payload cannot be decoded into prediction rows or a row fails validation.
+    """
+
+
+def _import_pyarrow():
+    try:
+        import pyarrow as pa
+    except ImportError:
+        raise ColumnarFormatError(f"Arrow payloads need pyarrow on the server; send {NPY_CONTENT_TYPE} instead") from None
+    return pa
+
+
+def columnar_content_type(content_type: str) -> Optional[str]:
+    """
+    Returns the columnar format of a request content type, or None for other payloads.
+    """
+    media_type = content_type.split(";", 1)[0].strip().lower()
+    return media_type if media_type in COLUMNAR_CONTENT_TYPES else None
+
+
+class ColumnarPredictor:
+    """
+    Scores Arrow IPC record batches, or a NumPy .npy array, and answers in the same format.
+
+    The request bytes are wrapped without copying: Arrow columns of primitive types and .npy data
+    are NumPy views over the body. The only copy is the gather of the columns into the row-major
+    float64 matrix the compiled forest reads, and it is skipped altogether for a C-ordered float64
+    .npy matrix. Rows are scored `chunk_size` at a time to bound the size of the per-tree
+    intermediate arrays.
+
+    Arrow batches must have columns named like the VehicleData fields (any order, no nulls, extra
+    columns ignored); the response has one `prediction` column per input batch. A .npy payload is
+    either a structured array with those field names or a 2-d (n, n_columns) array in the
+    `prediction_columns` order of config/schema.yaml; the response is a 1-d int64 array.
+    Every value must be finite and within the types and ranges of the schema, as for /predict.
+    """
+
+    def __init__(self, chunk_size: int, model_key: Optional[str] = None,
+                 prediction_logger: Optional[Callable[[np.ndarray, np.ndarray, float], None]] = None):
+        """
+        :param chunk_size: Number of rows scored per MyModel.predict_array call
+        :param model_key: Optional key of a ModelRegistry model to score with instead of the production model
+        :param prediction_logger: Optional callback receiving the features, predictions and seconds of every scored chunk
+        """
+        self.chunk_size = chunk_size
+        self.model_key = model_key
+        self.prediction_logger = prediction_logger
+        self.encoder = get_feature_encoder()
+        self.columns: List[str] = self.encoder.columns
+
+    def _gather(self, n_rows: int, get_column) -> np.ndarray:
+        features = np.empty((n_rows, len(self.columns)), dtype=np.float64)
+        for index, name in enumerate(self.columns):
+            try:
+                features[:, index] = get_column(name)
+            except (TypeError, ValueError):
+                raise ColumnarFormatError(f"Column {name} is not numeric") from None
+        return features
+
+    def _validate(self, features: np.ndarray, first_row: int = 0) -> np.ndarray:
+        try:
+            return self.encoder.validate_many(features, first_row)
+        except FeatureEncodingError as e:
+            raise ColumnarFormatError(f"{e}") from None
+
+    def decode_arrow(self, body: bytes, file_format: bool) -> List[np.ndarray]:
+        """
+        Returns the feature matrix of every record batch of an Arrow IPC stream or file.
+        """
+        pa = _import_pyarrow()
+        try:
+            buffer = pa.py_buffer(body)
+            if file_format:
+                reader = pa.ipc.open_file(buffer)
+                batches = [reader.get_batch(index) for index in range(reader.num_record_batches)]
+            else:
+                batches = list(pa.ipc.open_stream(buffer))
+        except pa.ArrowInvalid as e:
+            raise ColumnarFormatError(f"Invalid Arrow IPC payload: {e}") from None
+
+        matrices, first_row = [], 0
+        for batch in batches:
+            missing_columns = [name for name in self.columns if batch.schema.get_field_index(name) < 0]
+            if missing_columns:
+                raise ColumnarFormatError(f"Missing columns in Arrow payload: {missing_columns}")
+
+            def get_column(name: str) -> np.ndarray:
+                column = batch.column(name)
+                if column.null_count:
+                    raise ColumnarFormatError(f"Column {name} contains nulls")
+                return column.to_numpy(zero_copy_only=False)
+
+            matrices.append(self._validate(self._gather(batch.num_rows, get_column), first_row))
+            first_row += batch.num_rows
+        return matrices
+
+    def decode_npy(self, body: bytes) -> np.ndarray:
+        """
+        Returns the feature matrix of a .npy payload, as a view of the body when it already is one.
+        """
+        file = io.BytesIO(body)
+        try:
+            version = np.lib.format.read_magic(file)
+            if version == (1, 0):
+                shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(file)
+            elif version == (2, 0):
+                shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(file)
+            else:
+                raise ValueError(f"unsupported .npy format version {version}")
+        except ValueError as e:
+            raise ColumnarFormatError(f"Invalid .npy payload: {e}") from None
+        if dtype.hasobject:
+            raise ColumnarFormatError(".npy payloads with Python objects are not accepted")
+
+        count = int(np.prod(shape))
+        if len(body) - file.tell() < count * dtype.itemsize:
+            raise ColumnarFormatError(".npy payload is truncated")
+        array = np.frombuffer(body, dtype=dtype, count=count, offset=file.tell())
+        array = array.reshape(shape, order="F" if fortran_order else "C")
+
+        if dtype.names:
+            missing_columns = [name for name in self.columns if name not in dtype.names]
+            if missing_columns:
+                raise ColumnarFormatError(f"Missing fields in .npy payload: {missing_columns}")
+            return self._validate(self._gather(len(array), lambda name: array[name]))
+        if array.ndim != 2 or array.shape[1] != len(self.columns):
+            raise ColumnarFormatError(f"Expected a structured array or an (n, {len(self.columns)}) array "
+                                      f"in the order {self.columns}, got shape {array.shape}")
+        try:
+            features = np.ascontiguousarray(array, dtype=np.float64)
+        except (TypeError, ValueError):
+            raise ColumnarFormatError(f".npy payload of dtype {dtype} is not numeric") from None
+        return self._validate(features)
+
+    def _predict(self, model, features: np.ndarray) -> np.ndarray:
+        predictions = np.empty(len(features), dtype=np.int64)
+        for start in range(0, len(features), self.chunk_size):
+            stop = start + self.chunk_size
+            started = time.perf_counter()
+            predictions[start:stop] = model.predict_array(features[start:stop], feature_names=self.columns)
+            if self.prediction_logger is not None:
+                self.prediction_logger(features[start:stop], predictions[start:stop], time.perf_counter() - started)
+        return predictions
+
+    def _get_model(self):
+        if self.model_key is None:
+            return get_model_cache().get_model()
+        return get_model_registry().get_model(self.model_key)
+
+    def predict(self, body: bytes, content_type: str) -> Tuple[bytes, str]:
+        """
+        Decodes the payload, scores it and returns the encoded predictions with their content type.
+        Blocking; run it off the event loop.
+        """
+        media_type = columnar_content_type(content_type)
+        try:
+            if media_type == NPY_CONTENT_TYPE:
+                features = self.decode_npy(body)
+                model = self._get_model()
+                output = io.BytesIO()
+                np.lib.format.write_array(output, self._predict(model, features), allow_pickle=False)
+                return output.getvalue(), media_type
+
+            pa = _import_pyarrow()
+            file_format = media_type == ARROW_FILE_CONTENT_TYPE
+            matrices = self.decode_arrow(body, file_format)
+            model = self._get_model()
+            schema = pa.schema([("prediction", pa.int64())])
+            sink = pa.BufferOutputStream()
+            with (pa.ipc.new_file if file_format else pa.ipc.new_stream)(sink, schema) as writer:
+                for features in matrices:
+                    writer.write_batch(pa.record_batch([pa.array(self._predict(model, features))], schema=schema))
+            return sink.getvalue().to_pybytes(), media_type
+
+        except (ColumnarFormatError, UnknownModelError):
+            raise
+        except Exception as e:
+            raise CustomException(e, sys) from e
@@ -0,0 +1,124 @@
+import math
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+import numpy as np
+
+from src.constants import SCHEMA_FILE_PATH
+from src.utils.main_utils import read_yaml_file
+
+
+class FeatureEncodingError(ValueError):
+    """
+    Raised when an online prediction input is missing, not a number or out of range.
+    """
+
+
+class FeatureEncoder:
+    """
+    Parses raw request values (form fields, JSON values) straight into a NumPy feature row.
+
+    Column order, types and accepted ranges come from `prediction_columns` and
+    `prediction_column_ranges` in config/schema.yaml, so no DataFrame is built on the request path.
+    """
+
+    def __init__(self, schema_config: Optional[dict] = None, dtype: type = np.float64):
+        """
+        :param schema_config: Parsed schema.yaml; read from SCHEMA_FILE_PATH when omitted
+        :param dtype: dtype of the encoded rows
+        """
+        schema_config = schema_config if schema_config is not None else read_yaml_file(SCHEMA_FILE_PATH)
+        ranges: Dict[str, List[float]] = schema_config.get("prediction_column_ranges", {})
+
+        self.dtype = dtype
+        self.columns: List[str] = []
+        self._fields: List[Tuple[str, bool, float, float]] = []
+        for column in schema_config["prediction_columns"]:
+            (name, column_type), = column.items()
+            low, high = ranges.get(name, (-math.inf, math.inf))
+            self.columns.append(name)
+            self._fields.append((name, column_type == "int", float(low), float(high)))
+
+    def _parse(self, name: str, value: Any, is_int: bool, low: float, high: float) -> float:
+        if value is None or (isinstance(value, str) and not value.strip()):
+            raise FeatureEncodingError(f"Missing value for {name}")
+        if isinstance(value, bool):
+            value = int(value)
+        try:
+            number = float(value)
+        except (TypeError, ValueError):
+            raise FeatureEncodingError(f"Invalid value {value!r} for {name}: expected a number") from None
+        if not math.isfinite(number):
+            raise FeatureEncodingError(f"Invalid value {value!r} for {name}: expected a finite number")
+        if is_int and not number.is_integer():
+            raise FeatureEncodingError(f"Invalid value {value!r} for {name}: expected an integer")
+        if not low <= number <= high:
+            raise FeatureEncodingError(f"Value {value!r} for {name} is outside [{low:g}, {high:g}]")
+        return number
+
+    def encode(self, values: Mapping[str, Any], out: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Encodes one record into a row of shape (1, n_columns).
+
+        :param values: Mapping of column name to raw value, e.g. a form or a parsed JSON object
+        :param out: Optional preallocated row (or 1-d slice of a batch) to write into
+        """
+        row = np.empty((1, len(self._fields)), dtype=self.dtype) if out is None else out
+        flat_row = row.reshape(-1)
+        for index, (name, is_int, low, high) in enumerate(self._fields):
+            flat_row[index] = self._parse(name, values.get(name), is_int, low, high)
+        return row
+
+    def dummy_rows(self, n_rows: int) -> np.ndarray:
+        """
+        Returns n_rows valid rows (every column at its lower bound, or 0 when unbounded), e.g. to warm up a model.
+        """
+        row = [low if math.isfinite(low) else min(0.0, high) for _, _, low, high in self._fields]
+        return np.tile(np.array(row, dtype=self.dtype), (n_rows, 1))
+
+    def validate_many(self, matrix: np.ndarray, first_row: int = 0) -> np.ndarray:
+        """
+        Checks already numeric rows of shape (n_rows, n_columns), in `columns` order, against the
+        types and ranges of the schema, as encode does for raw values; returns the matrix unchanged.
+
+        :param first_row: Row number of matrix[0] in the payload, for the error message
+        """
+        for index, (name, is_int, low, high) in enumerate(self._fields):
+            column = matrix[:, index]
+            with np.errstate(invalid="ignore"):
+                invalid = ~np.isfinite(column) | (column < low) | (column > high)
+                if is_int:
+                    invalid |= np.mod(column, 1) != 0
+            if invalid.any():
+                row = int(np.argmax(invalid))
+                value = float(column[row])
+                if not math.isfinite(value):
+                    raise FeatureEncodingError(f"Row {first_row + row}: Invalid value {value!r} for {name}: "
+                                               f"expected a finite number")
+                if not low <= value <= high:
+                    raise FeatureEncodingError(f"Row {first_row + row}: Value {value!r} for {name} "
+                                               f"is outside [{low:g}, {high:g}]")
+                raise FeatureEncodingError(f"Row {first_row + row}: Invalid value {value!r} for {name}: "
+                                           f"expected an integer")
+        return matrix
+
+    def encode_many(self, records: List[Mapping[str, Any]]) -> np.ndarray:
+        """
+        Encodes several records into a matrix of shape (n_records, n_columns).
+        """
+        matrix = np.empty((len(records), len(self._fields)), dtype=self.dtype)
+        for index, record in enumerate(records):
+            self.encode(record, out=matrix[index])
+        return matrix
+
+
+_feature_encoder: Optional[FeatureEncoder] = None
+
+
+def get_feature_encoder() -> FeatureEncoder:
+    """
+    Returns the shared encoder built from config/schema.yaml.
+    """
+    global _feature_encoder
+    if _feature_encoder is None:
+        _feature_encoder = FeatureEncoder()
+    return _feature_encoder
@@ -0,0 +1,138 @@
+import asyncio
+import multiprocessing
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+
+from src.logger import logger
+from src.serving.admission import remaining_seconds
+
+
+class InferenceQueueFullError(Exception):
+    """
+    Raised when the inference queue is at capacity and the request should be failed fast.
+    """
+
+
+class InferenceTimeoutError(Exception):
+    """
+    Raised when a prediction does not complete within the per-request timeout.
+    """
+
+
+def predict_features(features: np.ndarray, feature_names: List[str], model_key: Optional[str] = None) -> np.ndarray:
+    """
+    Scores encoded feature rows with the process-wide model, or the registry model of model_key.
+    Module level so process pool workers can unpickle it; each worker loads and caches its own copy of the model.
+    """
+    from src.pipeline.prediction_pipeline import VehicleDataClassifier
+    return VehicleDataClassifier(model_key=model_key).predict_features(features, feature_names=feature_names)
+
+
+def predict_features_with_probability(features: np.ndarray, feature_names: List[str],
+                                      model_key: Optional[str] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Like predict_features, also returning the probability of the positive class for every row.
+    """
+    from src.pipeline.prediction_pipeline import VehicleDataClassifier
+    return VehicleDataClassifier(model_key=model_key).predict_features_with_probability(features, feature_names=feature_names)
+
+
+def _warm_up_worker() -> None:
+    from src.serving.model_cache import get_model_cache
+    get_model_cache().get_model()
+
+
+class InferenceExecutor:
+    """
+    Runs CPU-bound predictions off the event loop on a bounded thread or process pool.
+
+    At most `max_workers + max_queue_size` predictions are admitted at a time; beyond that, run()
+    fails fast with InferenceQueueFullError instead of queueing without limit. Each admitted
+    prediction gets `timeout_seconds` to complete before InferenceTimeoutError is raised. The
+    "inline" kind runs predictions directly on the event loop, as before, for comparison.
+    """
+
+    def __init__(self, kind: str, max_workers: int, max_queue_size: int, timeout_seconds: float):
+        """
+        :param kind: "thread", "process" or "inline"
+        :param max_workers: Number of pool workers
+        :param max_queue_size: Number of admitted predictions allowed to wait for a worker
+        :param timeout_seconds: Per-request time limit, including queueing
+        """
+        if kind not in ("thread", "process", "inline"):
+            raise ValueError(f"Unknown inference executor kind: {kind}")
+        self.kind = kind
+        self.max_workers = max_workers
+        self.max_queue_size = max_queue_size
+        self.timeout_seconds = timeout_seconds
+        self.capacity = max_workers + max_queue_size
+
+        self.pending = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self._lock = threading.Lock()
+        self._executor: Optional[Executor] = None
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.kind == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers,
+                                                     mp_context=multiprocessing.get_context("spawn"),
+                                                     initializer=_warm_up_worker)
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="inference")
+            logger.info(f"Started {self.kind} inference pool with {self.max_workers} workers")
+        return self._executor
+
+    def _release(self, _future=None) -> None:
+        with self._lock:
+            self.pending -= 1
+
+    async def run(self, fn: Callable, *args):
+        """
+        Runs fn(*args) on the pool and returns its result, within the per-request timeout or what is
+        left of the request's admission-control deadline, whichever is shorter.
+        """
+        timeout = self.timeout_seconds
+        remaining = remaining_seconds()
+        if remaining is not None:
+            if remaining <= 0:
+                self.timed_out += 1
+                raise InferenceTimeoutError("Request deadline passed before the prediction started")
+            timeout = min(timeout, remaining)
+
+        if self.kind == "inline":
+            return fn(*args)
+
+        with self._lock:
+            if self.pending >= self.capacity:
+                self.rejected += 1
+                raise InferenceQueueFullError(f"Inference queue is full ({self.capacity} predictions pending)")
+            self.pending += 1
+
+        try:
+            future = self._get_executor().submit(fn, *args)
+        except Exception:
+            self._release()
+            raise
+        # The slot is only freed once the work has actually finished, even after a timeout
+        future.add_done_callback(self._release)
+
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), timeout=timeout)
+        except asyncio.TimeoutError:
+            self.timed_out += 1
+            future.cancel()
+            raise InferenceTimeoutError(f"Prediction did not complete within {timeout:.3f}s") from None
+
+    def stats(self) -> dict:
+        return {"kind": self.kind, "workers": self.max_workers, "capacity": self.capacity,
+                "pending": self.pending, "rejected": self.rejected, "timed_out": self.timed_out}
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
@@ -0,0 +1,243 @@
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from typing import Callable, Deque, Dict, Iterable, List, Tuple
+
+# Latency buckets in seconds, from 10µs (encoding a row) to 10s (loading a model)
+LATENCY_BUCKETS: Tuple[float, ...] = (1e-5, 2.5e-5, 5e-5, 1e-4, 2.5e-4, 5e-4, 1e-3, 2.5e-3, 5e-3,
+                                      0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"') for value in labels.values())
+    return "{" + ",".join(f'{name}="{value}"' for name, value in zip(labels, escaped)) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _HistogramChild:
+    """
+    Histogram of one label combination.
+
+    observe() only appends the value to a deque (atomic under the GIL, no lock); values are
+    bucketed when the endpoint is scraped, or once `max_pending` of them have piled up.
+    """
+
+    def __init__(self, buckets: Tuple[float, ...], max_pending: int = 65536):
+        self.buckets = buckets
+        self.max_pending = max_pending
+        self._pending: Deque[float] = deque()
+        self._append = self._pending.append
+        self._counts = [0] * (len(buckets) + 1)
+        self._sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        self._append(value)
+        if len(self._pending) >= self.max_pending:
+            self._drain()
+
+    def observe_many(self, values: Iterable[float]) -> None:
+        self._pending.extend(values)
+        if len(self._pending) >= self.max_pending:
+            self._drain()
+
+    def time(self) -> "_Timer":
+        return _Timer(self)
+
+    def _drain(self) -> None:
+        with self._lock:
+            popleft, buckets, counts = self._pending.popleft, self.buckets, self._counts
+            while True:
+                try:
+                    value = popleft()
+                except IndexError:
+                    return
+                counts[bisect_left(buckets, value)] += 1
+                self._sum += value
+
+    def snapshot(self) -> Tuple[List[int], float]:
+        self._drain()
+        with self._lock:
+            return list(self._counts), self._sum
+
+
+class _Timer:
+    __slots__ = ("histogram", "started")
+
+    def __init__(self, histogram: _HistogramChild):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.histogram.observe(time.perf_counter() - self.started)
+
+
+class Histogram:
+    def __init__(self, name: str, documentation: str, label_names: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = label_names
+        self.buckets = tuple(sorted(buckets))
+        self._children: Dict[Tuple[str, ...], _HistogramChild] = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *label_values: str) -> _HistogramChild:
+        """
+        Returns the histogram of the given label values; keep the result around on hot paths.
+        """
+        child = self._children.get(label_values)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(label_values, _HistogramChild(self.buckets))
+        return child
+
+    def observe(self, value: float) -> None:
+        self.labels().observe(value)
+
+    def collect(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} histogram"
+        for label_values, child in list(self._children.items()):
+            labels = dict(zip(self.label_names, label_values))
+            counts, total = child.snapshot()
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                yield f"{self.name}_bucket{_format_labels({**labels, 'le': _format_value(bound)})} {cumulative}"
+            yield f"{self.name}_sum{_format_labels(labels)} {_format_value(total)}"
+            yield f"{self.name}_count{_format_labels(labels)} {cumulative}"
+
+
+class Gauge:
+    """
+    Counter or gauge keyed by label values; also used for counters via kind="counter".
+    """
+
+    def __init__(self, name: str, documentation: str, label_names: Tuple[str, ...] = (), kind: str = "gauge"):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = label_names
+        self.kind = kind
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, *label_values: str) -> None:
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def dec(self, amount: float = 1, *label_values: str) -> None:
+        self.inc(-amount, *label_values)
+
+    def set(self, value: float, *label_values: str) -> None:
+        with self._lock:
+            self._values[label_values] = value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+    def collect(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} {self.kind}"
+        with self._lock:
+            values = list(self._values.items())
+        for label_values, value in values:
+            yield f"{self.name}{_format_labels(dict(zip(self.label_names, label_values)))} {_format_value(value)}"
+
+
+class CallbackMetric:
+    """
+    Metric whose samples are read from another component (e.g. its stats()) at scrape time.
+    """
+
+    def __init__(self, name: str, documentation: str, kind: str,
+                 callback: Callable[[], Iterable[Tuple[Dict[str, str], float]]]):
+        self.name = name
+        self.documentation = documentation
+        self.kind = kind
+        self.callback = callback
+
+    def collect(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} {self.kind}"
+        for labels, value in self.callback():
+            if value is not None:
+                yield f"{self.name}{_format_labels(labels)} {_format_value(value)}"
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            self._metrics[metric.name] = metric
+        return metric
+
+    def histogram(self, name: str, documentation: str, label_names: Tuple[str, ...] = (),
+                  buckets: Tuple[float, ...] = LATENCY_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, label_names, buckets))
+
+    def gauge(self, name: str, documentation: str, label_names: Tuple[str, ...] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, label_names))
+
+    def counter(self, name: str, documentation: str, label_names: Tuple[str, ...] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, label_names, kind="counter"))
+
+    def callback(self, name: str, documentation: str, kind: str,
+                 callback: Callable[[], Iterable[Tuple[Dict[str, str], float]]]) -> CallbackMetric:
+        return self.register(CallbackMetric(name, documentation, kind, callback))
+
+    def render(self) -> str:
+        """
+        Returns all metrics in the Prometheus text exposition format.
+        """
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines: List[str] = []
+        for metric in metrics:
+            try:
+                lines.extend(metric.collect())
+            except Exception as e:
+                lines.append(f"# {metric.name} could not be collected: {e}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+STAGE_SECONDS = REGISTRY.histogram("vehicle_prediction_stage_seconds",
+                                   "Time spent in each stage of serving a prediction.", ("stage",))
+REQUESTS_IN_FLIGHT = REGISTRY.gauge("vehicle_requests_in_flight",
+                                    "Prediction requests currently being handled.", ("handler",))
+MODEL_LOADS = REGISTRY.counter("vehicle_model_loads_total", "Model loads by outcome.", ("outcome",))
+MODEL_LOAD_SECONDS = REGISTRY.histogram("vehicle_model_load_seconds", "Time taken to load a model.")
+FOREST_TREES_EVALUATED = REGISTRY.histogram("vehicle_forest_trees_evaluated",
+                                            "Trees evaluated per row by early-exit forest voting.",
+                                            buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024))
+REQUESTS_SHED = REGISTRY.counter("vehicle_requests_shed_total", "Requests rejected by admission control.",
+                                 ("route_group", "reason"))
+PREDICTION_LOG_RECORDS = REGISTRY.counter("vehicle_prediction_log_records_total",
+                                          "Prediction log records by outcome.", ("outcome",))
+MODEL_INFO = REGISTRY.gauge("vehicle_model_info", "Version of the active model.", ("version",))
+
+
+def stage_timer(stage: str) -> _HistogramChild:
+    """
+    Returns the histogram of a serving stage, to call .observe(seconds) or use .time() on.
+    """
+    return STAGE_SECONDS.labels(stage)
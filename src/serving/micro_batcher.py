@@ -0,0 +1,169 @@
+import asyncio
+import contextvars
+import time
+from collections import deque
+from dataclasses import dataclass, asdict
+from typing import Deque, List, Optional, Tuple
+
+import numpy as np
+from starlette.concurrency import run_in_threadpool
+
+from src.logger import logger
+from src.pipeline.prediction_pipeline import VehicleDataClassifier
+from src.serving.inference_executor import InferenceExecutor, predict_features
+
+
+@dataclass
+class FlushRecord:
+    batch_size: int
+    trigger: str            # "size" when the batch filled up, "timeout" when max_wait elapsed
+    queue_wait_ms: float    # time the oldest row of the batch spent waiting
+    predict_ms: float       # duration of the single MyModel.predict call
+    timestamp: float
+
+
+class MicroBatcher:
+    """
+    Coalesces concurrent single-row predictions into one MyModel.predict call.
+
+    Requests put their encoded feature row on a queue and await a future. A single collector task
+    takes the first waiting row, keeps collecting until either `max_batch_size` rows are queued or
+    `max_wait_ms` has elapsed, scores the batch in one vectorized call and resolves every future
+    with its own row. Each flush is recorded so the window can be tuned against tail latency.
+
+    With an InferenceExecutor the flush is one submission to its bounded pool, so batched requests
+    share its queue limit and timeout: when the pool is full, every row of the batch fails with
+    InferenceQueueFullError. Without one, batches are scored on the Starlette thread pool.
+    """
+
+    def __init__(self, feature_names: List[str], max_batch_size: int, max_wait_ms: float, history_size: int = 1024,
+                 executor: Optional[InferenceExecutor] = None):
+        """
+        :param feature_names: Column order of the queued feature rows
+        :param max_batch_size: Flush as soon as this many rows are queued
+        :param max_wait_ms: Flush at the latest this long after the first row of a batch arrived
+        :param history_size: Number of most recent flushes kept for stats()
+        :param executor: Optional inference executor the batches are scored on
+        """
+        self.feature_names = feature_names
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.executor = executor
+        self.flushes: Deque[FlushRecord] = deque(maxlen=history_size)
+        self.total_flushes = 0
+        self.total_rows = 0
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._collector: Optional[asyncio.Task] = None
+
+    async def predict(self, features: np.ndarray):
+        """
+        Queues a single feature row and returns its prediction once its batch has been scored.
+        """
+        self._ensure_started()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((features, future, time.perf_counter()))
+        return await future
+
+    def _ensure_started(self) -> None:
+        if self._collector is None or self._collector.done():
+            self._queue = asyncio.Queue()
+            # A fresh context: the collector serves many requests and must not inherit the admission
+            # deadline of the request that happened to start it
+            self._collector = asyncio.create_task(self._collect(), context=contextvars.Context())
+
+    async def stop(self) -> None:
+        if self._collector is not None:
+            self._collector.cancel()
+            try:
+                await self._collector
+            except asyncio.CancelledError:
+                pass
+            self._collector = None
+
+    async def _collect(self) -> None:
+        while True:
+            batch = [await self._queue.get()]
+            deadline = batch[0][2] + self.max_wait
+            trigger = "timeout"
+
+            while len(batch) < self.max_batch_size:
+                # Rows that are already queued join the batch even when the deadline has passed
+                if not self._queue.empty():
+                    batch.append(self._queue.get_nowait())
+                    continue
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout=remaining))
+                except asyncio.TimeoutError:
+                    break
+            else:
+                trigger = "size"
+
+            await self._flush(batch, trigger)
+
+    async def _flush(self, batch: List[Tuple[np.ndarray, asyncio.Future, float]], trigger: str) -> None:
+        # Requests whose client went away are not scored
+        batch = [item for item in batch if not item[1].done()]
+        if not batch:
+            return
+
+        started = time.perf_counter()
+        queue_wait = started - min(enqueued for _, _, enqueued in batch)
+        try:
+            features = np.vstack([row for row, _, _ in batch])
+            if self.executor is not None:
+                predictions = await self.executor.run(predict_features, features, self.feature_names)
+            else:
+                predictions = await run_in_threadpool(VehicleDataClassifier().predict_features, features,
+                                                      self.feature_names)
+        except Exception as e:
+            logger.error(f"Micro-batch of {len(batch)} rows failed: {e}")
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        predict_time = time.perf_counter() - started
+        for (_, future, _), prediction in zip(batch, predictions):
+            if not future.done():
+                future.set_result(prediction)
+
+        self.total_flushes += 1
+        self.total_rows += len(batch)
+        self.flushes.append(FlushRecord(batch_size=len(batch),
+                                        trigger=trigger,
+                                        queue_wait_ms=queue_wait * 1000,
+                                        predict_ms=predict_time * 1000,
+                                        timestamp=time.time()))
+
+    def stats(self) -> dict:
+        """
+        Summarizes the recent flushes: batch size distribution, flush triggers and
+        queue-wait / predict latency percentiles in milliseconds.
+        """
+        records = list(self.flushes)
+        summary = {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000,
+            "total_flushes": self.total_flushes,
+            "total_rows": self.total_rows,
+            "recent_flushes": len(records),
+        }
+        if not records:
+            return summary
+
+        batch_sizes = np.array([record.batch_size for record in records])
+        queue_waits = np.array([record.queue_wait_ms for record in records])
+        predict_times = np.array([record.predict_ms for record in records])
+        summary.update({
+            "mean_batch_size": float(batch_sizes.mean()),
+            "size_triggered": sum(record.trigger == "size" for record in records),
+            "timeout_triggered": sum(record.trigger == "timeout" for record in records),
+            "queue_wait_ms": {f"p{q}": float(np.percentile(queue_waits, q)) for q in (50, 95, 99)},
+            "predict_ms": {f"p{q}": float(np.percentile(predict_times, q)) for q in (50, 95, 99)},
+            "last_flush": asdict(records[-1]),
+        })
+        return summary
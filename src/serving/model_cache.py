@@ -0,0 +1,165 @@
+import sys
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from src.constants import MODEL_SERVING_EARLY_EXIT_CHUNK_SIZE
+from src.entity.config_entity import VehiclePredictorConfig
+from src.entity.estimator import MyModel, PredictionHooks, set_prediction_hooks
+from src.entity.s3_estimator import Proj1Estimator
+from src.exception import CustomException
+from src.logger import logger
+from src.serving.metrics import FOREST_TREES_EVALUATED, MODEL_INFO, MODEL_LOAD_SECONDS, MODEL_LOADS, stage_timer
+
+# Every served model, in the app and in inference worker processes, is loaded through this module
+set_prediction_hooks(PredictionHooks(
+    early_exit_chunk_size=MODEL_SERVING_EARLY_EXIT_CHUNK_SIZE,
+    observe_transform_seconds=stage_timer("transform").observe,
+    observe_predict_seconds=stage_timer("predict").observe,
+    observe_trees_evaluated=lambda trees_used: FOREST_TREES_EVALUATED.labels().observe_many(trees_used.tolist()),
+))
+
+
+class ModelCache:
+    """
+    Process-wide holder of the production model.
+
+    The model is loaded from S3 once and then revalidated in a background thread every
+    `model_refresh_interval` seconds using the object's ETag/LastModified. When the stored
+    object changes, the new MyModel is loaded off the request path and swapped in atomically,
+    so predictions only ever pay for MyModel.predict.
+    """
+
+    def __init__(self, prediction_pipeline_config: VehiclePredictorConfig = VehiclePredictorConfig(),
+                 report_model_info: bool = True) -> None:
+        """
+        :param prediction_pipeline_config: Configuration of the model to serve
+        :param report_model_info: Whether swaps update the vehicle_model_info metric; off for registry models
+        """
+        self.prediction_pipeline_config = prediction_pipeline_config
+        self.report_model_info = report_model_info
+        self.estimator = Proj1Estimator(bucket_name=prediction_pipeline_config.model_bucket_name,
+                                        model_path=prediction_pipeline_config.model_file_path)
+
+        # (model, version) is replaced as a single tuple so readers never see a mismatched pair
+        self._state: Tuple[Optional[MyModel], Optional[str]] = (None, None)
+        self._load_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._refresher: Optional[threading.Thread] = None
+        self._swap_listeners: List[Callable[[Optional[str], str], None]] = []
+
+    @property
+    def version(self) -> Optional[str]:
+        return self._state[1]
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._state[0] is not None
+
+    def add_swap_listener(self, listener: Callable[[Optional[str], str], None]) -> None:
+        """
+        Registers a callable notified with (old version, new version) after a new model is swapped in.
+        """
+        self._swap_listeners.append(listener)
+
+    def get_model(self) -> MyModel:
+        """
+        Returns the currently active model, loading it on first use.
+        """
+        model = self._state[0]
+        if model is None:
+            with self._load_lock:
+                if self._state[0] is None:
+                    self.refresh(force=True)
+            model = self._state[0]
+            self.start()
+        return model
+
+    def refresh(self, force: bool = False) -> bool:
+        """
+        Compares the version of the stored model with the active one and reloads it when they differ.
+
+        :param force: reload even when the version is unchanged
+        :return: True if a new model was swapped in
+        """
+        try:
+            version = self.estimator.get_model_version()
+            if not force and version == self.version:
+                return False
+
+            logger.info(f"Loading model version {version} from bucket {self.estimator.bucket_name}")
+            started = time.perf_counter()
+            try:
+                model = self.estimator.load_model()
+            except Exception:
+                MODEL_LOADS.inc(1, "failure")
+                raise
+            MODEL_LOAD_SECONDS.observe(time.perf_counter() - started)
+            MODEL_LOADS.inc(1, "success")
+
+            old_version = self.version
+            self._state = (model, version)
+            if self.report_model_info:
+                MODEL_INFO.clear()
+                MODEL_INFO.set(1, version)
+            logger.info(f"Swapped in model version {version}")
+            for listener in self._swap_listeners:
+                try:
+                    listener(old_version, version)
+                except Exception as e:
+                    logger.error(f"Model swap listener failed: {e}")
+            return True
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def start(self) -> None:
+        """
+        Starts the background revalidation thread if it is enabled and not already running.
+        """
+        if self.prediction_pipeline_config.model_refresh_interval <= 0:
+            return
+        with self._load_lock:
+            if self._refresher is not None and self._refresher.is_alive():
+                return
+            self._stop_event.clear()
+            self._refresher = threading.Thread(target=self._refresh_loop, name="model-cache-refresher", daemon=True)
+            self._refresher.start()
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        if self._refresher is not None:
+            self._refresher.join(timeout=5)
+            self._refresher = None
+
+    def _refresh_loop(self) -> None:
+        while not self._stop_event.wait(self.prediction_pipeline_config.model_refresh_interval):
+            try:
+                self.refresh()
+            except Exception as e:
+                # Keep serving the current model; the next interval will retry
+                logger.error(f"Model revalidation failed: {e}")
+
+
+_model_caches: Dict[Tuple[str, str], ModelCache] = {}
+_model_caches_lock = threading.Lock()
+
+
+def get_model_cache(prediction_pipeline_config: VehiclePredictorConfig = VehiclePredictorConfig()) -> ModelCache:
+    """
+    Returns the shared ModelCache for the bucket/model path of the given configuration.
+    """
+    key = (prediction_pipeline_config.model_bucket_name, prediction_pipeline_config.model_file_path)
+    with _model_caches_lock:
+        if key not in _model_caches:
+            _model_caches[key] = ModelCache(prediction_pipeline_config)
+        return _model_caches[key]
+
+
+def stop_model_caches() -> None:
+    """
+    Stops the revalidation threads of every ModelCache created in this process.
+    """
+    with _model_caches_lock:
+        model_caches = list(_model_caches.values())
+    for model_cache in model_caches:
+        model_cache.stop()
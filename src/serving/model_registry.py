@@ -0,0 +1,239 @@
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from src.constants import MODEL_FILE_NAME
+from src.entity.config_entity import ModelRegistryConfig, VehiclePredictorConfig
+from src.entity.estimator import MyModel
+from src.logger import logger
+from src.serving.model_cache import ModelCache
+from src.utils.main_utils import DeferredObject
+
+_MODEL_KEY_PATTERN = re.compile(r"^[A-Za-z0-9][A-Za-z0-9_.-]{0,127}$")
+
+
+class UnknownModelError(LookupError):
+    """
+    Raised when a requested model key is invalid, not allowed or has no model in the bucket.
+    """
+
+
+def estimate_model_bytes(model: MyModel) -> int:
+    """
+    Approximate memory held by a MyModel: the compiled forest arrays plus the sklearn trees' node
+    and value arrays, or the pickled bytes when the sklearn model is still deferred.
+    """
+    total = 0
+    compiled_model = getattr(model, "compiled_model", None)
+    if compiled_model is not None:
+        total += compiled_model.nbytes
+    trained_model_object = model.__dict__.get("trained_model_object")
+    if isinstance(trained_model_object, DeferredObject):
+        return total + trained_model_object.payload.nbytes
+    for estimator in getattr(trained_model_object, "estimators_", []):
+        tree_state = estimator.tree_.__getstate__()
+        total += tree_state["nodes"].nbytes + tree_state["values"].nbytes
+    return total
+
+
+class _RegistryEntry:
+    """
+    A model key's ModelCache (None while evicted) and its counters, which survive evictions.
+    """
+    __slots__ = ("model_cache", "size_bytes", "hits", "loads", "evictions",
+                 "last_load_seconds", "total_load_seconds", "last_used")
+
+    def __init__(self):
+        self.model_cache: Optional[ModelCache] = None
+        self.size_bytes = 0
+        self.hits = 0
+        self.loads = 0
+        self.evictions = 0
+        self.last_load_seconds = 0.0
+        self.total_load_seconds = 0.0
+        self.last_used = time.time()
+
+
+class ModelRegistry:
+    """
+    Serves several models side by side (per region, per channel, previous production, ...) from one process.
+
+    A model key `k` maps to `<model_key_prefix>/k/model.pkl` in the model bucket. Models are loaded
+    on first use, each in its own ModelCache so it keeps hot-reloading, and kept in LRU order; when
+    the estimated size of the loaded models exceeds `memory_budget_bytes`, the least recently used
+    ones are evicted. The production model of get_model_cache() is not part of the registry.
+    """
+
+    def __init__(self, model_registry_config: ModelRegistryConfig = ModelRegistryConfig()):
+        """
+        :param model_registry_config: Bucket, key layout, memory budget and allowed keys of the registry
+        """
+        self.model_registry_config = model_registry_config
+        self.allowed_model_keys = {key.strip() for key in model_registry_config.allowed_model_keys.split(",") if key.strip()}
+        # Loaded models in LRU order; _known_entries also keeps the counters of evicted ones
+        self._entries: "OrderedDict[str, _RegistryEntry]" = OrderedDict()
+        self._known_entries: Dict[str, _RegistryEntry] = {}
+        self._lock = threading.Lock()
+        self._key_locks: Dict[str, threading.Lock] = {}
+        self.evictions = 0
+
+    @property
+    def size_bytes(self) -> int:
+        return sum(entry.size_bytes for entry in list(self._entries.values()))
+
+    def get_predictor_config(self, model_key: str) -> VehiclePredictorConfig:
+        return VehiclePredictorConfig(
+            model_file_path=f"{self.model_registry_config.model_key_prefix}/{model_key}/{MODEL_FILE_NAME}",
+            model_bucket_name=self.model_registry_config.model_bucket_name,
+            model_refresh_interval=self.model_registry_config.model_refresh_interval)
+
+    def _check_model_key(self, model_key: str) -> None:
+        if not _MODEL_KEY_PATTERN.match(model_key):
+            raise UnknownModelError(f"Invalid model key {model_key!r}")
+        if self.allowed_model_keys and model_key not in self.allowed_model_keys:
+            raise UnknownModelError(f"Model {model_key!r} is not served here")
+
+    def get_model_cache(self, model_key: str) -> ModelCache:
+        """
+        Returns the loaded ModelCache of a model key, loading the model (and evicting others) if needed.
+        """
+        with self._lock:
+            entry = self._entries.get(model_key)
+            if entry is not None:
+                self._entries.move_to_end(model_key)
+                entry.hits += 1
+                entry.last_used = time.time()
+                return entry.model_cache
+
+        self._check_model_key(model_key)
+        with self._lock:
+            key_lock = self._key_locks.setdefault(model_key, threading.Lock())
+        # One load per key at a time; concurrent requests for the same model wait for it
+        with key_lock:
+            with self._lock:
+                entry = self._entries.get(model_key)
+                if entry is not None:
+                    self._entries.move_to_end(model_key)
+                    entry.hits += 1
+                    return entry.model_cache
+            return self._load(model_key).model_cache
+
+    def get_model(self, model_key: str) -> MyModel:
+        return self.get_model_cache(model_key).get_model()
+
+    def model_version(self, model_key: str) -> Optional[str]:
+        """
+        Returns the version of a loaded model without counting a hit, or None when it is not loaded.
+        """
+        with self._lock:
+            entry = self._entries.get(model_key)
+            return None if entry is None or entry.model_cache is None else entry.model_cache.version
+
+    def _load(self, model_key: str) -> _RegistryEntry:
+        model_cache = ModelCache(self.get_predictor_config(model_key), report_model_info=False)
+        if not model_cache.estimator.is_model_present(model_cache.prediction_pipeline_config.model_file_path):
+            raise UnknownModelError(f"No model {model_key!r} in bucket {self.model_registry_config.model_bucket_name}")
+
+        started = time.perf_counter()
+        model = model_cache.get_model()
+        load_seconds = time.perf_counter() - started
+        size_bytes = estimate_model_bytes(model)
+        model_cache.add_swap_listener(lambda old_version, new_version: self._resize(model_key))
+
+        with self._lock:
+            entry = self._known_entries.setdefault(model_key, _RegistryEntry())
+            entry.model_cache, entry.size_bytes, entry.last_used = model_cache, size_bytes, time.time()
+            entry.loads += 1
+            entry.last_load_seconds = load_seconds
+            entry.total_load_seconds += load_seconds
+            self._entries[model_key] = entry
+            evicted = self._evict(keep=model_key)
+        self._stop_evicted(evicted)
+        logger.info(f"Loaded model {model_key} ({entry.size_bytes} bytes) in {load_seconds:.3f}s")
+        return entry
+
+    def _resize(self, model_key: str) -> None:
+        """
+        Re-estimates the size of a model after its ModelCache hot-reloaded a new version.
+        """
+        with self._lock:
+            entry = self._entries.get(model_key)
+            if entry is None:
+                return
+            entry.size_bytes = estimate_model_bytes(entry.model_cache.get_model())
+            entry.loads += 1
+            evicted = self._evict(keep=model_key)
+        self._stop_evicted(evicted)
+
+    def _evict(self, keep: str) -> list:
+        evicted = []
+        size_bytes = sum(entry.size_bytes for entry in self._entries.values())
+        while size_bytes > self.model_registry_config.memory_budget_bytes and len(self._entries) > 1:
+            model_key = next(iter(self._entries))
+            if model_key == keep:
+                break
+            entry = self._entries.pop(model_key)
+            size_bytes -= entry.size_bytes
+            entry.evictions += 1
+            self.evictions += 1
+            evicted.append((model_key, entry.model_cache, entry.size_bytes))
+            entry.model_cache, entry.size_bytes = None, 0
+        return evicted
+
+    @staticmethod
+    def _stop_evicted(evicted: list) -> None:
+        for model_key, model_cache, size_bytes in evicted:
+            # Requests still holding the evicted model finish with it; memory is freed after them
+            model_cache.stop()
+            logger.info(f"Evicted model {model_key} ({size_bytes} bytes) from the model registry")
+
+    def stats(self) -> dict:
+        """
+        Returns registry totals and, per model requested so far, whether it is loaded, its version,
+        size, hits (requests served without loading), loads, evictions and load times.
+        """
+        with self._lock:
+            loaded_model_keys = list(self._entries)
+            models = {model_key: {"loaded": entry.model_cache is not None,
+                                  "version": entry.model_cache.version if entry.model_cache is not None else None,
+                                  "size_bytes": entry.size_bytes,
+                                  "hits": entry.hits,
+                                  "loads": entry.loads,
+                                  "evictions": entry.evictions,
+                                  "last_load_seconds": round(entry.last_load_seconds, 6),
+                                  "total_load_seconds": round(entry.total_load_seconds, 6),
+                                  "last_used": entry.last_used}
+                      for model_key, entry in self._known_entries.items()}
+        return {"memory_budget_bytes": self.model_registry_config.memory_budget_bytes,
+                "size_bytes": sum(model["size_bytes"] for model in models.values()),
+                "evictions": self.evictions,
+                "loaded_models": loaded_model_keys,
+                "models": models}
+
+    def stop(self) -> None:
+        with self._lock:
+            model_caches = [entry.model_cache for entry in self._entries.values()]
+        for model_cache in model_caches:
+            model_cache.stop()
+
+
+_model_registry: Optional[ModelRegistry] = None
+_model_registry_lock = threading.Lock()
+
+
+def get_model_registry() -> ModelRegistry:
+    """
+    Returns the process-wide ModelRegistry.
+    """
+    global _model_registry
+    with _model_registry_lock:
+        if _model_registry is None:
+            _model_registry = ModelRegistry()
+        return _model_registry
+
+
+def stop_model_registry() -> None:
+    if _model_registry is not None:
+        _model_registry.stop()
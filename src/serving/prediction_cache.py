@@ -0,0 +1,123 @@
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional, Tuple
+
+import numpy as np
+
+from src.constants import (MODEL_SERVING_PREDICTION_CACHE, MODEL_SERVING_PREDICTION_CACHE_MAX_BYTES,
+                           MODEL_SERVING_PREDICTION_CACHE_MAX_ENTRIES, MODEL_SERVING_PREDICTION_CACHE_TTL_SECONDS)
+from src.logger import logger
+from src.serving.model_cache import get_model_cache
+
+# Rough per-entry bookkeeping cost of the OrderedDict slot and the stored (value, expiry, size) tuple
+_ENTRY_OVERHEAD_BYTES = 160
+
+
+class PredictionCache:
+    """
+    Bounded LRU/TTL cache of predictions in front of the model.
+
+    Keys combine the active model version with the canonical bytes of the encoded feature row
+    (float64, -0.0 folded into 0.0), so "28", "28.0" and 28 all hit the same entry and a new
+    model can never serve predictions of the old one. The cache is cleared whenever the model
+    is swapped, and is capped both by number of entries and by an estimate of its size in bytes.
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int, ttl_seconds: float = 0):
+        """
+        :param max_entries: Maximum number of cached predictions
+        :param max_bytes: Maximum estimated memory held by keys and values
+        :param ttl_seconds: Lifetime of an entry, 0 to keep entries until evicted
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+
+        self._entries: "OrderedDict[Hashable, Tuple[Any, float, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.size_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def make_key(row: np.ndarray, model_version: str) -> Tuple[str, bytes]:
+        """
+        Builds the cache key of one encoded feature row for the given model version.
+        """
+        canonical = np.ascontiguousarray(row, dtype=np.float64).ravel() + 0.0
+        return model_version, canonical.tobytes()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            value, expires_at, size = entry
+            if expires_at and expires_at < time.monotonic():
+                del self._entries[key]
+                self.size_bytes -= size
+                self.expirations += 1
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        size = sys.getsizeof(key) + sum(sys.getsizeof(part) for part in key) + sys.getsizeof(value) + _ENTRY_OVERHEAD_BYTES
+        expires_at = time.monotonic() + self.ttl_seconds if self.ttl_seconds > 0 else 0.0
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.size_bytes -= previous[2]
+            self._entries[key] = (value, expires_at, size)
+            self.size_bytes += size
+            while self._entries and (len(self._entries) > self.max_entries or self.size_bytes > self.max_bytes):
+                _, (_, _, evicted_size) = self._entries.popitem(last=False)
+                self.size_bytes -= evicted_size
+                self.evictions += 1
+
+    def invalidate(self, old_version: Optional[str] = None, new_version: Optional[str] = None) -> None:
+        """
+        Drops every entry; registered as a ModelCache swap listener.
+        """
+        with self._lock:
+            self._entries.clear()
+            self.size_bytes = 0
+            self.invalidations += 1
+        logger.info(f"Cleared prediction cache after model swap {old_version} -> {new_version}")
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {"entries": len(self._entries), "size_bytes": self.size_bytes,
+                "max_entries": self.max_entries, "max_bytes": self.max_bytes, "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits, "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+                "evictions": self.evictions, "expirations": self.expirations, "invalidations": self.invalidations}
+
+
+_prediction_cache: Optional[PredictionCache] = None
+_prediction_cache_lock = threading.Lock()
+
+
+def get_prediction_cache() -> Optional[PredictionCache]:
+    """
+    Returns the process-wide prediction cache, or None when PREDICTION_CACHE is disabled.
+    """
+    global _prediction_cache
+    if not MODEL_SERVING_PREDICTION_CACHE:
+        return None
+    with _prediction_cache_lock:
+        if _prediction_cache is None:
+            _prediction_cache = PredictionCache(max_entries=MODEL_SERVING_PREDICTION_CACHE_MAX_ENTRIES,
+                                                max_bytes=MODEL_SERVING_PREDICTION_CACHE_MAX_BYTES,
+                                                ttl_seconds=MODEL_SERVING_PREDICTION_CACHE_TTL_SECONDS)
+            # Keys already carry the model version; clearing on swap just frees the stale entries early
+            get_model_cache().add_swap_listener(_prediction_cache.invalidate)
+        return _prediction_cache
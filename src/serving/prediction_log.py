@@ -0,0 +1,339 @@
+import json
+import os
+import queue
+import sys
+import threading
+import time
+from datetime import datetime
+from typing import List, Optional
+
+import numpy as np
+
+from src.entity.config_entity import PredictionLogConfig
+from src.exception import CustomException
+from src.logger import logger
+from src.serving.metrics import PREDICTION_LOG_RECORDS
+
+# Fields of every prediction log record besides the feature columns, with their Arrow types
+PREDICTION_LOG_FIELDS = (("timestamp", "float64"), ("route", "string"), ("model_key", "string"),
+                         ("model_version", "string"), ("prediction", "int64"), ("probability", "float64"),
+                         ("latency_ms", "float64"))
+
+
+class PredictionLogSink:
+    """
+    Destination of prediction log batches; write() is only ever called from the log's writer thread.
+    """
+
+    def write(self, records: List[dict]) -> None:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+
+class MongoPredictionLogSink(PredictionLogSink):
+    """
+    Inserts prediction log batches into a MongoDB collection with one insert_many call each.
+    """
+
+    def __init__(self, database_name: str, collection_name: str):
+        self.database_name = database_name
+        self.collection_name = collection_name
+        self._collection = None
+
+    def write(self, records: List[dict]) -> None:
+        from pymongo.errors import BulkWriteError
+        from src.configuration.mongo_db_connection import MongoDBClient
+
+        if self._collection is None:
+            self._collection = MongoDBClient(database_name=self.database_name).database[self.collection_name]
+        try:
+            # insert_many sets _id on the records, so a retried batch reuses the ids of its first attempt
+            self._collection.insert_many(records, ordered=False)
+        except BulkWriteError as e:
+            # Duplicate keys are records a failed earlier attempt of this batch had already inserted
+            if e.details.get("writeConcernErrors") or \
+                    any(error.get("code") != 11000 for error in e.details.get("writeErrors", [])):
+                raise
+
+
+class FilePredictionLogSink(PredictionLogSink):
+    """
+    Appends prediction log batches to NDJSON or Parquet files in a directory, rotated by size and age.
+
+    The file being written is named *.inprogress and renamed once rotated or closed, so readers
+    only pick up complete files (a Parquet file has no footer until it is closed). File names
+    carry the process id, so pre-forked workers each write their own files.
+    """
+
+    def __init__(self, log_dir: str, file_format: str, feature_columns: List[str], rotate_bytes: int,
+                 rotate_seconds: float):
+        """
+        :param log_dir: Directory of the log files
+        :param file_format: "ndjson" or "parquet"
+        :param feature_columns: Feature columns of the records, for the Parquet schema
+        :param rotate_bytes: Start a new file once the current one is this large
+        :param rotate_seconds: Start a new file once the current one is this old
+        """
+        if file_format not in ("ndjson", "parquet"):
+            raise ValueError(f"Unknown prediction log file format: {file_format}")
+        self.log_dir = log_dir
+        self.file_format = file_format
+        self.feature_columns = feature_columns
+        self.rotate_bytes = rotate_bytes
+        self.rotate_seconds = rotate_seconds
+
+        self.files_written = 0
+        self._path: Optional[str] = None
+        self._file = None
+        self._opened = 0.0
+        self._schema = None
+
+    def _open(self) -> None:
+        os.makedirs(self.log_dir, exist_ok=True)
+        name = f"predictions_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{os.getpid()}_{self.files_written}"
+        self._path = os.path.join(self.log_dir, f"{name}.{self.file_format}.inprogress")
+        if self.file_format == "parquet":
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            if self._schema is None:
+                self._schema = pa.schema([(name, pa.float64()) for name in self.feature_columns] +
+                                         [(name, pa.type_for_alias(kind)) for name, kind in PREDICTION_LOG_FIELDS])
+            self._file = pq.ParquetWriter(self._path, self._schema)
+        else:
+            self._file = open(self._path, "w", encoding="utf-8")
+        self._opened = time.time()
+
+    def write(self, records: List[dict]) -> None:
+        if self._file is not None and (os.path.getsize(self._path) >= self.rotate_bytes or
+                                       time.time() - self._opened >= self.rotate_seconds):
+            self.close()
+        if self._file is None:
+            self._open()
+
+        if self.file_format == "parquet":
+            import pyarrow as pa
+            self._file.write_table(pa.Table.from_pylist(records, schema=self._schema))
+        else:
+            self._file.write("".join(json.dumps(record, separators=(",", ":")) + "\n" for record in records))
+            self._file.flush()
+
+    def close(self) -> None:
+        if self._file is None:
+            return
+        self._file.close()
+        os.replace(self._path, self._path[:-len(".inprogress")])
+        self._file = None
+        self.files_written += 1
+
+
+class PredictionLog:
+    """
+    Bounded, batching background writer of served predictions, for retraining on live traffic.
+
+    log() only puts a tuple on a queue and never blocks the request: when the buffer already holds
+    `max_buffer_records` records because the sink is slow or down, the record is dropped and counted
+    instead. log_many() queues the rows of a scored batch chunk as one tuple, kept or dropped as a
+    whole. A writer thread turns the queued tuples into one record per row and hands them to the
+    sink about `batch_size` at a time, or after `flush_interval_seconds` when traffic is light. A
+    failing batch is retried with backoff while new records keep buffering, then counted as failed.
+    """
+
+    def __init__(self, sink: PredictionLogSink, feature_columns: List[str], max_buffer_records: int,
+                 batch_size: int, flush_interval_seconds: float, max_retries: int = 3):
+        """
+        :param sink: Where batches of records are written
+        :param feature_columns: Names of the feature row values, in order
+        :param max_buffer_records: Records held in memory before new ones are dropped
+        :param batch_size: Records per sink write
+        :param flush_interval_seconds: Longest time a record waits for its batch to fill
+        :param max_retries: Retries of a failed sink write before its records are given up
+        """
+        self.sink = sink
+        self.feature_columns = feature_columns
+        self.max_buffer_records = max_buffer_records
+        self.batch_size = batch_size
+        self.flush_interval_seconds = flush_interval_seconds
+        self.max_retries = max_retries
+
+        self.logged = 0
+        self.dropped = 0
+        self.written = 0
+        self.failed = 0
+        self.flushes = 0
+        # Bounded by the number of buffered records rather than of queued tuples
+        self._queue: queue.Queue = queue.Queue()
+        self._buffered = 0
+        self._buffer_lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def _ensure_started(self) -> None:
+        # Also restarts the writer in a forked worker, where the parent's thread does not exist
+        if self._thread is None or not self._thread.is_alive():
+            with self._lock:
+                if self._thread is None or not self._thread.is_alive():
+                    self._stopping.clear()
+                    self._thread = threading.Thread(target=self._run, name="prediction-log", daemon=True)
+                    self._thread.start()
+
+    def _put(self, item: tuple, n_records: int) -> bool:
+        self._ensure_started()
+        with self._buffer_lock:
+            accepted = self._buffered + n_records <= self.max_buffer_records
+            if accepted:
+                self._buffered += n_records
+        if not accepted:
+            self.dropped += n_records
+            PREDICTION_LOG_RECORDS.inc(n_records, "dropped")
+            return False
+        self._queue.put_nowait((n_records, item))
+        self.logged += n_records
+        PREDICTION_LOG_RECORDS.inc(n_records, "logged")
+        return True
+
+    def log(self, route: str, features: np.ndarray, prediction, probability: Optional[float] = None,
+            latency_seconds: Optional[float] = None, model_key: Optional[str] = None,
+            model_version: Optional[str] = None) -> bool:
+        """
+        Queues one served prediction; returns False when it was dropped because the buffer is full.
+        """
+        return self._put((time.time(), route, model_key, model_version, features, prediction,
+                          probability, latency_seconds), 1)
+
+    def log_many(self, route: str, features: np.ndarray, predictions: np.ndarray,
+                 probabilities: Optional[np.ndarray] = None, latency_seconds: Optional[float] = None,
+                 model_key: Optional[str] = None, model_version: Optional[str] = None) -> bool:
+        """
+        Queues the rows of one scored batch, features of shape (n_rows, n_columns), as one record
+        per row sharing the batch's latency; returns False when they were dropped because the
+        buffer cannot hold them all. The arrays are kept as they are until written, so callers
+        must not modify them afterwards.
+        """
+        if not len(predictions):
+            return True
+        return self._put((time.time(), route, model_key, model_version, features, predictions,
+                          probabilities, latency_seconds), len(predictions))
+
+    def _to_records(self, item: tuple) -> List[dict]:
+        timestamp, route, model_key, model_version, features, predictions, probabilities, latency_seconds = item
+        features = np.asarray(features, dtype=np.float64).reshape(-1, len(self.feature_columns))
+        predictions = np.atleast_1d(np.asarray(predictions)).tolist()
+        probabilities = [None] * len(predictions) if probabilities is None else \
+            np.atleast_1d(np.asarray(probabilities, dtype=np.float64)).tolist()
+        shared = {"timestamp": timestamp, "route": route, "model_key": model_key,
+                  "model_version": None if model_version is None else str(model_version),
+                  "latency_ms": None if latency_seconds is None else latency_seconds * 1000}
+        records = []
+        for row, prediction, probability in zip(features.tolist(), predictions, probabilities):
+            record = dict(zip(self.feature_columns, row))
+            record.update(shared, prediction=int(prediction), probability=probability)
+            records.append(record)
+        return records
+
+    def _next_batch(self) -> List[tuple]:
+        try:
+            n_records, item = self._queue.get(timeout=self.flush_interval_seconds)
+        except queue.Empty:
+            return []
+        batch = [item]
+        deadline = time.monotonic() + self.flush_interval_seconds
+        while n_records < self.batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining <= 0 or self._stopping.is_set():
+                    # Whatever is already queued still joins the batch
+                    item_records, item = self._queue.get_nowait()
+                else:
+                    item_records, item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            batch.append(item)
+            n_records += item_records
+        return batch
+
+    def _write(self, batch: List[tuple]) -> None:
+        records = [record for item in batch for record in self._to_records(item)]
+        with self._buffer_lock:
+            self._buffered -= len(records)
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                # Backs off, except when stopping
+                self._stopping.wait(min(0.5 * 2 ** (attempt - 1), 30))
+            try:
+                self.sink.write(records)
+            except Exception as e:
+                logger.error(f"Prediction log write of {len(records)} records failed (attempt {attempt + 1}): {e}")
+                continue
+            self.written += len(records)
+            self.flushes += 1
+            PREDICTION_LOG_RECORDS.inc(len(records), "written")
+            return
+        self.failed += len(records)
+        PREDICTION_LOG_RECORDS.inc(len(records), "failed")
+
+    def _run(self) -> None:
+        while not (self._stopping.is_set() and self._queue.empty()):
+            batch = self._next_batch()
+            if batch:
+                self._write(batch)
+        try:
+            self.sink.close()
+        except Exception as e:
+            logger.error(f"Closing the prediction log sink failed: {e}")
+
+    def stop(self, timeout: float = 10) -> None:
+        """
+        Writes out the buffered records and closes the sink.
+        """
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def stats(self) -> dict:
+        return {"buffered": self._buffered, "max_buffer_records": self.max_buffer_records,
+                "logged": self.logged, "dropped": self.dropped, "written": self.written, "failed": self.failed,
+                "flushes": self.flushes}
+
+
+_prediction_log: Optional[PredictionLog] = None
+_prediction_log_lock = threading.Lock()
+
+
+def get_prediction_log(config: PredictionLogConfig = PredictionLogConfig()) -> Optional[PredictionLog]:
+    """
+    Returns the process-wide prediction log, or None when PREDICTION_LOG is "none".
+    """
+    global _prediction_log
+    if config.sink == "none":
+        return None
+    with _prediction_log_lock:
+        if _prediction_log is None:
+            try:
+                from src.serving.feature_encoder import get_feature_encoder
+                feature_columns = get_feature_encoder().columns
+                if config.sink == "mongo":
+                    sink = MongoPredictionLogSink(config.database_name, config.collection_name)
+                elif config.sink in ("ndjson", "parquet"):
+                    sink = FilePredictionLogSink(config.log_dir, config.sink, feature_columns,
+                                                 rotate_bytes=config.rotate_bytes, rotate_seconds=config.rotate_seconds)
+                else:
+                    raise ValueError(f"Unknown prediction log sink: {config.sink}")
+                _prediction_log = PredictionLog(sink, feature_columns, max_buffer_records=config.max_buffer_records,
+                                                batch_size=config.batch_size,
+                                                flush_interval_seconds=config.flush_interval_seconds,
+                                                max_retries=config.max_retries)
+            except Exception as e:
+                raise CustomException(e, sys) from e
+        return _prediction_log
+
+
+def stop_prediction_log() -> None:
+    """
+    Flushes and stops the prediction log, if one was created in this process.
+    """
+    if _prediction_log is not None:
+        _prediction_log.stop()
@@ -0,0 +1,189 @@
+import argparse
+import gc
+import os
+import signal
+import shutil
+import socket
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+from src.constants import APP_HOST, APP_PORT, MODEL_SERVING_PREFORK_PIN_CORES, MODEL_SERVING_PREFORK_WORKERS
+from src.logger import logger
+
+
+class PreforkServer:
+    """
+    Runs app.py in N forked uvicorn workers that share the master's model copy-on-write.
+
+    The master imports the app, loads and warms the production model, then runs a full collection
+    and gc.freeze() so the collector never writes to (and thereby unshares) the pages of the objects
+    that exist at fork time. It binds the listening socket once and forks the workers, which all
+    accept on it. Workers that die are replaced; SIGTERM or SIGINT stops them all gracefully.
+
+    Linux/macOS only (os.fork). Use the "thread" or "inline" inference executor: a "process"
+    executor would load a private model copy in every pool process of every worker.
+
+    Training jobs are shared: unless TRAINING_JOBS_DIR is set, the master gives all workers one
+    temporary jobs directory, so /train starts a single training whichever worker takes it and
+    /train/{job_id} answers from any worker. Everything else is per worker and not aggregated:
+    /metrics, /predict/cache/stats, the prediction cache itself and the admission limits describe
+    the worker that answered the request, and the metrics carry no worker label.
+    """
+
+    def __init__(self, host: str, port: int, workers: int, pin_cores: bool = False, log_level: str = "info",
+                 freeze_gc: bool = True, restart_delay_seconds: float = 1.0):
+        """
+        :param host: Address to listen on
+        :param port: Port to listen on
+        :param workers: Number of worker processes; 0 forks one per core available to this process
+        :param pin_cores: Pin worker i to the i-th available core (round robin when there are more workers)
+        :param log_level: uvicorn log level of the workers
+        :param freeze_gc: gc.freeze() the master's heap before forking; off only to measure its effect
+        :param restart_delay_seconds: Pause before replacing a dead worker, so a crash loop does not spin
+        """
+        self.cores: List[int] = sorted(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else \
+            list(range(os.cpu_count() or 1))
+        self.host = host
+        self.port = port
+        self.workers = workers or len(self.cores)
+        self.pin_cores = pin_cores
+        self.log_level = log_level
+        self.freeze_gc = freeze_gc
+        self.restart_delay_seconds = restart_delay_seconds
+
+        self.app = None
+        self.training_job_manager = None
+        self._jobs_dir: Optional[str] = None
+        self._socket: Optional[socket.socket] = None
+        self._worker_pids: Dict[int, int] = {}
+        self._stopping = False
+
+    def preload(self) -> None:
+        """
+        Imports the app and loads and warms the production model in the master process.
+        """
+        import app as app_module
+        from src.serving.model_cache import get_model_cache, stop_model_caches
+
+        started = time.perf_counter()
+        app_module.warm_up_model()
+        app_module.serving_state.update(ready=True, model_version=get_model_cache().version,
+                                        warm_up_seconds=round(time.perf_counter() - started, 3))
+        # Threads do not survive fork(); every worker restarts the model revalidation thread itself
+        stop_model_caches()
+        self.app = app_module.app
+        self.training_job_manager = app_module.training_job_manager
+        logger.info(f"Preloaded model version {get_model_cache().version} in {time.perf_counter() - started:.3f}s")
+
+    def _bind(self) -> socket.socket:
+        family = socket.AF_INET6 if ":" in self.host else socket.AF_INET
+        sock = socket.socket(family, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((self.host, self.port))
+        sock.listen(2048)
+        sock.set_inheritable(True)
+        return sock
+
+    def _spawn(self, index: int) -> int:
+        pid = os.fork()
+        if pid == 0:
+            exit_code = 0
+            try:
+                self._run_worker(index)
+            except BaseException as e:
+                logger.error(f"Worker {index} failed: {e}")
+                exit_code = 1
+            finally:
+                os._exit(exit_code)
+        self._worker_pids[pid] = index
+        return pid
+
+    def _run_worker(self, index: int) -> None:
+        import uvicorn
+        from src.serving.model_cache import get_model_cache
+
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(signum, signal.SIG_DFL)
+        if self.pin_cores:
+            core = self.cores[index % len(self.cores)]
+            os.sched_setaffinity(0, {core})
+            logger.info(f"Worker {index} (pid {os.getpid()}) pinned to core {core}")
+        get_model_cache().start()
+
+        config = uvicorn.Config(self.app, log_level=self.log_level, lifespan="on")
+        uvicorn.Server(config).run(sockets=[self._socket])
+
+    def _stop(self, signum, frame) -> None:
+        if self._stopping:
+            return
+        self._stopping = True
+        logger.info(f"Stopping {len(self._worker_pids)} workers")
+        for pid in list(self._worker_pids):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def run(self) -> None:
+        """
+        Preloads the model, forks the workers and supervises them until stopped.
+        """
+        self.preload()
+        self._socket = self._bind()
+        if self.workers > 1 and self.training_job_manager.jobs_dir is None:
+            # One job table for all workers, so they neither start concurrent trainings nor miss each other's jobs
+            self._jobs_dir = tempfile.mkdtemp(prefix="training-jobs-")
+            self.training_job_manager.set_jobs_dir(self._jobs_dir)
+
+        if self.freeze_gc:
+            # Everything allocated so far, the model included, is moved to the permanent generation
+            gc.collect()
+            gc.freeze()
+            logger.info(f"Froze {gc.get_freeze_count()} objects")
+        logger.info(f"Forking {self.workers} workers on {self.host}:{self.port}"
+                    f"{' pinned to cores' if self.pin_cores else ''}")
+
+        signal.signal(signal.SIGTERM, self._stop)
+        signal.signal(signal.SIGINT, self._stop)
+        for index in range(self.workers):
+            self._spawn(index)
+
+        while self._worker_pids:
+            try:
+                pid, status = os.wait()
+            except ChildProcessError:
+                break
+            index = self._worker_pids.pop(pid, None)
+            if index is None or self._stopping:
+                continue
+            logger.error(f"Worker {index} (pid {pid}) exited with status {status}; restarting it")
+            time.sleep(self.restart_delay_seconds)
+            if not self._stopping:
+                self._spawn(index)
+
+        self._socket.close()
+        if self._jobs_dir is not None:
+            shutil.rmtree(self._jobs_dir, ignore_errors=True)
+        logger.info("All workers stopped")
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Serve app.py from pre-forked workers sharing one preloaded model.")
+    parser.add_argument("--host", default=APP_HOST)
+    parser.add_argument("--port", type=int, default=APP_PORT)
+    parser.add_argument("--workers", type=int, default=MODEL_SERVING_PREFORK_WORKERS,
+                        help="Worker processes; 0 forks one per available core")
+    parser.add_argument("--pin-cores", action="store_true", default=MODEL_SERVING_PREFORK_PIN_CORES,
+                        help="Pin each worker to its own core")
+    parser.add_argument("--log-level", default="info")
+    parser.add_argument("--no-gc-freeze", dest="freeze_gc", action="store_false",
+                        help="Skip gc.freeze() before forking, to measure its effect")
+    args = parser.parse_args(argv)
+    PreforkServer(host=args.host, port=args.port, workers=args.workers, pin_cores=args.pin_cores,
+                  log_level=args.log_level, freeze_gc=args.freeze_gc).run()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
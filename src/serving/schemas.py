@@ -0,0 +1,50 @@
+import math
+from typing import Optional, Type
+
+import numpy as np
+from pydantic import BaseModel, ConfigDict, Field, create_model
+
+from src.constants import SCHEMA_FILE_PATH
+from src.utils.main_utils import read_yaml_file
+
+
+class VehicleFeaturesBase(BaseModel):
+    """
+    Base of the typed prediction request; the fields themselves are generated from config/schema.yaml.
+    """
+    model_config = ConfigDict(extra="forbid")
+
+    def to_features(self) -> np.ndarray:
+        """
+        Returns the request as a feature row of shape (1, n_columns), in the schema's column order.
+        """
+        return np.array([[getattr(self, name) for name in type(self).model_fields]], dtype=np.float64)
+
+
+def build_vehicle_features_model(schema_config: Optional[dict] = None) -> Type[VehicleFeaturesBase]:
+    """
+    Builds the request model from `prediction_columns` and `prediction_column_ranges` in
+    config/schema.yaml, so the JSON API validates exactly what FeatureEncoder accepts for forms.
+    """
+    schema_config = schema_config if schema_config is not None else read_yaml_file(SCHEMA_FILE_PATH)
+    ranges = schema_config.get("prediction_column_ranges", {})
+
+    fields = {}
+    for column in schema_config["prediction_columns"]:
+        (name, column_type), = column.items()
+        low, high = ranges.get(name, (-math.inf, math.inf))
+        constraints = {"ge": low if math.isfinite(low) else None, "le": high if math.isfinite(high) else None}
+        if column_type == "int":
+            fields[name] = (int, Field(..., **constraints))
+        else:
+            fields[name] = (float, Field(..., allow_inf_nan=False, **constraints))
+    return create_model("VehicleFeatures", __base__=VehicleFeaturesBase, **fields)
+
+
+VehicleFeatures = build_vehicle_features_model()
+
+
+class PredictionResponse(BaseModel):
+    prediction: int = Field(..., description="Predicted Response: 1 if the customer is interested, else 0")
+    label: str = Field(..., description="Response-Yes or Response-No, as shown by the form page")
+    probability: float = Field(..., description="Probability of Response-Yes")
@@ -0,0 +1,262 @@
+import json
+import multiprocessing
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import asdict, dataclass, field
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional, Tuple
+
+from src.logger import logger
+
+# Queue the training worker process reports stage events on, set by _init_training_worker
+_event_queue = None
+
+
+def _init_training_worker(event_queue, niceness: int) -> None:
+    global _event_queue
+    _event_queue = event_queue
+    # Keep the training process from competing with request handling for CPU
+    if niceness and hasattr(os, "nice"):
+        os.nice(niceness)
+
+
+def _run_training_job(job_id: str) -> None:
+    """
+    Runs the full training pipeline in the worker process, reporting stage events to the parent.
+    Imported lazily so the serving process never loads the training dependencies.
+    """
+    from src.pipeline.training_pipeline import TrainPipeline
+
+    def report_stage(stage_name: str, status: str, duration: Optional[float]) -> None:
+        _event_queue.put((job_id, stage_name, status, duration, time.time()))
+
+    try:
+        TrainPipeline(stage_callback=report_stage).run_pipeline()
+    except Exception as e:
+        # CustomException cannot be unpickled in the parent process, so only its message is sent back
+        raise RuntimeError(str(e)) from None
+
+
+def _is_process_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+@dataclass
+class TrainingJob:
+    job_id: str
+    status: str = "queued"      # queued, running, succeeded or failed
+    submitted_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    error: Optional[str] = None
+    stages: Dict[str, dict] = field(default_factory=dict)
+    owner_pid: int = field(default_factory=os.getpid)   # serving process that submitted and runs the job
+
+    @property
+    def is_active(self) -> bool:
+        return self.status in ("queued", "running")
+
+    def to_dict(self) -> dict:
+        job = asdict(self)
+        end = self.finished_at or time.time()
+        job["duration_seconds"] = None if self.started_at is None else round(end - self.started_at, 3)
+        return job
+
+
+class TrainingJobManager:
+    """
+    Runs training pipelines in a separate process so they never block the serving workers.
+
+    submit() is single-flight: while a job is queued or running, further submissions return that
+    same job instead of starting a duplicate training. Every job runs in a fresh, lower-priority
+    process (so each run gets its own artifact timestamp) and reports per-stage status and
+    timings back through a queue.
+
+    With a jobs_dir, several serving processes (the workers of prefork_server.py) share one job
+    table: every job is also kept as a JSON file there, submissions are single-flight across the
+    processes through a file lock, and any process answers status queries for any job. A job whose
+    owning process has died is reported as failed.
+    """
+
+    def __init__(self, niceness: int = 10, max_jobs_kept: int = 100, jobs_dir: Optional[str] = None):
+        """
+        :param niceness: Increment applied to the worker process priority
+        :param max_jobs_kept: Number of finished jobs remembered for status queries
+        :param jobs_dir: Directory shared by the serving processes, or None for jobs of this process only
+        """
+        self.niceness = niceness
+        self.max_jobs_kept = max_jobs_kept
+        self.jobs: "OrderedDict[str, TrainingJob]" = OrderedDict()
+        self.jobs_dir = None
+        if jobs_dir is not None:
+            self.set_jobs_dir(jobs_dir)
+
+        # Re-entrant: a done-callback may run on the submitting thread while the lock is held
+        self._lock = threading.RLock()
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._event_queue = None
+        self._listener: Optional[threading.Thread] = None
+
+    def set_jobs_dir(self, jobs_dir: str) -> None:
+        """
+        Shares the job table with the other serving processes using the same directory.
+        """
+        os.makedirs(jobs_dir, exist_ok=True)
+        self.jobs_dir = jobs_dir
+
+    @contextmanager
+    def _shared_lock(self) -> Iterator[None]:
+        if self.jobs_dir is None:
+            yield
+            return
+        import fcntl
+        with open(os.path.join(self.jobs_dir, ".lock"), "w") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _job_path(self, job_id: str) -> str:
+        return os.path.join(self.jobs_dir, f"{job_id}.json")
+
+    def _persist(self, job: TrainingJob) -> None:
+        if self.jobs_dir is None:
+            return
+        path = self._job_path(job.job_id)
+        with open(f"{path}.{os.getpid()}.tmp", "w") as file:
+            json.dump(asdict(job), file)
+        os.replace(f"{path}.{os.getpid()}.tmp", path)
+
+    def _load(self, job_id: str) -> Optional[TrainingJob]:
+        try:
+            with open(self._job_path(job_id)) as file:
+                job = TrainingJob(**json.load(file))
+        except (FileNotFoundError, ValueError, TypeError):
+            return None
+        if job.is_active and not _is_process_alive(job.owner_pid):
+            job.status, job.error = "failed", f"Serving process {job.owner_pid} running the job exited"
+            job.finished_at = job.finished_at or time.time()
+        return job
+
+    def _shared_jobs(self) -> Iterator[TrainingJob]:
+        """
+        Jobs of all the serving processes, oldest first.
+        """
+        paths = [os.path.join(self.jobs_dir, name) for name in os.listdir(self.jobs_dir) if name.endswith(".json")]
+        jobs = [self._load(os.path.basename(path)[:-len(".json")]) for path in paths]
+        return iter(sorted((job for job in jobs if job is not None), key=lambda job: job.submitted_at))
+
+    def _ensure_started(self) -> None:
+        if self._executor is not None:
+            return
+        context = multiprocessing.get_context("spawn")
+        if self._event_queue is None:
+            self._event_queue = context.Queue()
+            self._listener = threading.Thread(target=self._listen, name="training-job-events", daemon=True)
+            self._listener.start()
+        self._executor = ProcessPoolExecutor(max_workers=1, mp_context=context, max_tasks_per_child=1,
+                                             initializer=_init_training_worker,
+                                             initargs=(self._event_queue, self.niceness))
+
+    def submit(self) -> Tuple[TrainingJob, bool]:
+        """
+        Starts a training job unless one is already active.
+
+        :return: the job and whether it was newly created
+        """
+        with self._lock, self._shared_lock():
+            jobs = list(self._shared_jobs()) if self.jobs_dir is not None else list(self.jobs.values())
+            for job in jobs:
+                if job.is_active:
+                    return job, False
+
+            self._ensure_started()
+            job = TrainingJob(job_id=uuid.uuid4().hex)
+            self.jobs[job.job_id] = job
+            self._persist(job)
+            while len(self.jobs) > self.max_jobs_kept:
+                oldest_id = next(iter(self.jobs))
+                if self.jobs[oldest_id].is_active:
+                    break
+                del self.jobs[oldest_id]
+            if self.jobs_dir is not None:
+                finished = [old for old in jobs if not old.is_active]
+                for old in finished[:max(0, len(jobs) + 1 - self.max_jobs_kept)]:
+                    os.remove(self._job_path(old.job_id))
+
+            try:
+                future = self._executor.submit(_run_training_job, job.job_id)
+            except BrokenProcessPool:
+                # A previous training process died abruptly; start over with a fresh pool
+                self._executor.shutdown(wait=False)
+                self._executor = None
+                self._ensure_started()
+                future = self._executor.submit(_run_training_job, job.job_id)
+            future.add_done_callback(lambda finished, job_id=job.job_id: self._on_done(job_id, finished))
+            logger.info(f"Submitted training job {job.job_id}")
+            return job, True
+
+    def get_status(self, job_id: str) -> Optional[dict]:
+        """
+        Returns a snapshot of the job's status and stage timings, or None for unknown jobs.
+        """
+        with self._lock:
+            job = self.jobs.get(job_id)
+            if job is None and self.jobs_dir is not None and os.path.basename(job_id) == job_id:
+                job = self._load(job_id)
+            return None if job is None else job.to_dict()
+
+    def _listen(self) -> None:
+        while True:
+            try:
+                job_id, stage_name, status, duration, timestamp = self._event_queue.get()
+            except (EOFError, OSError):
+                return
+            with self._lock:
+                job = self.jobs.get(job_id)
+                if job is None:
+                    continue
+                if job.status == "queued":
+                    job.status, job.started_at = "running", timestamp
+                stage = job.stages.setdefault(stage_name, {})
+                stage["status"] = status
+                if status == "running":
+                    stage["started_at"] = timestamp
+                else:
+                    stage["finished_at"] = timestamp
+                    stage["duration_seconds"] = round(duration, 3)
+                self._persist(job)
+
+    def _on_done(self, job_id: str, future: Future) -> None:
+        with self._lock:
+            job = self.jobs.get(job_id)
+            if job is None:
+                return
+            job.finished_at = time.time()
+            if job.started_at is None:
+                job.started_at = job.submitted_at
+            error = future.exception()
+            if error is None:
+                job.status = "succeeded"
+                logger.info(f"Training job {job_id} succeeded")
+            else:
+                job.status, job.error = "failed", str(error)
+                logger.error(f"Training job {job_id} failed: {error}")
+            self._persist(job)
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
@@ -1,10 +1,13 @@
 import os
+import pickle
+import shutil
 import sys
 
 import numpy as np, pandas as pd
 import dill
 import yaml
 
+from src.constants import FEATURE_STORE_PARQUET_COMPRESSION
 from src.exception import CustomException
 from src.logger import logger
 
@@ -29,15 +32,117 @@ def write_yaml_file(path: str, content: object, replace: bool = False) -> None:
     
     except Exception as e:
         raise CustomException(e, sys) from e
+
+
+def read_schema_column_dtypes(schema_file_path: str) -> dict:
+    """
+    Returns the {column: dtype} mapping of the `columns` list of a schema file, in schema order.
+    """
+    try:
+        return {name: dtype for column in read_yaml_file(schema_file_path)["columns"] for name, dtype in column.items()}
+    except Exception as e:
+        raise CustomException(e, sys) from e
     
 
-def save_object(file_path: str, obj: object) -> None:
+MMAP_ARRAY_MIN_BYTES = 64 * 1024
+
+
+def get_mmap_arrays_dir(file_path: str) -> str:
+    """
+    Directory holding the .npy blobs of an object saved with save_object(..., mmap_arrays=True),
+    e.g. model_arrays/ next to model.pkl.
+    """
+    return os.path.splitext(file_path)[0] + "_arrays"
+
+
+class DeferredObject:
+    """
+    Pickled bytes of an object that is only unpickled when first needed. When saved in the
+    memory-mappable layout the bytes are an .npy blob, so they stay in the shared page cache
+    and cost no private memory until load() is called.
+    """
+
+    def __init__(self, payload: np.ndarray):
+        self.payload = payload
+
+    @classmethod
+    def wrap(cls, obj: object) -> "DeferredObject":
+        return cls(np.frombuffer(dill.dumps(obj), dtype=np.uint8))
+
+    def load(self) -> object:
+        return dill.loads(memoryview(self.payload))
+
+
+def _restore_object(cls, state: dict) -> object:
+    obj = cls.__new__(cls)
+    obj.__dict__.update(state)
+    return obj
+
+
+class _ArrayExternalizingPickler(dill.Pickler):
+    """
+    Writes every large NumPy array as a raw .npy blob next to the pickle and pickles only a
+    reference to it. Objects can customize what they save in this layout with __mmap_state__().
+    """
+
+    def __init__(self, file, arrays_dir: str, min_bytes: int = MMAP_ARRAY_MIN_BYTES):
+        super().__init__(file)
+        self.arrays_dir = arrays_dir
+        self.min_bytes = min_bytes
+        self._saved = {}
+
+    def persistent_id(self, obj):
+        if not isinstance(obj, np.ndarray) or obj.dtype.hasobject or obj.nbytes < self.min_bytes:
+            return None
+        if id(obj) not in self._saved:
+            file_name = f"{len(self._saved)}.npy"
+            np.save(os.path.join(self.arrays_dir, file_name), np.ascontiguousarray(obj), allow_pickle=False)
+            self._saved[id(obj)] = (obj, ("npy", os.path.basename(self.arrays_dir) + "/" + file_name))
+        return self._saved[id(obj)][1]
+
+    def reducer_override(self, obj):
+        mmap_state = getattr(obj, "__mmap_state__", None)
+        if mmap_state is None or isinstance(obj, type):
+            return NotImplemented
+        return _restore_object, (type(obj), mmap_state())
+
+
+class _ArrayMappingUnpickler(dill.Unpickler):
+    """
+    Resolves the .npy references written by _ArrayExternalizingPickler as read-only memory maps.
+    """
+
+    def __init__(self, file, base_dir: str):
+        super().__init__(file)
+        self.base_dir = base_dir
+
+    def persistent_load(self, pid):
+        kind, relative_path = pid
+        if kind != "npy":
+            raise pickle.UnpicklingError(f"Unsupported persistent id {pid!r}")
+        return np.load(os.path.join(self.base_dir, relative_path), mmap_mode="r", allow_pickle=False)
+
+
+def save_object(file_path: str, obj: object, mmap_arrays: bool = False) -> None:
+    """
+    Pickles obj to file_path.
+    mmap_arrays: store large NumPy arrays as .npy blobs in get_mmap_arrays_dir(file_path) instead,
+    so load_object memory-maps them and every process loading the file shares one page-cache copy.
+    """
     logger.info("Entered the save_object method of utils")
 
     try:
         os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        arrays_dir = get_mmap_arrays_dir(file_path)
+        if os.path.isdir(arrays_dir):
+            shutil.rmtree(arrays_dir)
+
         with open(file_path, "wb") as file_obj:
-            dill.dump(obj, file_obj)
+            if mmap_arrays:
+                os.makedirs(arrays_dir)
+                _ArrayExternalizingPickler(file_obj, arrays_dir).dump(obj)
+            else:
+                dill.dump(obj, file_obj)
 
         logger.info("Exited the save_object method of utils")
 
@@ -47,10 +152,11 @@ def save_object(file_path: str, obj: object) -> None:
 def load_object(path: str) -> object:
     """
     Returns model/object from project directory.
+    Objects saved with mmap_arrays=True get their large arrays as read-only memory maps.
     """
     try:
         with open(path, "rb") as obj:
-            matter = dill.load(obj)
+            matter = _ArrayMappingUnpickler(obj, base_dir=os.path.dirname(os.path.abspath(path))).load()
         return matter
     except Exception as e:
         raise CustomException(e, sys) from e
@@ -81,3 +187,139 @@ def load_numpy_array_data(file_path: str) -> np.array:
             return np.load(file_obj)
     except Exception as e:
         raise CustomException(e, sys) from e
+
+
+# Arrow types of the column types declared in config/schema.yaml
+SCHEMA_ARROW_TYPES = {"int": "int64", "float": "float64", "category": "string"}
+PARQUET_ROW_GROUP_ROWS = 1000000
+
+
+def get_dataframe_file_format(file_path: str) -> str:
+    """
+    Returns "parquet" or "csv" from the extension of a data file.
+    """
+    file_format = os.path.splitext(file_path)[1].lstrip(".").lower()
+    if file_format not in ("parquet", "csv"):
+        raise ValueError(f"Unsupported data file format: {file_path}")
+    return file_format
+
+
+def get_arrow_schema(dataframe: pd.DataFrame, column_dtypes: dict = None):
+    """
+    Arrow schema of a dataframe, with the declared type of every column listed in column_dtypes,
+    so that e.g. an int column with missing values is stored as nullable int64 rather than float.
+    """
+    import pyarrow as pa
+
+    column_dtypes = column_dtypes or {}
+    schema = pa.Schema.from_pandas(dataframe, preserve_index=False)
+    return pa.schema([pa.field(field.name, pa.type_for_alias(SCHEMA_ARROW_TYPES[column_dtypes[field.name]])
+                               if field.name in column_dtypes else field.type) for field in schema])
+
+
+class DataFrameWriter:
+    """
+    Writes dataframe batches into one CSV or Parquet file. The first batch fixes the columns (and,
+    for Parquet, the schema, see get_arrow_schema); later batches are aligned to them.
+    """
+
+    def __init__(self, file_path: str, column_dtypes: dict = None, file_format: str = None,
+                 compression: str = FEATURE_STORE_PARQUET_COMPRESSION):
+        """
+        :param file_path: File to write, created with its directory
+        :param column_dtypes: Column types of config/schema.yaml, for the Parquet schema
+        :param file_format: "parquet" or "csv"; taken from the extension of file_path when omitted
+        :param compression: Parquet compression codec
+        """
+        self.file_path = file_path
+        self.column_dtypes = column_dtypes
+        self.file_format = file_format or get_dataframe_file_format(file_path)
+        self.compression = compression
+        self.columns = None
+        self.rows = 0
+        self._schema = None
+        self._file = None
+
+    def write(self, dataframe: pd.DataFrame) -> None:
+        try:
+            if self._file is None:
+                os.makedirs(os.path.dirname(self.file_path) or ".", exist_ok=True)
+                self.columns = list(dataframe.columns)
+                if self.file_format == "parquet":
+                    import pyarrow.parquet as pq
+                    self._schema = get_arrow_schema(dataframe, self.column_dtypes)
+                    self._file = pq.ParquetWriter(self.file_path, self._schema, compression=self.compression)
+                else:
+                    self._file = open(self.file_path, "w", newline="")
+                    dataframe.iloc[:0].to_csv(self._file, index=False, header=True)
+            if list(dataframe.columns) != self.columns:
+                # Fields missing from a batch are left empty
+                dataframe = dataframe.reindex(columns=self.columns)
+
+            if self.file_format == "parquet":
+                import pyarrow as pa
+                # One row group at a time, so that only a slice of the dataframe is ever copied into Arrow
+                for start in range(0, len(dataframe), PARQUET_ROW_GROUP_ROWS):
+                    self._file.write_table(pa.Table.from_pandas(dataframe.iloc[start:start + PARQUET_ROW_GROUP_ROWS],
+                                                                schema=self._schema, preserve_index=False))
+            else:
+                dataframe.to_csv(self._file, index=False, header=False)
+            self.rows += len(dataframe)
+        except Exception as e:
+            raise CustomException(e, sys) from e
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self) -> "DataFrameWriter":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def save_dataframe(file_path: str, dataframe: pd.DataFrame, column_dtypes: dict = None) -> None:
+    """
+    Save a dataframe as CSV or Parquet, by the extension of file_path
+    file_path: str location of file to save
+    dataframe: pd.DataFrame data to save
+    column_dtypes: dict column types of config/schema.yaml, for the Parquet schema
+    """
+    try:
+        with DataFrameWriter(file_path, column_dtypes) as writer:
+            writer.write(dataframe)
+    except Exception as e:
+        raise CustomException(e, sys) from e
+
+
+def load_dataframe(file_path: str, columns: list = None) -> pd.DataFrame:
+    """
+    Load a CSV or Parquet file, by its extension, as a dataframe
+    file_path: str location of file to load
+    columns: list names of the columns to read, in order; all columns when omitted.
+             Parquet only reads these columns from disk.
+    return: pd.DataFrame data loaded
+    """
+    try:
+        if get_dataframe_file_format(file_path) == "parquet":
+            return pd.read_parquet(file_path, columns=columns)
+        dataframe = pd.read_csv(file_path, usecols=columns)
+        return dataframe if columns is None else dataframe[list(columns)]
+    except Exception as e:
+        raise CustomException(e, sys) from e
+
+
+def load_dataframe_schema(file_path: str) -> pd.DataFrame:
+    """
+    Returns an empty dataframe with the columns and dtypes of a CSV or Parquet file, without
+    reading its rows (a Parquet file's schema is read from its footer).
+    """
+    try:
+        if get_dataframe_file_format(file_path) == "parquet":
+            import pyarrow.parquet as pq
+            return pq.read_schema(file_path).empty_table().to_pandas()
+        return pd.read_csv(file_path, nrows=0)
+    except Exception as e:
+        raise CustomException(e, sys) from e
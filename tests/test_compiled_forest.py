@@ -0,0 +1,122 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.compose import ColumnTransformer
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import MinMaxScaler, StandardScaler
+
+from src.entity.compiled_forest import CompiledForest
+
+STANDARD_COLUMNS = ["Age", "Vintage"]
+MINMAX_COLUMNS = ["Annual_Premium"]
+PASSTHROUGH_COLUMNS = ["Gender", "Driving_License", "Region_Code", "Previously_Insured", "Policy_Sales_Channel",
+                       "Vehicle_Age_lt_1_Year", "Vehicle_Age_gt_2_Years", "Vehicle_Damage_Yes"]
+
+
+def make_rows(n_rows: int, seed: int) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    vehicle_age = rng.integers(0, 3, n_rows)
+    return pd.DataFrame({
+        "Gender": rng.integers(0, 2, n_rows),
+        "Age": rng.integers(20, 85, n_rows),
+        "Driving_License": rng.integers(0, 2, n_rows),
+        "Region_Code": rng.integers(0, 53, n_rows).astype(np.float64),
+        "Previously_Insured": rng.integers(0, 2, n_rows),
+        "Annual_Premium": rng.uniform(2630, 100000, n_rows).round(1),
+        "Policy_Sales_Channel": rng.integers(1, 163, n_rows).astype(np.float64),
+        "Vintage": rng.integers(10, 300, n_rows),
+        "Vehicle_Age_lt_1_Year": (vehicle_age == 0).astype(int),
+        "Vehicle_Age_gt_2_Years": (vehicle_age == 2).astype(int),
+        "Vehicle_Damage_Yes": rng.integers(0, 2, n_rows),
+    })
+
+
+@pytest.fixture(scope="module")
+def fitted_model():
+    """
+    A forest fitted on the same kind of preprocessing as DataTransformation builds: scaled and
+    passthrough columns of one ColumnTransformer wrapped in a Pipeline.
+    """
+    rows = make_rows(3000, seed=0)
+    target = ((rows["Previously_Insured"] == 0) & (rows["Vehicle_Damage_Yes"] == 1)
+              & (rows["Age"] + rows["Vintage"] / 10 + np.random.default_rng(1).normal(0, 15, len(rows)) > 50))
+    preprocessor = Pipeline(steps=[("Preprocessor", ColumnTransformer(
+        transformers=[("StandardScaler", StandardScaler(), STANDARD_COLUMNS),
+                      ("MinMaxScaler", MinMaxScaler(), MINMAX_COLUMNS)],
+        remainder="passthrough"))])
+    forest = RandomForestClassifier(n_estimators=40, max_depth=8, min_samples_leaf=3, random_state=101)
+    forest.fit(preprocessor.fit_transform(rows), target.astype(int))
+    return preprocessor, forest, CompiledForest.from_model(preprocessor, forest)
+
+
+def sklearn_proba(fitted_model, rows: pd.DataFrame) -> np.ndarray:
+    preprocessor, forest, _ = fitted_model
+    return forest.predict_proba(preprocessor.transform(rows))
+
+
+def threshold_adjacent_rows(compiled: CompiledForest, columns, n_nodes: int = 300) -> pd.DataFrame:
+    """
+    Rows that put one feature exactly on a folded split threshold and on the float64 values
+    just below and above it, where a wrongly folded threshold would send the row the other way.
+    """
+    rng = np.random.default_rng(2)
+    base = make_rows(n_nodes, seed=3)[columns].to_numpy(dtype=np.float64)
+    internal = np.flatnonzero(np.isfinite(compiled.threshold))
+    nodes = rng.choice(internal, size=n_nodes, replace=len(internal) < n_nodes)
+    rows = []
+    for row, node in zip(base, nodes):
+        threshold = compiled.threshold[node]
+        for value in (np.nextafter(threshold, -np.inf), threshold, np.nextafter(threshold, np.inf)):
+            adjacent = row.copy()
+            adjacent[compiled.feature[node]] = value
+            rows.append(adjacent)
+    return pd.DataFrame(rows, columns=columns)
+
+
+def test_compiled_forest_matches_sklearn_on_scaled_and_passthrough_columns(fitted_model):
+    _, forest, compiled = fitted_model
+    rows = make_rows(2000, seed=4)
+
+    assert np.array_equal(compiled.predict_proba(compiled.to_array(rows)), sklearn_proba(fitted_model, rows))
+    assert np.array_equal(compiled.predict(compiled.to_array(rows)), forest.predict(fitted_model[0].transform(rows)))
+
+
+def test_compiled_forest_uses_scaled_and_passthrough_splits(fitted_model):
+    _, _, compiled = fitted_model
+    split_columns = {compiled.feature_names[index] for index in compiled.feature[np.isfinite(compiled.threshold)]}
+
+    assert split_columns & set(STANDARD_COLUMNS + MINMAX_COLUMNS)
+    assert split_columns & set(PASSTHROUGH_COLUMNS)
+
+
+def test_compiled_forest_matches_sklearn_next_to_thresholds(fitted_model):
+    _, _, compiled = fitted_model
+    rows = threshold_adjacent_rows(compiled, compiled.feature_names)
+
+    assert np.array_equal(compiled.predict_proba(compiled.to_array(rows)), sklearn_proba(fitted_model, rows))
+
+
+@pytest.mark.parametrize("chunk_size", [1, 4, 16, 64])
+def test_early_exit_returns_the_full_forest_labels(fitted_model, chunk_size):
+    _, _, compiled = fitted_model
+    rows = pd.concat([make_rows(1000, seed=5), threshold_adjacent_rows(compiled, compiled.feature_names)],
+                     ignore_index=True)
+    features = compiled.to_array(rows)
+
+    labels, trees_used = compiled.predict_early_exit(features, chunk_size=chunk_size)
+
+    assert np.array_equal(labels, compiled.predict(features))
+    assert ((trees_used >= 1) & (trees_used <= compiled.n_trees)).all()
+
+
+def test_save_creates_the_directory_and_load_round_trips(fitted_model, tmp_path):
+    _, _, compiled = fitted_model
+    file_path = tmp_path / "trained_model" / "compiled_model.npz"
+    rows = make_rows(200, seed=6)
+
+    compiled.save(str(file_path))
+    loaded = CompiledForest.load(str(file_path))
+
+    assert loaded.feature_names == compiled.feature_names
+    assert np.array_equal(loaded.predict_proba(loaded.to_array(rows)), compiled.predict_proba(compiled.to_array(rows)))
@@ -0,0 +1,151 @@
+import json
+import os
+
+import numpy as np
+import pytest
+
+from src.serving.prediction_log import FilePredictionLogSink, MongoPredictionLogSink, PredictionLog
+
+FEATURE_COLUMNS = ["Age", "Vintage"]
+
+
+def make_records(n_records: int, start: int = 0) -> list:
+    return [{"Age": 30.0 + index, "Vintage": 100.0, "timestamp": 1.0, "route": "v1", "model_key": None,
+             "model_version": "1", "prediction": index % 2, "probability": 0.5, "latency_ms": 1.0}
+            for index in range(start, start + n_records)]
+
+
+class RecordingSink:
+    def __init__(self, failures: int = 0):
+        self.failures = failures
+        self.attempts = 0
+        self.records = []
+
+    def write(self, records):
+        self.attempts += 1
+        if self.attempts <= self.failures:
+            raise ConnectionError("sink is down")
+        self.records.extend(records)
+
+    def close(self):
+        pass
+
+
+def unstarted_log(sink, max_buffer_records: int = 10, max_retries: int = 3) -> PredictionLog:
+    """
+    A PredictionLog whose writer thread never starts, so tests drive the buffer and writes themselves.
+    """
+    prediction_log = PredictionLog(sink, FEATURE_COLUMNS, max_buffer_records=max_buffer_records, batch_size=100,
+                                   flush_interval_seconds=0.01, max_retries=max_retries)
+    prediction_log._ensure_started = lambda: None
+    # No backoff between retries
+    prediction_log._stopping.set()
+    return prediction_log
+
+
+def test_file_sink_rotates_and_renames_completed_files(tmp_path):
+    sink = FilePredictionLogSink(str(tmp_path), "ndjson", FEATURE_COLUMNS, rotate_bytes=1, rotate_seconds=3600)
+
+    sink.write(make_records(2))
+    assert [name.endswith(".ndjson.inprogress") for name in os.listdir(tmp_path)] == [True]
+
+    sink.write(make_records(3, start=2))
+    sink.close()
+
+    names = sorted(os.listdir(tmp_path))
+    assert len(names) == 2 and all(name.endswith(".ndjson") for name in names)
+    lines = [json.loads(line) for name in names for line in open(tmp_path / name)]
+    assert [line["Age"] for line in lines] == [30.0, 31.0, 32.0, 33.0, 34.0]
+
+
+def test_file_sink_writes_parquet(tmp_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+    sink = FilePredictionLogSink(str(tmp_path), "parquet", FEATURE_COLUMNS, rotate_bytes=2 ** 30, rotate_seconds=3600)
+
+    sink.write(make_records(2))
+    sink.write(make_records(2, start=2))
+    sink.close()
+
+    (name,) = os.listdir(tmp_path)
+    assert name.endswith(".parquet")
+    assert pq.read_table(tmp_path / name).column("Age").to_pylist() == [30.0, 31.0, 32.0, 33.0]
+
+
+def test_full_buffer_drops_and_counts_records():
+    prediction_log = unstarted_log(RecordingSink(), max_buffer_records=3)
+
+    accepted = [prediction_log.log("v1", np.array([[30.0, 100.0]]), 1) for _ in range(4)]
+    batch_accepted = prediction_log.log_many("batch", np.zeros((2, 2)), np.array([0, 1]))
+
+    assert accepted == [True, True, True, False] and not batch_accepted
+    assert prediction_log.stats()["buffered"] == 3
+    assert prediction_log.stats()["logged"] == 3 and prediction_log.stats()["dropped"] == 3
+
+
+def test_batch_rows_become_one_record_each():
+    sink = RecordingSink()
+    prediction_log = unstarted_log(sink)
+
+    prediction_log.log_many("batch", np.array([[30.0, 100.0], [40.0, 200.0]]), np.array([0, 1]),
+                            latency_seconds=0.002, model_version="7")
+    prediction_log._write(prediction_log._next_batch())
+
+    assert [(record["Age"], record["prediction"], record["route"]) for record in sink.records] == \
+        [(30.0, 0, "batch"), (40.0, 1, "batch")]
+    assert sink.records[0]["latency_ms"] == pytest.approx(2.0) and sink.records[1]["model_version"] == "7"
+    assert prediction_log.stats()["buffered"] == 0 and prediction_log.stats()["written"] == 2
+
+
+def test_failed_write_is_retried_then_counted_as_failed():
+    recovering_sink = RecordingSink(failures=2)
+    prediction_log = unstarted_log(recovering_sink, max_retries=3)
+    prediction_log.log("v1", np.array([[30.0, 100.0]]), 1)
+    prediction_log._write(prediction_log._next_batch())
+
+    assert recovering_sink.attempts == 3 and len(recovering_sink.records) == 1
+    assert prediction_log.stats()["written"] == 1 and prediction_log.stats()["failed"] == 0
+
+    failing_sink = RecordingSink(failures=10)
+    prediction_log = unstarted_log(failing_sink, max_retries=2)
+    prediction_log.log_many("batch", np.zeros((2, 2)), np.array([0, 1]))
+    prediction_log._write(prediction_log._next_batch())
+
+    assert failing_sink.attempts == 3
+    assert prediction_log.stats()["written"] == 0 and prediction_log.stats()["failed"] == 2
+
+
+@pytest.fixture
+def mongo_collection(monkeypatch):
+    mongomock = pytest.importorskip("mongomock")
+    from src.configuration.mongo_db_connection import MongoDBClient
+
+    client = mongomock.MongoClient()
+    monkeypatch.setattr(MongoDBClient, "client", client)
+    return client["predictions_test"]["predictions"]
+
+
+def test_mongo_sink_ignores_records_inserted_by_an_earlier_attempt(mongo_collection):
+    sink = MongoPredictionLogSink("predictions_test", "predictions")
+    records = make_records(3)
+
+    sink.write(records[:2])
+    # A retry of the whole batch after the first two records were inserted
+    sink.write(records)
+
+    assert mongo_collection.count_documents({}) == 3
+
+
+def test_mongo_sink_raises_other_write_errors():
+    from pymongo.errors import BulkWriteError
+
+    class FailingCollection:
+        def insert_many(self, records, ordered):
+            # 121: document failed validation
+            raise BulkWriteError({"writeErrors": [{"index": 0, "code": 11000}, {"index": 1, "code": 121}],
+                                  "writeConcernErrors": []})
+
+    sink = MongoPredictionLogSink("predictions_test", "predictions")
+    sink._collection = FailingCollection()
+
+    with pytest.raises(BulkWriteError):
+        sink.write(make_records(2))